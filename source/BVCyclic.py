@@ -249,12 +249,7 @@ class GOneVS(GraphVectorSpace.GraphVectorSpace):
         # The sign is (induced sign of the edge permutation)
         # We assume the edges are always lexicographically ordered
         # For the computation we use that G.edges() returns the edges in lex ordering
-        # We first label the edges on a copy of G lexicographically
-        G1 = copy(G)
-        Shared.enumerate_edges(G1)
-        # We permute the graph, and read of the new labels
-        G1.relabel(p, inplace=True)
-        return Shared.Perm([j for (u, v, j) in G1.edges(sort=True)]).signature()
+        return Shared.edge_perm_sign_from_relabelling(G.edges(labels=False, sort=True), p)
 
 
 class GOneVS3V(GraphVectorSpace.GraphVectorSpace):
@@ -0,0 +1,150 @@
+"""Persistent, memory mapped index to look up the position of graph6 strings in a basis file.
+
+The index file stores the graph6 strings of the basis as sorted array of fixed width records together with their
+positions in the basis file. Lookups are binary searches in the memory mapped arrays, such that the index does not
+need to be loaded into memory and is shared read-only between processes via the page cache.
+"""
+
+__all__ = ['BasisIndex']
+
+import os
+import numpy as np
+import StoreLoad
+
+
+# Magic bytes at the start of a basis index file.
+index_magic = b'GHBIDX01'
+# Number of int64 numbers in the header: (dimension, record width, basis file size, basis file mtime in ns).
+header_length = 4
+
+
+class BasisIndex:
+    """Read-only lookup from graph6 strings of basis elements to their index in the basis.
+
+    Provides the dictionary methods get, __getitem__, __contains__ and __len__, such that it can replace the lookup
+    dictionary {G6: j for (j, G6) in enumerate(basis_g6)}.
+
+    Attributes:
+        - path (path): Path to the index file.
+        - dimension (int): Number of basis elements.
+        - width (int): Length of the fixed width records, i.e. of the longest graph6 string.
+    """
+
+    def __init__(self, path):
+        """Open the index file.
+
+        :param path: Path to the index file.
+        :type path: path
+        :raise StoreLoad.FileNotFoundError: Raised if the index file is not found.
+        :raise ValueError: Raised if the file is not a basis index file.
+        """
+        self.path = path
+        header = BasisIndex.load_header(path)
+        (self.dimension, self.width) = header[:2]
+        offset = len(index_magic) + 8 * header_length
+        if self.dimension == 0:
+            self._keys = np.zeros(0, dtype='S1')
+            self._positions = np.zeros(0, dtype='<i8')
+        else:
+            self._keys = np.memmap(path, dtype='S%d' % self.width, mode='r', offset=offset,
+                                   shape=(self.dimension,))
+            self._positions = np.memmap(path, dtype='<i8', mode='r', offset=offset + self.dimension * self.width,
+                                        shape=(self.dimension,))
+
+    def __getstate__(self):
+        # Only pickle the path, the memory mapped arrays are reopened in the receiving process.
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def __len__(self):
+        return self.dimension
+
+    def get(self, G6, default=None):
+        """Return the index of the graph6 string in the basis.
+
+        :param G6: graph6 string.
+        :type G6: str
+        :param default: Value returned if the graph6 string is not in the basis (Default: None).
+        :return: Index of G6 in the basis file or default.
+        :rtype: int
+        """
+        key = G6.encode('ascii')
+        if len(key) > self.width:
+            return default
+        i = int(np.searchsorted(self._keys, key))
+        if i < self.dimension and self._keys[i] == key:
+            return int(self._positions[i])
+        return default
+
+    def __getitem__(self, G6):
+        j = self.get(G6)
+        if j is None:
+            raise KeyError(G6)
+        return j
+
+    def __contains__(self, G6):
+        return self.get(G6) is not None
+
+    @staticmethod
+    def load_header(path):
+        """Load the header of an index file.
+
+        :param path: Path to the index file.
+        :type path: path
+        :return: (dimension, record width, basis file size, basis file mtime in ns)
+        :rtype: tuple(int, int, int, int)
+        :raise StoreLoad.FileNotFoundError: Raised if the index file is not found.
+        :raise ValueError: Raised if the file is not a basis index file.
+        """
+        if not os.path.isfile(path):
+            raise StoreLoad.FileNotFoundError(
+                "Cannot load basis index, No index file found: %s" % str(path))
+        with open(path, 'rb') as f:
+            magic = f.read(len(index_magic))
+            header = np.frombuffer(f.read(8 * header_length), dtype='<i8')
+        if magic != index_magic or len(header) != header_length:
+            raise ValueError("%s: Not a basis index file" % str(path))
+        return tuple(map(int, header))
+
+    @staticmethod
+    def is_up_to_date(path, basis_path):
+        """Return whether the index file exists and has been built from the current basis file.
+
+        :param path: Path to the index file.
+        :type path: path
+        :param basis_path: Path to the basis file.
+        :type basis_path: path
+        :return: True if the index file is up to date.
+        :rtype: bool
+        """
+        try:
+            header = BasisIndex.load_header(path)
+        except (StoreLoad.FileNotFoundError, ValueError):
+            return False
+        stat = os.stat(basis_path)
+        return header[2:] == (stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def build(basis_g6, path, basis_path):
+        """Build the index file for a basis.
+
+        :param basis_g6: List of graph6 strings of the basis in the order of the basis file.
+        :type basis_g6: list(str)
+        :param path: Path to the index file.
+        :type path: path
+        :param basis_path: Path to the basis file, whose size and modification time are recorded to detect an
+            outdated index.
+        :type basis_path: path
+        """
+        keys = np.array([G6.encode('ascii') for G6 in basis_g6], dtype='S')
+        width = max(keys.dtype.itemsize, 1)
+        order = np.argsort(keys, kind='stable')
+        stat = os.stat(basis_path)
+        header = np.array([len(keys), width, stat.st_size, stat.st_mtime_ns], dtype='<i8')
+        with StoreLoad.atomic_open(path, 'wb') as f:
+            f.write(index_magic)
+            f.write(header.tobytes())
+            f.write(keys[order].astype('S%d' % width).tobytes())
+            f.write(order.astype('<i8').tobytes())
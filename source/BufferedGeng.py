@@ -4,6 +4,7 @@ import Parameters
 import StoreLoad
 import os
 import NautyInterface
+import Graph6
 
 
 # this is a hack... should be geng, with symlink to bin"
@@ -19,8 +20,8 @@ def _get_geng_args_and_file(n_vertices, n_edges, onlyonevi=True):
 
 
 def fill_cache(n_vertices, n_edges, onlyonevi=True):
-    # WARNING: Ctrl+C-ing this computation results in an incomplete, i.e., corrupt, cache file!!!!!
-    # Could be improved by using temp file then copying...
+    # nauty writes to a temporary file, which is renamed once complete, such that an interrupted
+    # computation never leaves a corrupt cache file.
     if n_vertices <= 0 or n_edges <= 0 or 3 * n_vertices > 2 * n_edges or n_edges > n_vertices * (n_vertices - 1) / 2:
         return
     args, filename = _get_geng_args_and_file(n_vertices, n_edges, onlyonevi)
@@ -29,12 +30,19 @@ def fill_cache(n_vertices, n_edges, onlyonevi=True):
 
     StoreLoad.generate_path(filename)
 
-    nauty_string = f"{geng_path} -{args} {n_vertices} {n_edges}:{n_edges} {filename}"
+    temp_filename = f"{filename}.tmp{os.getpid()}"
+    nauty_string = f"{geng_path} -{args} {n_vertices} {n_edges}:{n_edges} {temp_filename}"
     print("Running nauty: ", nauty_string)
-    NautyInterface.run_sys_cmd(nauty_string)
+    try:
+        NautyInterface.run_sys_cmd(nauty_string)
+        os.replace(temp_filename, filename)
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
 
 
-def list_simple_graphs_buffered(n_vertices, n_edges, onlyonevi=True):
+def list_simple_graphs_buffered(n_vertices, n_edges, onlyonevi=True, compact=False):
+    # Returns sage graphs, or CompactGraph.CompactGraph instances decoded in bulk if compact is True.
     if n_vertices <= 0 or n_edges <= 0 or 3 * n_vertices > 2 * n_edges or n_edges > n_vertices * (n_vertices - 1) / 2:
         return []
     _, filename = _get_geng_args_and_file(n_vertices, n_edges, onlyonevi)
@@ -50,6 +58,8 @@ def list_simple_graphs_buffered(n_vertices, n_edges, onlyonevi=True):
         list_g6 = txt.splitlines()
         print(f"Buffered nauty generated {len(list_g6)} graphs.")
 
+    if compact:
+        return Graph6.decode_compact_graphs(list_g6)
     return (Graph(g6) for g6 in list_g6)
 
 
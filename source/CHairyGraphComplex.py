@@ -156,12 +156,12 @@ class CHairyGraphVS(SymmetricGraphComplex.SymmetricGraphVectorSpace):
     def get_generating_graphs(self):
         # The routines above produce all hairy graphs, we just have to permute the hair labels
 
-        # Produce all permutations of the hairs
-        all_perm = [list(range(0, self.n_vertices)) + list(p)
-                    for p in itertools.permutations(range(self.n_vertices, self.n_vertices+self.n_hairs))]
-
-        return (G.relabel(p, inplace=False) for G in self.get_hairy_graphs(self.n_vertices, self.n_loops, self.n_hairs)
-                for p in all_perm)
+        # Produce the permutations of the hairs up to automorphisms of the graph
+        idv = list(range(0, self.n_vertices))
+        hairs = list(range(self.n_vertices, self.n_vertices+self.n_hairs))
+        target_cells = [[j] for j in hairs]
+        return (G.relabel(idv + p, inplace=False) for G in self.get_hairy_graphs(self.n_vertices, self.n_loops, self.n_hairs)
+                for p in Shared.hair_labellings(G, [idv, hairs], hairs, target_cells))
 
     def perm_sign(self, G, p):
         # The sign is the same as the corresponding sign in the
@@ -337,30 +337,36 @@ class ContractEdgesGO(SymmetricGraphComplex.SymmetricGraphOperator):
     def get_type(self):
         return 'contract edges'
 
+    element_type = 'edges'
+
     def operate_on(self, G):
         # Operates on the graph G by contracting an edge and unifying the adjacent vertices.
         image = []
-        for (i, e) in enumerate(G.edges(labels=False, sort=True)):
-            (u, v) = e
-            # only edges not connected to a hair-vertex can be contracted
-            if u >= self.domain.n_vertices or v >= self.domain.n_vertices:
-                continue
-            pp = Shared.permute_to_left((u, v), range(
-                0, self.domain.n_vertices + self.domain.n_hairs))
-            sgn = self.domain.perm_sign(G, pp)
-            G1 = copy(G)
-            G1.relabel(pp, inplace=True)
-            Shared.enumerate_edges(G1)
-            previous_size = G1.size()
-            G1.merge_vertices([0, 1])
-            if (previous_size - G1.size()) != 1:
-                continue
-            G1.relabel(list(range(0, G1.order())), inplace=True)
-            if not self.domain.even_edges:
-                sgn *= Shared.shifted_edge_perm_sign(G1)
-            image.append((G1, sgn))
+        for e in G.edges(labels=False, sort=True):
+            image.extend(self.operate_on_element(G, e))
         return image
 
+    def operate_on_element(self, G, e):
+        # Contracts the edge e and unifies the adjacent vertices.
+        (u, v) = e
+        # only edges not connected to a hair-vertex can be contracted
+        if u >= self.domain.n_vertices or v >= self.domain.n_vertices:
+            return []
+        pp = Shared.permute_to_left((u, v), range(
+            0, self.domain.n_vertices + self.domain.n_hairs))
+        sgn = self.domain.perm_sign(G, pp)
+        G1 = copy(G)
+        G1.relabel(pp, inplace=True)
+        Shared.enumerate_edges(G1)
+        previous_size = G1.size()
+        G1.merge_vertices([0, 1])
+        if (previous_size - G1.size()) != 1:
+            return []
+        G1.relabel(list(range(0, G1.order())), inplace=True)
+        if not self.domain.even_edges:
+            sgn *= Shared.shifted_edge_perm_sign(G1)
+        return [(G1, sgn)]
+
     def restrict_to_isotypical_component(self, rep_index):
         #opP = self.domain.get_isotypical_projector(rep_index)
         return RestrictedContractEdgesGO(self, rep_index)
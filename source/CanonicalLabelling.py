@@ -0,0 +1,191 @@
+"""Backends for the canonical labelling of graphs respecting a partition of the vertices.
+
+A single call returns the graph6 string of the canonically labeled graph, the labelling permutation and
+(optionally) the generators of the automorphism group. The backend is chosen with Parameters.canonical_label_algorithm:
+    - None or 'sage': Sage's canonical_label and automorphism_group methods. With the algorithm 'sage' the canonical
+      label and the automorphism group of a simple graph are computed in a single search tree traversal.
+    - 'nauty': nauty's densenauty through the pynauty package, called on the adjacency lists of the graph. pynauty
+      has no call returning both the labelling and the automorphism group, hence nauty is run a second time if the
+      generators are requested.
+There is no bliss backend: Sage's bindings in sage.graphs.bliss leak memory as documented in BlissMemLeak.py.
+Different backends yield different canonical forms. Hence, if the backend is changed, all bases and matrices have to
+be rebuilt.
+Besides Sage graphs the backends accept CompactGraph.CompactGraph instances. The nauty backend works on their edge
+lists directly, the other backends convert them to Sage graphs first.
+"""
+
+__all__ = ['canonical_form', 'automorphism_group', 'graph6_string', 'backends']
+
+import itertools
+from sage.all import *
+import Parameters
+import CompactGraph
+
+try:
+    import pynauty
+except ImportError:
+    pynauty = None
+
+
+# Available canonical labelling backends.
+backends = {None, 'sage', 'nauty'}
+
+
+def canonical_form(G, partition=None, automorphisms=False, algorithm=None):
+    """Return the canonical form of the graph G respecting the partition of the vertices.
+
+    The vertices of G are supposed to be labeled 0, ..., n-1.
+
+    :param G: Graph to be canonically labeled.
+    :type G: Graph or CompactGraph.CompactGraph
+    :param partition: Partition of the vertices in different colours (Default: None).
+    :type partition: list(list(int))
+    :param automorphisms: Option to compute the generators of the automorphism group respecting the partition as
+        well (Default: False).
+    :type automorphisms: bool
+    :param algorithm: Canonical labelling backend (Default: Parameters.canonical_label_algorithm).
+    :type algorithm: str
+    :return: (canon6, perm, autom_list): graph6 string of the canonically labeled graph, labelling permutation, i.e.
+        vertex j becomes vertex perm[j] in the canonically labeled graph, and generators of the automorphism group as
+        lists of images (None if automorphisms is False).
+    :rtype: tuple(str, list(int), list(list(int)))
+    :raise ValueError: Raised if the backend is unknown.
+    """
+    if algorithm is None:
+        algorithm = Parameters.canonical_label_algorithm
+    if algorithm not in backends:
+        raise ValueError("Canonical labelling backends: " + str(backends))
+    if algorithm == 'nauty':
+        return _nauty_canonical_form(G, partition, automorphisms)
+    if isinstance(G, CompactGraph.CompactGraph):
+        G = G.to_graph()
+    return _sage_canonical_form(G, partition, automorphisms, algorithm)
+
+
+def automorphism_group(G, partition=None, algorithm=None):
+    """Return the generators of the automorphism group of the graph G respecting the partition of the vertices.
+
+    Unlike canonical_form with automorphisms=True no canonical label is computed.
+
+    :param G: Graph.
+    :type G: Graph or CompactGraph.CompactGraph
+    :param partition: Partition of the vertices in different colours (Default: None).
+    :type partition: list(list(int))
+    :param algorithm: Canonical labelling backend (Default: Parameters.canonical_label_algorithm).
+    :type algorithm: str
+    :return: Generators of the automorphism group as lists of images.
+    :rtype: list(list(int))
+    :raise ValueError: Raised if the backend is unknown.
+    """
+    if algorithm is None:
+        algorithm = Parameters.canonical_label_algorithm
+    if algorithm not in backends:
+        raise ValueError("Canonical labelling backends: " + str(backends))
+    if algorithm == 'nauty':
+        (g, edges) = _nauty_graph(G, partition)
+        return [list(gen) for gen in pynauty.autgrp(g)[0]]
+    if isinstance(G, CompactGraph.CompactGraph):
+        G = G.to_graph()
+    return _gens_to_lists(G.automorphism_group(partition=partition).gens(), G.order())
+
+
+def _sage_canonical_form(G, partition, automorphisms, algorithm):
+    if automorphisms and algorithm == 'sage' and not (G.has_loops() or G.has_multiple_edges()):
+        return _sage_search_tree(G, partition)
+    n = G.order()
+    canonG, perm_dict = G.canonical_label(partition=partition, certificate=True, algorithm=algorithm)
+    perm = [perm_dict[j] for j in range(n)]
+    autom_list = None
+    if automorphisms:
+        autom_list = _gens_to_lists(G.automorphism_group(partition=partition).gens(), n)
+    return (canonG.graph6_string(), perm, autom_list)
+
+
+def _sage_search_tree(G, partition):
+    # Returns the canonical form and the automorphism group generators of a simple graph from a single search tree
+    # traversal, as done by Graph.canonical_label(algorithm='sage'), which yields the same canonical form.
+    from sage.groups.perm_gps.partn_ref.refinement_graphs import search_tree
+    n = G.order()
+    if partition is None:
+        partition = [list(G)]
+    G_vertices = list(itertools.chain(*partition))
+    G_to = {u: i for (i, u) in enumerate(G_vertices)}
+    H = Graph(len(G_vertices))
+    HB = H._backend
+    for (u, v) in G.edge_iterator(labels=False):
+        HB.add_edge(G_to[u], G_to[v], None, False)
+    GC = HB.c_graph()[0]
+    (gens, canonGC, certificate) = search_tree(GC, [[G_to[u] for u in cell] for cell in partition],
+                                               certificate=True, dig=False)
+    perm = [certificate[G_to[j]] for j in range(n)]
+    canon6 = graph6_string(n, [(perm[u], perm[v]) for (u, v) in G.edge_iterator(labels=False)])
+    autom_list = []
+    for gen in gens:
+        autom = [0] * n
+        for (i, u) in enumerate(G_vertices):
+            autom[u] = G_vertices[gen[i]]
+        autom_list.append(autom)
+    return (canon6, perm, autom_list)
+
+
+def _nauty_graph(G, partition):
+    # Returns the pynauty graph of G with the vertex colouring given by the partition and the edges of G.
+    if pynauty is None:
+        raise ImportError("The canonical labelling backend 'nauty' requires the pynauty package")
+    if G.has_loops() or G.has_multiple_edges():
+        raise ValueError("The canonical labelling backend 'nauty' only supports simple graphs")
+    edges = G.edges(labels=False, sort=False)
+    adjacency = {u: [] for u in range(G.order())}
+    for (u, v) in edges:
+        adjacency[u].append(v)
+    coloring = [] if partition is None else [set(cell) for cell in partition if len(cell) > 0]
+    return (pynauty.Graph(G.order(), directed=False, adjacency_dict=adjacency, vertex_coloring=coloring), edges)
+
+
+def _nauty_canonical_form(G, partition, automorphisms):
+    n = G.order()
+    (g, edges) = _nauty_graph(G, partition)
+    # canon_label returns the vertex of G placed at each position of the canonically labeled graph.
+    labelling = pynauty.canon_label(g)
+    perm = [0] * n
+    for (i, j) in enumerate(labelling):
+        perm[j] = i
+    canon6 = graph6_string(n, [(perm[u], perm[v]) for (u, v) in edges])
+    autom_list = None
+    if automorphisms:
+        # Second nauty search, since canon_label discards the generators found during its search.
+        autom_list = [list(gen) for gen in pynauty.autgrp(g)[0]]
+    return (canon6, perm, autom_list)
+
+
+def _gens_to_lists(gens, n):
+    autom_list = []
+    for p in gens:
+        pd = p.dict()
+        autom_list.append([pd[j] for j in range(n)])
+    return autom_list
+
+
+def graph6_string(n, edges):
+    """Return the graph6 string of a simple graph.
+
+    :param n: Number of vertices.
+    :type n: int
+    :param edges: Edges of the graph.
+    :type edges: list(tuple(int, int))
+    :return: graph6 string of the graph.
+    :rtype: str
+    """
+    if n <= 62:
+        header = chr(n + 63)
+    else:
+        header = '~' + ''.join(chr(((n >> s) & 63) + 63) for s in (12, 6, 0))
+    # Bits of the upper triangle of the adjacency matrix, column by column.
+    n_bits = n * (n - 1) // 2
+    bits = bytearray(n_bits + (-n_bits) % 6)
+    for (u, v) in edges:
+        (u, v) = (u, v) if u < v else (v, u)
+        bits[v * (v - 1) // 2 + u] = 1
+    body = ''.join(chr(63 + (bits[k] << 5 | bits[k + 1] << 4 | bits[k + 2] << 3 | bits[k + 3] << 2
+                             | bits[k + 4] << 1 | bits[k + 5])) for k in range(0, len(bits), 6))
+    return header + body
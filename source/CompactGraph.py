@@ -0,0 +1,244 @@
+"""Lightweight graph type for the hot loops of graph operators.
+
+Graph operators create many short lived graphs by copying, relabelling, merging vertices and deleting edges of a
+basis element. With Sage graphs the construction of these graphs dominates the matrix build time.
+CompactGraph stores a graph with vertices 0, ..., n-1 as plain lists of edges and implements the subset of the Sage
+Graph interface used by the operators, such that an operator can work on a CompactGraph without changing its code
+except for merging vertices (see CompactGraph.merge_vertices).
+CompactGraphs can be passed to CanonicalLabelling.canonical_form directly and be converted to Sage graphs with
+CompactGraph.to_graph.
+"""
+
+__all__ = ['CompactGraph', 'compact']
+
+from sage.all import Graph
+import CanonicalLabelling
+
+
+class CompactGraph:
+    """Undirected graph with vertices 0, ..., n-1 stored as lists of edges.
+
+    Loops and multiple edges are allowed. Each edge is stored as list [u, v, label] with u <= v under an edge id, and
+    indexed by its vertices, such that looking up, relabeling and deleting an edge given by its vertices takes
+    constant time.
+
+    Attributes:
+        - n (int): Number of vertices.
+        - edge_dict (dict(int -> list)): Edges [u, v, label] with u <= v by edge id, in the order of insertion.
+        - edge_index (dict(tuple(int, int) -> list(int))): Ids of the edges between u and v by (u, v) with u <= v.
+        - next_id (int): Id of the next edge added.
+    """
+    __slots__ = ('n', 'edge_dict', 'edge_index', 'next_id')
+
+    def __init__(self, n=0, edges=()):
+        """Initialize the graph.
+
+        :param n: Number of vertices (Default: 0).
+        :type n: int
+        :param edges: Edges (u, v) or (u, v, label) (Default: no edges).
+        :type edges: iterable(tuple)
+        """
+        self.n = n
+        self._set_edges([])
+        for e in edges:
+            self.add_edge(*e)
+
+    def _set_edges(self, edge_list):
+        # Replaces the edges by the edges [u, v, label] with u <= v of edge_list and rebuilds the index.
+        self.edge_dict = dict(enumerate(edge_list))
+        self.edge_index = {}
+        for (i, e) in self.edge_dict.items():
+            self.edge_index.setdefault((e[0], e[1]), []).append(i)
+        self.next_id = len(edge_list)
+
+    @classmethod
+    def from_graph(cls, G):
+        """Return the compact graph of a Sage graph with vertices 0, ..., n-1.
+
+        :param G: Sage graph.
+        :type G: Graph
+        :return: Compact graph with the same edges and edge labels as G.
+        :rtype: CompactGraph
+        """
+        H = cls.__new__(cls)
+        H.n = G.order()
+        H._set_edges([[u, v, l] if u <= v else [v, u, l] for (u, v, l) in G.edges(sort=False)])
+        return H
+
+    def to_graph(self):
+        """Return the Sage graph of the compact graph.
+
+        :return: Sage graph with the same edges and edge labels.
+        :rtype: Graph
+        """
+        G = Graph(self.n, loops=self.has_loops(), multiedges=self.has_multiple_edges())
+        G.add_edges([tuple(e) for e in self.edge_dict.values()])
+        return G
+
+    def copy(self):
+        H = CompactGraph.__new__(CompactGraph)
+        H.n = self.n
+        H.edge_dict = {i: list(e) for (i, e) in self.edge_dict.items()}
+        H.edge_index = {pair: list(ids) for (pair, ids) in self.edge_index.items()}
+        H.next_id = self.next_id
+        return H
+
+    __copy__ = copy
+
+    def order(self):
+        return self.n
+
+    def size(self):
+        return len(self.edge_dict)
+
+    def vertices(self, sort=True):
+        return list(range(self.n))
+
+    def edges(self, labels=True, sort=True):
+        """Return the edges as in the Sage Graph method edges.
+
+        :param labels: Option to include the edge labels (Default: True).
+        :type labels: bool
+        :param sort: Option to sort the edges lexicographically by their vertices, multiple edges keep their order
+            (Default: True).
+        :type sort: bool
+        :return: List of edges (u, v, label) or (u, v) with u <= v.
+        :rtype: list(tuple)
+        """
+        edge_list = self.edge_dict.values()
+        if sort:
+            edge_list = sorted(edge_list, key=lambda e: (e[0], e[1]))
+        if labels:
+            return [(u, v, l) for (u, v, l) in edge_list]
+        return [(u, v) for (u, v, l) in edge_list]
+
+    def _find_edge(self, u, v):
+        # Returns the id of the first edge between u and v or None.
+        ids = self.edge_index.get((u, v) if u <= v else (v, u))
+        return ids[0] if ids else None
+
+    def has_edge(self, u, v):
+        return self._find_edge(u, v) is not None
+
+    def edge_label(self, u, v):
+        i = self._find_edge(u, v)
+        if i is None:
+            raise LookupError("Edge (%d, %d) is not in the graph" % (u, v))
+        return self.edge_dict[i][2]
+
+    def set_edge_label(self, u, v, label):
+        i = self._find_edge(u, v)
+        if i is None:
+            raise LookupError("Edge (%d, %d) is not in the graph" % (u, v))
+        self.edge_dict[i][2] = label
+
+    def enumerate_edges(self):
+        """Label the edges lexicographically, as Shared.enumerate_edges does for Sage graphs."""
+        edge_list = sorted(self.edge_dict.values(), key=lambda e: (e[0], e[1]))
+        for (j, e) in enumerate(edge_list):
+            e[2] = j
+        self._set_edges(edge_list)
+
+    def add_edge(self, u, v, label=None):
+        (u, v) = (u, v) if u <= v else (v, u)
+        self.edge_dict[self.next_id] = [u, v, label]
+        self.edge_index.setdefault((u, v), []).append(self.next_id)
+        self.next_id += 1
+
+    def delete_edge(self, u, v=None):
+        """Delete one edge between u and v. The edge can also be given as tuple (u, v) as first argument."""
+        if v is None:
+            (u, v) = u[:2]
+        pair = (u, v) if u <= v else (v, u)
+        ids = self.edge_index.get(pair)
+        if not ids:
+            raise LookupError("Edge (%d, %d) is not in the graph" % (u, v))
+        del self.edge_dict[ids.pop(0)]
+        if not ids:
+            del self.edge_index[pair]
+
+    def degree(self, v):
+        return sum((e[0] == v) + (e[1] == v) for e in self.edge_dict.values())
+
+    def neighbors(self, v):
+        return sorted({e[1] if e[0] == v else e[0] for e in self.edge_dict.values() if v in (e[0], e[1])})
+
+    def has_loops(self):
+        return any(u == v for (u, v) in self.edge_index)
+
+    def has_multiple_edges(self):
+        return len(self.edge_index) < len(self.edge_dict)
+
+    def relabel(self, perm, inplace=True):
+        """Relabel the vertices: vertex j becomes vertex perm[j].
+
+        :param perm: Image of the vertex permutation.
+        :type perm: list(int)
+        :param inplace: If False return a relabeled copy (Default: True).
+        :type inplace: bool
+        :return: None if inplace is True, otherwise the relabeled graph.
+        :rtype: CompactGraph
+        """
+        H = self if inplace else CompactGraph.__new__(CompactGraph)
+        H.n = self.n
+        edge_list = []
+        for (u, v, l) in self.edge_dict.values():
+            (a, b) = (perm[u], perm[v])
+            edge_list.append([a, b, l] if a <= b else [b, a, l])
+        H._set_edges(edge_list)
+        return None if inplace else H
+
+    def merge_vertices(self, vertices, loops=False):
+        """Merge the vertices into the first one.
+
+        Other than for Sage graphs, the remaining vertices are relabeled to 0, ..., n-1 keeping their order, multiple
+        edges are kept and edges between the merged vertices are deleted unless loops is True.
+        Hence G.merge_vertices(vertices) corresponds to merge_vertices followed by relabel(range(order)) for a Sage
+        multigraph G.
+
+        :param vertices: Vertices to be merged.
+        :type vertices: list(int)
+        :param loops: Option to keep edges between the merged vertices as loops (Default: False).
+        :type loops: bool
+        """
+        v0 = vertices[0]
+        merged = set(vertices)
+        removed = sorted(merged - {v0})
+        shift = [0] * self.n
+        k = 0
+        for j in range(self.n):
+            if k < len(removed) and removed[k] == j:
+                k += 1
+            shift[j] = k
+        edge_list = []
+        for (u, v, l) in self.edge_dict.values():
+            if u in merged and v in merged and not loops:
+                continue
+            u = v0 if u in merged else u
+            v = v0 if v in merged else v
+            (u, v) = (u - shift[u], v - shift[v])
+            edge_list.append([u, v, l] if u <= v else [v, u, l])
+        self._set_edges(edge_list)
+        self.n -= len(removed)
+
+    def graph6_string(self):
+        """Return the graph6 string of the graph.
+
+        :return: graph6 string.
+        :rtype: str
+        :raise ValueError: Raised if the graph has loops or multiple edges.
+        """
+        if self.has_loops() or self.has_multiple_edges():
+            raise ValueError("graph6 strings are only defined for simple graphs")
+        return CanonicalLabelling.graph6_string(self.n, list(self.edge_index))
+
+
+def compact(G):
+    """Return G if it is a compact graph, otherwise the compact graph of the Sage graph G.
+
+    :param G: Graph.
+    :type G: Graph or CompactGraph
+    :return: Compact graph.
+    :rtype: CompactGraph
+    """
+    return G if isinstance(G, CompactGraph) else CompactGraph.from_graph(G)
@@ -340,13 +340,13 @@ class ForestedGVS(SymmetricGraphComplex.SymmetricGraphVectorSpace):
                 # newgs = [G for G in preGs]
                 yield from preGs
             else:
-                # Produce all permutations of the hairs, including those that are encoding tadpoles
-                id = Permutation(range(1, tp+1))
-                p1s = [p for pp in Permutations(self.n_hairs)
-                       for p in id.shifted_shuffle(pp)]
+                # Produce the permutations of the hairs, including those that are encoding tadpoles, up to
+                # automorphisms of the graph. The hairs encoding tadpoles become unmarked-edge vertices.
                 idv = list(range(0, self.n_vertices+self.n_unmarked_edges-tp))
-                all_perm = [idv + [j+self.n_vertices - 1 +
-                                   self.n_unmarked_edges-tp for j in p] for p in p1s]
+                hairs = list(range(self.n_vertices+self.n_unmarked_edges-tp,
+                                   self.n_vertices+self.n_unmarked_edges+self.n_hairs))
+                partition = [idv[:self.n_vertices], idv[self.n_vertices:], hairs]
+                target_cells = [hairs[:tp]] + [[j] for j in hairs[tp:]]
 
                 # all_perm = [list(range(0, self.n_vertices+self.n_unmarked_edges))
                 #             + list(p)
@@ -356,8 +356,8 @@ class ForestedGVS(SymmetricGraphComplex.SymmetricGraphVectorSpace):
                 # newgs = [G.relabel(p, inplace=False)
                 #          for G in preGs for p in all_perm]
                 for G in preGs:
-                    for p in all_perm:
-                        yield G.relabel(p, inplace=False)
+                    for p in Shared.hair_labellings(G, partition, hairs, target_cells):
+                        yield G.relabel(idv + p, inplace=False)
 
             # res = res+newgs
 
@@ -423,16 +423,11 @@ class ForestedGVS(SymmetricGraphComplex.SymmetricGraphVectorSpace):
             # The sign is (induced sign of the marked-edge-permutation)
             # We assume the edges are always lexicographically ordered
             # For the computation we use that G.edges() returns the edges in lex ordering
-            # We first label the edges on a copy of G lexicographically
-            G1 = copy(G)
-            self.label_marked_edges(G1)
-            # print("edges before ", [j for (u, v, j) in G1.edges()])
-            # We permute the graph, and read of the new labels, ...
-            # but only those between internal vertices of the first color, i.e., the first n_vertices ones
-            G1.relabel(p, inplace=True)
-            # print("edges after ", [(u, v, j) for (u, v, j) in G1.edges()])
-
-            return Shared.Perm([j for (u, v, j) in G1.edges(sort=True) if (u < self.n_vertices and v < self.n_vertices)]).signature()
+            # Only the edges between internal vertices of the first color, i.e., the first n_vertices ones, are
+            # permuted. They are mapped to each other, since p respects the colors.
+            marked_edges = [(u, v) for (u, v) in G.edges(labels=False, sort=True)
+                            if (u < self.n_vertices and v < self.n_vertices)]
+            return Shared.edge_perm_sign_from_relabelling(marked_edges, p)
 
     def get_n(self):
         return self.n_hairs
@@ -647,39 +642,47 @@ class ContractEdgesGO(SymmetricGraphComplex.SymmetricGraphOperator):
     def get_type(self):
         return 'contract edges'
 
+    element_type = 'edges'
+
     def operate_on(self, G):
         # Operates on the graph G by contracting a marked edge and unifying the adjacent vertices.
         image = []
-        for (u, v) in G.edges(labels=False, sort=True):
-            # only contract marked edges
-            if (u < self.domain.n_vertices and v < self.domain.n_vertices):
-                # move the two vertices to be merged to the first two positions
-                pp = Shared.permute_to_left(
-                    (u, v), range(0, G.order()))
-                sgn = self.domain.perm_sign(G, pp)
-                G1 = copy(G)
-                G1.relabel(pp, inplace=True)
-                self.domain.label_marked_edges(G1)
-                # previous_size = G1.size()
-                G1.merge_vertices([0, 1])
-                # if (previous_size - G1.size()) != 1:
-                #     continue
-                G1.relabel(list(range(0, G1.order())), inplace=True)
-                if not self.domain.even_edges:
-                    # for odd edges compute the sign of the permutation of internal edges
-                    p = [j for (a, b, j) in G1.edges(sort=True) if (
-                        a < self.target.n_vertices and b < self.target.n_vertices)]
-                    # If we removed more then one marked edge stop
-                    if len(p) < self.domain.n_marked_edges-1:
-                        print("This should not happen....")
-                        continue
-                    sgn *= Permutation(p).signature()
-                else:
-                    # There is no further sign for even edges
-                    sgn *= 1  # TODO overall sign for even edges
-                image.append((G1, sgn))
+        for e in G.edges(labels=False, sort=True):
+            image.extend(self.operate_on_element(G, e))
         return image
 
+    def operate_on_element(self, G, e):
+        # Contracts the edge e if it is marked and unifies the adjacent vertices.
+        (u, v) = e
+        # only contract marked edges
+        if not (u < self.domain.n_vertices and v < self.domain.n_vertices):
+            return []
+        # move the two vertices to be merged to the first two positions
+        pp = Shared.permute_to_left(
+            (u, v), range(0, G.order()))
+        sgn = self.domain.perm_sign(G, pp)
+        G1 = copy(G)
+        G1.relabel(pp, inplace=True)
+        self.domain.label_marked_edges(G1)
+        # previous_size = G1.size()
+        G1.merge_vertices([0, 1])
+        # if (previous_size - G1.size()) != 1:
+        #     continue
+        G1.relabel(list(range(0, G1.order())), inplace=True)
+        if not self.domain.even_edges:
+            # for odd edges compute the sign of the permutation of internal edges
+            p = [j for (a, b, j) in G1.edges(sort=True) if (
+                a < self.target.n_vertices and b < self.target.n_vertices)]
+            # If we removed more then one marked edge stop
+            if len(p) < self.domain.n_marked_edges-1:
+                print("This should not happen....")
+                return []
+            sgn *= Shared.Perm.shifted(p).signature()
+        else:
+            # There is no further sign for even edges
+            sgn *= 1  # TODO overall sign for even edges
+        return [(G1, sgn)]
+
     def restrict_to_isotypical_component(self, rep_index):
         return RestrictedContractEdgesGO(self, rep_index)
 
@@ -1683,10 +1686,10 @@ class ContractUnmarkTopD(GraphOperator.Differential):
         self.sum_vector_space.compute_all_pregraphs(**kwargs)
         self.sum_vector_space.build_basis(**kwargs)
 
-    def compute_rank(self, sage=None, linbox=None, rheinfall=None, sort_key='size', ignore_existing_files=False, n_jobs=1, info_tracker=False):
+    def compute_rank(self, sage=None, linbox=None, rheinfall=None, sort_key='size', ignore_existing_files=False, n_jobs=1, info_tracker=False, native=None):
         # compute ranks of contractto operators
         super().compute_rank(sage, linbox, rheinfall, sort_key,
-                             ignore_existing_files, n_jobs, info_tracker)
+                             ignore_existing_files, n_jobs, info_tracker, native)
         # compute ranks of contract operators that are also necessary to have
         print("Computing contract operator ranks...")
         coplist = [ContractEdgesGO.generate_operator(2*l-2+h, l, m, h, self.even_edges)
@@ -1696,4 +1699,4 @@ class ContractUnmarkTopD(GraphOperator.Differential):
         oc = GraphOperator.OperatorMatrixCollection(
             self.sum_vector_space, coplist)
         oc.compute_rank(sage, linbox, rheinfall, sort_key,
-                        ignore_existing_files, n_jobs, info_tracker)
+                        ignore_existing_files, n_jobs, info_tracker, native)
@@ -0,0 +1,155 @@
+"""Bulk graph6 encoder and decoder based on NumPy.
+
+Decodes lists of graph6 strings, e.g. whole basis files, into bitsets of the adjacency matrices or edge arrays in one
+pass without constructing Sage graphs, and encodes them back.
+The bitset of a graph with n vertices is the upper triangle of its adjacency matrix in graph6 order, i.e. column by
+column: (0, 1), (0, 2), (1, 2), (0, 3), ...
+Only simple graphs with at most 62 vertices are supported, as for the graph6 strings produced by Sage and nauty in
+this project.
+"""
+
+__all__ = ['order', 'decode_bitsets', 'encode_bitsets', 'decode_edges', 'encode_edges', 'decode_compact_graphs',
+           'bitset_edges']
+
+import numpy as np
+import CompactGraph
+
+
+def order(G6):
+    """Return the number of vertices of the graph encoded by a graph6 string.
+
+    :param G6: graph6 string.
+    :type G6: str
+    :return: Number of vertices.
+    :rtype: int
+    :raise ValueError: Raised if the graph has more than 62 vertices.
+    """
+    n = ord(G6[0]) - 63
+    if n > 62:
+        raise ValueError("Bulk graph6 codec only supports graphs with at most 62 vertices")
+    return n
+
+
+def bitset_edges(n):
+    """Return the edges corresponding to the positions of the bitset of a graph with n vertices.
+
+    :param n: Number of vertices.
+    :type n: int
+    :return: (u, v): Arrays of the smaller and larger vertex of the edge at each bit position.
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+    (v, u) = np.tril_indices(n, -1)
+    # np.tril_indices enumerates the lower triangle row by row, i.e. the upper triangle column by column.
+    return (u, v)
+
+
+def _to_array(g6_list, n):
+    body_length = (n * (n - 1) // 2 + 5) // 6
+    data = np.frombuffer(''.join(g6_list).encode('ascii'), dtype=np.uint8)
+    if len(data) != len(g6_list) * (1 + body_length):
+        raise ValueError("graph6 strings don't encode graphs with %d vertices" % n)
+    data = data.reshape(len(g6_list), 1 + body_length)
+    # Graphs with different numbers of vertices may have graph6 strings of the same length.
+    if np.any(data[:, 0] != n + 63):
+        raise ValueError("graph6 strings don't encode graphs with %d vertices" % n)
+    return data[:, 1:] - 63
+
+
+def decode_bitsets(g6_list):
+    """Decode graph6 strings of graphs with the same number of vertices into bitsets.
+
+    :param g6_list: List of graph6 strings of graphs with the same number of vertices.
+    :type g6_list: list(str)
+    :return: (n, bits): Number of vertices and boolean array of shape (len(g6_list), n*(n-1)/2) with the bitsets.
+    :rtype: tuple(int, numpy.ndarray)
+    :raise ValueError: Raised if the graphs don't have the same number of vertices.
+    """
+    if len(g6_list) == 0:
+        return (0, np.zeros((0, 0), dtype=bool))
+    n = order(g6_list[0])
+    body = _to_array(g6_list, n)
+    bits = np.unpackbits(body[:, :, np.newaxis], axis=2)[:, :, 2:].reshape(len(g6_list), -1)
+    return (n, bits[:, :n * (n - 1) // 2].astype(bool))
+
+
+def encode_bitsets(n, bits):
+    """Encode bitsets of graphs with n vertices into graph6 strings.
+
+    :param n: Number of vertices.
+    :type n: int
+    :param bits: Boolean array of shape (number of graphs, n*(n-1)/2) with the bitsets.
+    :type bits: numpy.ndarray
+    :return: List of graph6 strings.
+    :rtype: list(str)
+    """
+    n_graphs = len(bits)
+    n_bits = n * (n - 1) // 2
+    body_length = (n_bits + 5) // 6
+    padded = np.zeros((n_graphs, body_length * 6), dtype=np.uint8)
+    padded[:, :n_bits] = bits
+    six = padded.reshape(n_graphs, body_length, 6)
+    body = (six * np.array([32, 16, 8, 4, 2, 1], dtype=np.uint8)).sum(axis=2, dtype=np.uint8) + 63
+    data = np.empty((n_graphs, 1 + body_length), dtype=np.uint8)
+    data[:, 0] = n + 63
+    data[:, 1:] = body
+    text = data.tobytes().decode('ascii')
+    width = 1 + body_length
+    return [text[k:k + width] for k in range(0, len(text), width)]
+
+
+def decode_edges(g6_list):
+    """Decode graph6 strings into arrays of edges.
+
+    The graphs may have different numbers of vertices. They are decoded in groups of the same number of vertices.
+
+    :param g6_list: List of graph6 strings.
+    :type g6_list: list(str)
+    :return: List of (n, edges), where edges is an integer array of shape (number of edges, 2) with the edges
+        (u, v), u < v, in lexicographic order.
+    :rtype: list(tuple(int, numpy.ndarray))
+    """
+    result = [None] * len(g6_list)
+    groups = {}
+    for (i, G6) in enumerate(g6_list):
+        groups.setdefault(order(G6), []).append(i)
+    for indices in groups.values():
+        (n, bits) = decode_bitsets([g6_list[i] for i in indices])
+        (u, v) = bitset_edges(n)
+        # Reorder the bit positions lexicographically by the edges.
+        lex_order = np.lexsort((v, u))
+        (rows, cols) = np.nonzero(bits[:, lex_order])
+        edges = np.stack((u[lex_order][cols], v[lex_order][cols]), axis=1)
+        splits = np.searchsorted(rows, np.arange(1, len(indices)))
+        for (i, graph_edges) in zip(indices, np.split(edges, splits)):
+            result[i] = (n, graph_edges)
+    return result
+
+
+def encode_edges(n, edge_arrays):
+    """Encode arrays of edges of graphs with n vertices into graph6 strings.
+
+    :param n: Number of vertices.
+    :type n: int
+    :param edge_arrays: Integer arrays of shape (number of edges, 2) with the edges of the graphs.
+    :type edge_arrays: list(numpy.ndarray)
+    :return: List of graph6 strings.
+    :rtype: list(str)
+    """
+    bits = np.zeros((len(edge_arrays), n * (n - 1) // 2), dtype=bool)
+    for (i, edges) in enumerate(edge_arrays):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        u = edges.min(axis=1)
+        v = edges.max(axis=1)
+        bits[i, v * (v - 1) // 2 + u] = True
+    return encode_bitsets(n, bits)
+
+
+def decode_compact_graphs(g6_list):
+    """Decode graph6 strings into compact graphs.
+
+    :param g6_list: List of graph6 strings.
+    :type g6_list: list(str)
+    :return: List of compact graphs with unlabeled edges.
+    :rtype: list(CompactGraph.CompactGraph)
+    """
+    return [CompactGraph.CompactGraph(n, edges.tolist()) for (n, edges) in decode_edges(g6_list)]
@@ -6,7 +6,6 @@ from abc import ABCMeta, abstractmethod
 import itertools
 import GraphOperator
 import StoreLoad
-import Shared
 import Parameters
 import Log
 
@@ -116,7 +115,7 @@ class GraphComplex:
         return test_dict
 
     def compute_rank(self, sage=None, linbox=None, rheinfall=None, ignore_existing_files=False, n_jobs=1,
-                     info_tracker=False):
+                     info_tracker=False, native=None):
         """Compute the ranks of the operator matrices.
 
         :param sage: Use sage to compute the rank. Options: 'integer' (exact rank over the integers),
@@ -140,18 +139,20 @@ class GraphComplex:
         :param info_tracker: Option to plot information about the operator matrices in a web page (Default: False).
                Only active if different ranks are not computed in parallel.
         :type info_tracker: bool
+        :param native: Use the native rank computation. Options: 'mod' (rank over a finite field) (Default: None).
+        :type native: str or list(str)
 
         .. seealso:: - http://www.linalg.org/
                     - https://github.com/linbox-team/linbox/blob/master/examples/rank.C
                     - https://github.com/riccardomurri/rheinfall/blob/master/src.c%2B%2B/examples/rank.cpp
         """
-        if sage is None and linbox is None and rheinfall is None:
+        if sage is None and linbox is None and rheinfall is None and native is None:
             raise ValueError("compute_rank: At least one rank computation method needs to be specified.")
 
         for op_collection in self.operator_collection_list:
             op_collection.compute_rank(sage=sage, linbox=linbox, rheinfall=rheinfall,
                                        ignore_existing_files=ignore_existing_files, n_jobs=n_jobs,
-                                       info_tracker=info_tracker)
+                                       info_tracker=info_tracker, native=native)
 
     def plot_cohomology_dim(self, to_html=False, to_csv=False, x_plots=2):
         """Plot the cohomology dimensions for each differential of the graph complex
@@ -271,11 +272,10 @@ class GraphComplex:
             try:
                 if op1a.is_trivial() or op2b.is_trivial():
                     return 'triv'
-                M1a = op1a.get_matrix()
-                M2b = op2b.get_matrix()
+                vanishes = GraphOperator.products_vanish([(1, [op1a, op2b])], eps=eps)
             except StoreLoad.FileNotFoundError:
                 return 'inc'
-            if Shared.matrix_norm(M2b * M1a) < eps:
+            if vanishes:
                 return 'succ'
             return 'fail'
 
@@ -283,11 +283,10 @@ class GraphComplex:
             try:
                 if op2a.is_trivial() or op1b.is_trivial():
                     return 'triv'
-                M1b = op1b.get_matrix()
-                M2a = op2a.get_matrix()
+                vanishes = GraphOperator.products_vanish([(1, [op2a, op1b])], eps=eps)
             except StoreLoad.FileNotFoundError:
                 return 'inc'
-            if Shared.matrix_norm(M1b * M2a) < eps:
+            if vanishes:
                 return 'succ'
             return 'fail'
 
@@ -295,24 +294,16 @@ class GraphComplex:
             if (op1a.is_trivial() or op2b.is_trivial()) and (op2a.is_trivial() or op1b.is_trivial()):
                 return 'triv'
             if (not (op1a.is_trivial() or op2b.is_trivial())) and (op2a.is_trivial() or op1b.is_trivial()):
-                M1a = op1a.get_matrix()
-                M2b = op2b.get_matrix()
-                if Shared.matrix_norm(M2b * M1a) < eps:
+                if GraphOperator.products_vanish([(1, [op1a, op2b])], eps=eps):
                     return 'succ'
                 else:
                     return 'fail'
             if (op1a.is_trivial() or op2b.is_trivial()) and (not (op2a.is_trivial() or op1b.is_trivial())):
-                M1b = op1b.get_matrix()
-                M2a = op2a.get_matrix()
-                if Shared.matrix_norm(M1b * M2a) < eps:
+                if GraphOperator.products_vanish([(1, [op2a, op1b])], eps=eps):
                     return 'succ'
                 else:
                     return 'fail'
-            M1a = op1a.get_matrix()
-            M2b = op2b.get_matrix()
-            M1b = op1b.get_matrix()
-            M2a = op2a.get_matrix()
-            if Shared.matrix_norm(M2b * M1a + (-1 if commute else 1) * M1b * M2a) < eps:
+            if GraphOperator.products_vanish([(1, [op1a, op2b]), (-1 if commute else 1, [op2a, op1b])], eps=eps):
                 return 'succ'
             return 'fail'
         except StoreLoad.FileNotFoundError:
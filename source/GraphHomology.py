@@ -8,7 +8,30 @@ Plot the cohomology dimensions of a graph complex.
 This module parses command line arguments and contains the main function.
 Building the basis and operator matrix as well as computing the matrix rank can be done in parallel for
 different parameters. Use the option (-n_jobs) to specify the number of parallel jobs.
-However, building a single basis or matrix file or computing a rank for a specific matrix can not be done in parallel.
+The generating graphs of a single vector space can be sharded over the parallel processes with the option (-shard_b).
+A single operator matrix can be built in row blocks by the parallel processes with the option (-shard_op).
+Computing a rank for a specific matrix can only be done in parallel with sage or the native rank computation, if the
+matrix splits into connected components (-rank_blocks), which are distributed over the processes with (-shard_rank).
+Matrices can be preconditioned before computing their ranks (-precondition).
+With (-rank_server) the ranks are computed by n_jobs long-lived worker processes, which receive the matrices in a binary
+format, instead of starting a new process per matrix.
+With (-pipeline) the selected stages (-build_b, -build_op, -rank, -cohomology) are executed as one task graph: each
+matrix is built as soon as the bases of its domain and target exist, each rank as soon as its matrix exists and each
+cohomology dimension as soon as the two ranks exist, such that the parallel processes are busy across the stages.
+Parallel tasks which fail are reported at the end of a run with a status report per task. They can be retried
+(-retries), stopped after a time limit (-task_timeout), and worker processes can be replaced after a number of tasks
+(-maxtasksperchild) to release memory.
+With (-memory_budget) parallel matrix builds and rank computations are only started while their predicted peak memory,
+based on the matrix dimensions, entries and rank computation backend, fits into the given budget in GB.
+The square zero (-square_zero) and (anti-)commutativity tests (-anti_commute, -commute) multiply random vectors modulo
+random primes through the matrices, in time linear in the number of matrix entries, with the failure probability
+(-failure_prob). With (-exact_test) the exact matrix products are computed instead.
+With (-file_cache) bases, matrices, matrix shapes and ranks loaded from files are cached in memory up to the given size
+in MB, such that they are not loaded again, e.g. by the cohomology computation and the tests (disabled by default).
+Use the option (-basis_buffer) to bound the number of graphs held in memory while building a basis.
+With the options (-checkpoint_b) and (-checkpoint_op) interrupted basis and matrix builds are resumed from checkpoints.
+Operator matrices can be stored in a binary format (-matrix_format binary), optionally compressed (-matrix_compression).
+With (-orbit_reduction) edge contraction operators act on one edge per automorphism orbit of a basis element.
 
 There are options to ignore existing files (-ignore_ex), to display information (-info), plot information to a html file
 (-plot_info), to show a progress bar (-pbar), for logging (-log warning), and for profiling (-profile).
@@ -21,6 +44,11 @@ Use sage to determine the exact rank over the integers (-sage integer) or over a
 Use linbox to determine the exact rank over the rationals (-linbox rational) or over a finite field (-linbox mod).
 Use rheinfall to determine the exact rank over Z (-rheinfall mpz), over the rationals (-rheinfall mpq) or modulo 64
 bit integers (-rheinfall int64).
+Use the built-in sparse elimination to determine the rank over a finite field (-native mod), without external
+executables. With (-native multiprime) the rank is computed modulo several random primes (-primes) and the maximum is
+stored together with the primes and a bound for the error probability. With (-native certified) the maximal rank is
+in addition certified to be the exact rank over the rationals, up to a negligible failure probability and for ranks up
+to Parameters.certify_max_rank.
 
 There
 
@@ -155,8 +183,11 @@ import HairyGraphBiComplex
 import BiColoredHairyGraphComplex
 import BiColoredHairyGraphBiComplex
 import Parameters
+import Shared
 import LinboxInterface
 import RheinfallInterface
+import ModularRank
+import Pipeline
 import CHairyGraphComplex
 import ForestedGraphComplex
 import WRHairyGraphComplex
@@ -299,13 +330,55 @@ parser.add_argument('-linbox', type=linbox_options,
                     help='compute matrix ranks using the linbox library, options: ' + str(LinboxInterface.linbox_options))
 parser.add_argument('-rheinfall', type=str, choices=RheinfallInterface.rheinfall_options,
                     help="compute matrix ranks using the rheinfall library, options: " + str(RheinfallInterface.rheinfall_options))
+parser.add_argument('-native', type=str, choices=ModularRank.native_options,
+                    help="compute matrix ranks using the built-in sparse elimination, options: " + str(ModularRank.native_options))
 parser.add_argument('-build', action='store_true',
                     help='build vector space basis and operator matrix')
 parser.add_argument('-build_b', action='store_true',
                     help='build vector space basis')
+parser.add_argument('-basis_buffer', type=positive_int,
+                    help='maximal number of graphs held in memory while building a basis, spill sorted runs to disk')
+parser.add_argument('-shard_b', action='store_true',
+                    help='shard the generating graphs of each vector space over the parallel processes')
+parser.add_argument('-checkpoint_b', type=positive_int,
+                    help='number of generating graphs after which a basis build checkpoint is written')
 parser.add_argument('-build_op', action='store_true',
                     help='build operator matrix')
+parser.add_argument('-shard_op', action='store_true',
+                    help='build each operator matrix in row blocks using the parallel processes')
+parser.add_argument('-checkpoint_op', type=positive_int,
+                    help='number of matrix rows after which a matrix build checkpoint is written')
+parser.add_argument('-orbit_reduction', action='store_true',
+                    help='build matrices of edge contraction operators by operating on one edge per automorphism orbit')
+parser.add_argument('-canon_cache', type=positive_int,
+                    help='maximal number of cached canonical forms of operator images per target vector space')
+parser.add_argument('-matrix_format', choices=['sms', 'binary'],
+                    help='format to store operator matrices, binary matrices are exported to sms for linbox/rheinfall')
+parser.add_argument('-matrix_compression', choices=['gzip', 'zstd'],
+                    help='compression of binary matrix files')
 parser.add_argument('-rank', action='store_true', help='compute matrix ranks')
+parser.add_argument('-precondition', action='store_true',
+                    help='precondition matrices before computing ranks with sage or the native rank computation')
+parser.add_argument('-rank_blocks', action='store_true',
+                    help='compute ranks with sage or the native rank computation per connected component of the matrix')
+parser.add_argument('-shard_rank', action='store_true',
+                    help='compute the ranks one after the other, each with its blocks distributed over the parallel processes')
+parser.add_argument('-primes', type=positive_int,
+                    help='number of random primes for the native multiprime and certified rank computation')
+parser.add_argument('-pipeline', action='store_true',
+                    help='execute the selected stages basis, matrix, rank and cohomology as one dependency aware task graph')
+parser.add_argument('-rank_server', action='store_true',
+                    help='compute the ranks with long-lived worker processes receiving the matrices over pipes')
+parser.add_argument('-retries', type=positive_int,
+                    help='number of retries of parallel tasks which failed, timed out or whose process was killed')
+parser.add_argument('-task_timeout', type=positive_int,
+                    help='time limit in seconds for a single parallel task')
+parser.add_argument('-memory_budget', type=float,
+                    help='memory budget in GB for parallel matrix builds and rank computations')
+parser.add_argument('-file_cache', type=float,
+                    help='memory in MB for caching loaded bases, matrices and ranks (default: 0, disabled)')
+parser.add_argument('-maxtasksperchild', type=positive_int,
+                    help='number of parallel tasks after which a worker process is replaced to release its memory')
 parser.add_argument('-cohomology', action='store_true',
                     help='compute cohomology dimensions')
 parser.add_argument('-csv', action='store_true',
@@ -318,6 +391,10 @@ parser.add_argument('-anti_commute', action='store_true',
                     help='test anti-commutativity of differentials')
 parser.add_argument('-commute', action='store_true',
                     help='test commutativity of differentials')
+parser.add_argument('-exact_test', action='store_true',
+                    help='compute the exact matrix products in the square zero and (anti-)commutativity tests')
+parser.add_argument('-failure_prob', type=float,
+                    help='failure probability of the probabilistic square zero and (anti-)commutativity tests')
 parser.add_argument('-plot_info', action='store_true',
                     help='plot information about vector spaces and operator matrices')
 
@@ -360,7 +437,8 @@ def test_commutativity(graph_complex):
 def rank(graph_complex):
     logger.warning("\n----- Compute Ranks -----\n")
     graph_complex.compute_rank(sage=args.sage, linbox=args.linbox, rheinfall=args.rheinfall,
-                               ignore_existing_files=args.ignore_ex, n_jobs=args.n_jobs, info_tracker=args.info)
+                               ignore_existing_files=args.ignore_ex, n_jobs=args.n_jobs, info_tracker=args.info,
+                               native=args.native)
 
 
 @Profiling.cond_decorator(args.profile, Profiling.profile(Parameters.log_dir))
@@ -369,6 +447,17 @@ def cohomology(graph_complex):
     graph_complex.plot_cohomology_dim(to_csv=args.csv, to_html=args.html)
 
 
+@Profiling.cond_decorator(args.profile, Profiling.profile(Parameters.log_dir))
+def pipeline(graph_complex, stage_list):
+    logger.warning("\n----- Pipeline: %s -----\n" % ', '.join(stage_list))
+    graph_pipeline = Pipeline.Pipeline([graph_complex], stage_list)
+    status = graph_pipeline.run(n_jobs=args.n_jobs, ignore_existing_files=args.ignore_ex, progress_bar=args.pbar,
+                                sage=args.sage, linbox=args.linbox, rheinfall=args.rheinfall, native=args.native)
+    logger.warning(Pipeline.Pipeline.report(status))
+    if 'cohomology' in stage_list:
+        graph_complex.plot_cohomology_dim(to_csv=args.csv, to_html=args.html)
+
+
 @Profiling.cond_decorator(args.profile, Profiling.profile(Parameters.log_dir))
 def plot_info(graph_complex):
     logger.warning("\n----- Plot Info -----\n")
@@ -395,6 +484,43 @@ if __name__ == "__main__":
     logger.warning("\n###########################\n" +
                    "----- Graph Homology -----")
 
+    if args.basis_buffer is not None:
+        Parameters.basis_buffer_size = args.basis_buffer
+    Parameters.shard_basis_build = args.shard_b
+    Parameters.shard_matrix_build = args.shard_op
+    if args.checkpoint_b is not None:
+        Parameters.basis_checkpoint_graphs = args.checkpoint_b
+    if args.checkpoint_op is not None:
+        Parameters.matrix_checkpoint_rows = args.checkpoint_op
+    if args.canon_cache is not None:
+        Parameters.canon_cache_size = args.canon_cache
+    if args.orbit_reduction:
+        Parameters.operator_orbit_reduction = True
+    if args.matrix_format is not None:
+        Parameters.matrix_storage_format = args.matrix_format
+    if args.matrix_compression is not None:
+        Parameters.matrix_compression = args.matrix_compression
+    Parameters.precondition_rank = args.precondition
+    Parameters.rank_block_decomposition = args.rank_blocks
+    Parameters.shard_rank_computation = args.shard_rank
+    if args.primes is not None:
+        Parameters.multiprime_count = args.primes
+    Parameters.rank_server = args.rank_server
+    if args.retries is not None:
+        Parameters.task_retries = args.retries
+    if args.task_timeout is not None:
+        Parameters.task_timeout = args.task_timeout
+    if args.maxtasksperchild is not None:
+        Parameters.max_tasks_per_child = args.maxtasksperchild
+    if args.memory_budget is not None:
+        Parameters.memory_budget = int(args.memory_budget * 2**30)
+    if args.file_cache is not None:
+        Parameters.file_cache_bytes = int(args.file_cache * 2**20)
+        Shared.file_cache.resize(Parameters.file_cache_bytes)
+    Parameters.exact_verification = args.exact_test
+    if args.failure_prob is not None:
+        Parameters.verification_failure_probability = args.failure_prob
+
     operators = []
     if args.op1 is not None:
         operators.append(args.op1)
@@ -632,14 +758,19 @@ if __name__ == "__main__":
 
     if args.plot_info:
         plot_info(graph_complex)
-    if args.build_b:
-        build_basis(graph_complex)
-    if args.build_op:
-        build_operator(graph_complex)
-    if args.rank:
-        rank(graph_complex)
-    if args.cohomology:
-        cohomology(graph_complex)
+    if args.pipeline:
+        stage_list = [stage for (stage, selected) in zip(Pipeline.stages, (args.build_b, args.build_op, args.rank,
+                                                                          args.cohomology)) if selected]
+        pipeline(graph_complex, stage_list)
+    else:
+        if args.build_b:
+            build_basis(graph_complex)
+        if args.build_op:
+            build_operator(graph_complex)
+        if args.rank:
+            rank(graph_complex)
+        if args.cohomology:
+            cohomology(graph_complex)
     if args.square_zero:
         square_zero_test(graph_complex)
     if args.anti_commute:
@@ -8,6 +8,8 @@ from abc import ABCMeta, abstractmethod
 import itertools
 from tqdm import tqdm
 import collections
+import time
+import numpy as np
 import scipy.sparse as sparse
 from sage.all import *
 import Log
@@ -19,12 +21,135 @@ import PlotCohomology
 import DisplayInfo
 import RheinfallInterface
 import LinboxInterface
+import MatrixMethods
+import ModularRank
+import RankServer
 import GraphVectorSpace
+import CanonicalLabelling
+import CompactGraph
+import Graph6
 
 logger = Log.logger.getChild('graph_operator')
 
 # defines all rank methods that are considered exact
-exact_rank_methods = ["sage_integer", "exact", "linbox_rational"]
+exact_rank_methods = ["sage_integer", "exact", "linbox_rational", "native_certified"]
+
+
+def products_vanish(products, eps=Parameters.square_zero_test_eps):
+    """Test whether a linear combination of products of operator matrices vanishes.
+
+    Unless Parameters.exact_verification is True, the test is probabilistic in time linear in the number of matrix
+    entries (see MatrixMethods.random_product_test) with the failure probability
+    Parameters.verification_failure_probability and at least Parameters.verification_trials trials. Otherwise the
+    products are computed with sage and their Frobenius norm is compared to eps.
+
+    :param products: List of (coefficient, operator matrices in the order of application), e.g. (1, [op1, op2]) for
+        the matrix product M2 * M1.
+    :type products: list(tuple(int, list(OperatorMatrix)))
+    :param eps: Threshold for the Frobenius norm of the exact product (Default: Parameters.square_zero_test_eps).
+    :type eps: float
+    :return: True if the linear combination vanishes.
+    :rtype: bool
+    :raise StoreLoad.FileNotFoundError: Raised if a matrix file cannot be found.
+    """
+    if Parameters.exact_verification:
+        total = None
+        for (coefficient, op_list) in products:
+            product = op_list[0].get_matrix()
+            for op in op_list[1:]:
+                product = op.get_matrix() * product
+            total = coefficient * product if total is None else total + coefficient * product
+        return Shared.matrix_norm(total) < eps
+    matrix_products = [(coefficient, [op._load_matrix_arrays() for op in op_list])
+                       for (coefficient, op_list) in products]
+    (vanishes, n_trials) = MatrixMethods.random_product_test(
+        matrix_products, failure_probability=Parameters.verification_failure_probability,
+        min_trials=Parameters.verification_trials)
+    return vanishes
+
+
+def _read_only_arrays(matrix_arrays):
+    # Marks the arrays of (rows, cols, values, shape) as read-only, since they are shared by the cache.
+    for array in matrix_arrays[:3]:
+        array.setflags(write=False)
+    return matrix_arrays
+
+
+class _RowBlock:
+    # Task of a row block matrix build: index range (start, stop) of the domain basis and the graph6 strings of the
+    # basis elements in this range.
+
+    def __init__(self, block, basis6):
+        self.block = block
+        self.basis6 = basis6
+
+    def __str__(self):
+        return 'rows %d to %d' % self.block
+
+
+def _multiprime_rank(prime, matrix_arrays):
+    # Returns the rank modulo prime with the pivot rows and columns.
+    (rows, cols, values, shape) = matrix_arrays
+    return ModularRank.rank(rows, cols, values, shape, prime, return_pivots=True)
+
+
+# Range of the random coefficients of the projections of the rows in _certify_rank.
+certify_projection_range = 2**20
+
+
+def _certify_rank(matrix_arrays, pivot_rows, pivot_cols, failure_probability=1e-12, seed=None):
+    """Certify that the rank of a matrix over the rationals equals the number of pivots.
+
+    The submatrix A of the pivot rows and columns is supposed to be nonsingular modulo a prime, hence it is
+    nonsingular over the rationals and the rank is at least the number of pivots. The rank is at most the number of
+    pivots if all other rows are in the span of the pivot rows, i.e. if Y * (pivot rows) = (other rows) for the
+    solution Y of Y * A = (other rows restricted to the pivot columns).
+    Instead of the dense rational matrix Y this is tested for random linear combinations w * (other rows) with
+    coefficients in [0, certify_projection_range): each trial solves the sparse system y * A = w * (other rows
+    restricted to the pivot columns) and compares y * (pivot rows) with w * (other rows). If the other rows are not in
+    the span of the pivot rows, a trial passes with probability at most 1/certify_projection_range.
+    The solution y has rational entries with denominators up to det(A), hence its size grows quadratically with the
+    number of pivots and the certification is refused for more than Parameters.certify_max_rank pivots.
+
+    :param matrix_arrays: (rows, cols, values, shape) of the matrix.
+    :type matrix_arrays: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, tuple(int, int))
+    :param pivot_rows: Pivot rows.
+    :type pivot_rows: list(int)
+    :param pivot_cols: Pivot columns.
+    :type pivot_cols: list(int)
+    :param failure_probability: Upper bound for the probability to certify a wrong rank (Default: 1e-12).
+    :type failure_probability: float
+    :param seed: Seed of the random linear combinations (Default: None).
+    :type seed: int
+    :return: True if the rank over the rationals equals the number of pivots, False if not and None if the number of
+        pivots exceeds Parameters.certify_max_rank.
+    :rtype: bool or None
+    """
+    if len(pivot_rows) > Parameters.certify_max_rank:
+        return None
+    (rows, cols, values, (d, t)) = matrix_arrays
+    pivot_row_set = set(pivot_rows)
+    other_rows = [i for i in range(d) if i not in pivot_row_set]
+    if len(other_rows) == 0:
+        return True
+    entries = collections.Counter()
+    for (i, j, v) in zip(rows.tolist(), cols.tolist(), values.tolist()):
+        entries[(i, j)] += v
+    M = matrix(QQ, d, t, dict(entries), sparse=True)
+    (P, O) = (M.matrix_from_rows(pivot_rows), M.matrix_from_rows(other_rows))
+    A = P.matrix_from_columns(pivot_cols)
+    n_trials = max(Parameters.verification_trials,
+                   int(np.ceil(np.log(failure_probability) / -np.log(certify_projection_range))))
+    rng = np.random.default_rng(seed)
+    for _ in range(n_trials):
+        w = vector(QQ, rng.integers(0, certify_projection_range, len(other_rows)).tolist())
+        b = w * O
+        y = A.solve_left(vector(QQ, [b[j] for j in pivot_cols]))
+        if y * P != b:
+            return False
+    return True
+
+
 class OperatorMatrixProperties:
     """Properties of an operator matrix.
 
@@ -146,6 +271,25 @@ class OperatorMatrix:
         """
         pass
 
+    def get_matrix_binary_file_path(self):
+        """Return the path for the operator matrix file in the binary matrix format.
+
+        :return: Path to the binary operator matrix file.
+        :rtype: path
+        """
+        return os.path.splitext(self.get_matrix_file_path())[0] + '.bin'
+
+    def get_matrix_info_file_path(self):
+        """Return the path for the matrix metadata file.
+
+        The metadata file contains the shape, the number of non-zero entries, a checksum, the build time and the
+        histogram of values of the stored matrix file, such that these can be queried without parsing the matrix.
+
+        :return: Path to the matrix metadata file.
+        :rtype: path
+        """
+        return os.path.splitext(self.get_matrix_file_path())[0] + '.info.json'
+
     def get_ref_matrix_file_path(self):
         """Return the path for the reference operator matrix file.
 
@@ -227,10 +371,18 @@ class OperatorMatrix:
     def exists_matrix_file(self):
         """Return whether there exists a matrix file.
 
-        :return: True if a matrix file is found.
+        :return: True if a matrix file is found, either in the SMS or in the binary matrix format.
         :rtype: bool
         """
-        return os.path.isfile(self.get_matrix_file_path())
+        return os.path.isfile(self.get_matrix_file_path()) or self.exists_matrix_binary_file()
+
+    def exists_matrix_binary_file(self):
+        """Return whether there exists a matrix file in the binary matrix format.
+
+        :return: True if a binary matrix file is found.
+        :rtype: bool
+        """
+        return os.path.isfile(self.get_matrix_binary_file_path())
 
     def exists_rank_file(self):
         """Return whether there exists a rank file.
@@ -241,20 +393,28 @@ class OperatorMatrix:
         return os.path.isfile(self.get_rank_file_path())
 
     def delete_matrix_file(self):
-        """Delete the matrix file."""
+        """Delete the matrix file in the SMS and in the binary matrix format."""
         if os.path.isfile(self.get_matrix_file_path()):
             os.remove(self.get_matrix_file_path())
+        if self.exists_matrix_binary_file():
+            os.remove(self.get_matrix_binary_file_path())
+        if os.path.isfile(self.get_matrix_info_file_path()):
+            os.remove(self.get_matrix_info_file_path())
+        Shared.file_cache.invalidate(self.get_matrix_file_path(), self.get_matrix_binary_file_path())
 
     def delete_rank_file(self):
         """Delete the rank file."""
         if os.path.isfile(self.get_rank_file_path()):
             os.remove(self.get_rank_file_path())
+        Shared.file_cache.invalidate(self.get_rank_file_path())
 
-    def _store_matrix_list(self, matrix_list, shape, data_type=data_type):
+    def _store_matrix_list(self, matrix_list, shape, data_type=data_type, path=None):
         """Store the operator matrix in SMS format to the matrix file.
 
         The header line contains the shape of the matrix (nrows = domain dimension, ncols = target dimension) and
         the data type of the SMS format. In the file the matrix entries are listed as (domain index, target index, value).
+        If Parameters.matrix_storage_format is 'binary' and no path is given, the matrix is stored in the binary
+        matrix format instead.
 
         :param matrix_list: List of matrix entries in the form (domain index, target index, value).
             The list entries must be ordered lexicographically.
@@ -263,16 +423,200 @@ class OperatorMatrix:
         :type shape: tuple(int, int)
         :param data_type: data_type for the SMS format.
         :type data_type: str
+        :param path: Path to store the matrix to (Default: matrix file path).
+        :type path: path
 
         ..seealso:: http://ljk.imag.fr/membres/Jean-Guillaume.Dumas/simc.html
         """
         (d, t) = shape
+        if path is None and Parameters.matrix_storage_format == 'binary':
+            entries = np.array(matrix_list, dtype=np.int64).reshape(-1, 3)
+            self._store_matrix_arrays(entries[:, 0], entries[:, 1], entries[:, 2], shape)
+            return
         stringList = []
         stringList.append("%d %d %s" % (d, t, data_type))
         for (i, j, v) in matrix_list:
             stringList.append("%d %d %d" % (i + 1, j + 1, v))
         stringList.append("0 0 0")
-        StoreLoad.store_string_list(stringList, self.get_matrix_file_path())
+        if path is None:
+            self._delete_matrix_binary_file()
+            StoreLoad.store_string_list(stringList, self.get_matrix_file_path())
+            Shared.file_cache.invalidate(self.get_matrix_file_path())
+            self._store_matrix_info(shape, collections.Counter(v for (i, j, v) in matrix_list))
+        else:
+            StoreLoad.store_string_list(stringList, path)
+            Shared.file_cache.invalidate(path)
+
+    def _store_matrix_arrays(self, rows, cols, values, shape):
+        """Store the operator matrix in the binary matrix format to the binary matrix file.
+
+        An SMS matrix file is removed, since it would be outdated. The compression is set by
+        Parameters.matrix_compression.
+
+        :param rows: Domain indices of the matrix entries.
+        :type rows: numpy.ndarray
+        :param cols: Target indices of the matrix entries.
+        :type cols: numpy.ndarray
+        :param values: Values of the matrix entries.
+        :type values: numpy.ndarray
+        :param shape: Tuple containing the matrix shape = (nrows = domain dimension, ncols = target dimension).
+        :type shape: tuple(int, int)
+        """
+        MatrixMethods.save_binary_matrix(rows, cols, values, shape, self.get_matrix_binary_file_path(),
+                                         compression=Parameters.matrix_compression)
+        if os.path.isfile(self.get_matrix_file_path()):
+            os.remove(self.get_matrix_file_path())
+        Shared.file_cache.invalidate(self.get_matrix_binary_file_path(), self.get_matrix_file_path())
+        (hist_values, hist_counts) = np.unique(np.asarray(values), return_counts=True)
+        self._store_matrix_info(shape, dict(zip(hist_values.tolist(), hist_counts.tolist())))
+
+    def _delete_matrix_binary_file(self):
+        if self.exists_matrix_binary_file():
+            os.remove(self.get_matrix_binary_file_path())
+        Shared.file_cache.invalidate(self.get_matrix_binary_file_path())
+
+    def _store_matrix_blocks(self, block_paths, shape, data_type=data_type):
+        """Stitch partial SMS files of consecutive row blocks together to the matrix file.
+
+        The partial files must contain sorted entries of consecutive, increasing row ranges, such that their
+        concatenation is sorted lexicographically.
+
+        :param block_paths: Paths to the partial SMS files in the order of their row ranges.
+        :type block_paths: list(path)
+        :param shape: Tuple containing the matrix shape = (nrows = domain dimension, ncols = target dimension).
+        :type shape: tuple(int, int)
+        :param data_type: data_type for the SMS format.
+        :type data_type: str
+        """
+        (d, t) = shape
+        if Parameters.matrix_storage_format == 'binary':
+            blocks = [MatrixMethods.load_sms_arrays(block_path) for block_path in block_paths]
+            (rows, cols, values) = (np.concatenate([block[k] for block in blocks] + [np.zeros(0, dtype=np.int64)])
+                                    for k in range(3))
+            self._store_matrix_arrays(rows, cols, values, shape)
+            return
+        self._delete_matrix_binary_file()
+        histogram = collections.Counter()
+        with StoreLoad.atomic_open(self.get_matrix_file_path(), 'w') as f:
+            f.write("%d %d %s\n" % (d, t, data_type))
+            for block_path in block_paths:
+                with open(block_path, 'r') as block:
+                    block.readline()
+                    for line in block:
+                        if line != "0 0 0\n":
+                            f.write(line)
+                            histogram[int(line.rsplit(" ", 1)[1])] += 1
+            f.write("0 0 0\n")
+        Shared.file_cache.invalidate(self.get_matrix_file_path())
+        self._store_matrix_info(shape, histogram)
+
+    def _get_stored_matrix_file_path(self):
+        """Return the path of the matrix file which is loaded, i.e. the binary matrix file if it exists and the SMS
+        matrix file otherwise.
+
+        :return: Path to the matrix file.
+        :rtype: path
+        """
+        if self.exists_matrix_binary_file():
+            return self.get_matrix_binary_file_path()
+        return self.get_matrix_file_path()
+
+    def _store_matrix_info(self, shape, histogram):
+        """Store the metadata of the stored matrix file to the matrix metadata file.
+
+        The size and modification time of the matrix file are recorded to detect outdated metadata.
+
+        :param shape: Tuple containing the matrix shape = (nrows = domain dimension, ncols = target dimension).
+        :type shape: tuple(int, int)
+        :param histogram: Number of matrix entries for each value.
+        :type histogram: dict(int -> int)
+        """
+        path = self._get_stored_matrix_file_path()
+        stat = os.stat(path)
+        info = {'shape': list(shape),
+                'entries': int(sum(histogram.values())),
+                'value_histogram': {str(v): int(n) for (v, n) in sorted(histogram.items())},
+                'checksum': 'crc32:' + StoreLoad.file_crc32(path),
+                'build_time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stat.st_mtime)),
+                'matrix_file': os.path.basename(path),
+                'file_size': stat.st_size,
+                'file_mtime_ns': stat.st_mtime_ns}
+        StoreLoad.json_store(info, self.get_matrix_info_file_path())
+
+    def _load_matrix_info(self):
+        """Load the matrix metadata, i.e. a dictionary with the keys 'shape', 'entries', 'value_histogram',
+        'checksum' and 'build_time'.
+
+        If the metadata file is missing or outdated, i.e. the matrix file has been changed since, the matrix file is
+        parsed once and the metadata file is rewritten.
+
+        :return: Matrix metadata.
+        :rtype: dict
+        :raise StoreLoad.FileNotFoundError: Raised if the matrix file cannot be found.
+        :raise ValueError: Raised if the matrix file cannot be parsed.
+        """
+        if not self.exists_matrix_file():
+            raise StoreLoad.FileNotFoundError(
+                "Cannot load matrix metadata, No matrix file found for %s: " % str(self))
+        path = self._get_stored_matrix_file_path()
+        try:
+            info = StoreLoad.json_load(self.get_matrix_info_file_path())
+            stat = os.stat(path)
+            if info.get('matrix_file') == os.path.basename(path) and info.get('file_size') == stat.st_size \
+                    and info.get('file_mtime_ns') == stat.st_mtime_ns:
+                return info
+        except (StoreLoad.FileNotFoundError, ValueError):
+            pass
+        (rows, cols, values, shape) = self._load_matrix_arrays()
+        (hist_values, hist_counts) = np.unique(np.asarray(values), return_counts=True)
+        self._store_matrix_info(shape, dict(zip(hist_values.tolist(), hist_counts.tolist())))
+        return StoreLoad.json_load(self.get_matrix_info_file_path())
+
+    def _load_matrix_arrays(self):
+        """Load the operator matrix from the binary or the SMS matrix file as numpy arrays.
+
+        The binary matrix file is preferred if it exists. Uncompressed binary files are memory mapped.
+        The arrays are cached in Shared.file_cache and hence read-only.
+
+        :return: (rows = domain indices, cols = target indices, values, shape = (domain dimension, target dimension))
+        :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, tuple(int, int))
+        :raise StoreLoad.FileNotFoundError: Raised if the matrix file cannot be found.
+        :raise ValueError: Raised in the following cases:
+                The shape of the matrix doesn't correspond to the dimensions of the domain or target vector space.
+                End line is missing.
+                Non-positive matrix indices.
+                Matrix indices outside matrix shape.
+        """
+        if not self.exists_matrix_file():
+            raise StoreLoad.FileNotFoundError(
+                "Cannot load matrix, No matrix file found for %s: " % str(self))
+        if self.exists_matrix_binary_file():
+            path = self.get_matrix_binary_file_path()
+            load = MatrixMethods.load_binary_matrix
+        else:
+            path = self.get_matrix_file_path()
+            load = MatrixMethods.load_sms_arrays
+        (rows, cols, values, shape) = Shared.file_cache.load(path, 'arrays', lambda: _read_only_arrays(load(path)))
+        (d, t) = shape
+        if (not self.is_pseudo_matrix) and (d != self.domain.get_dimension() or t != self.target.get_dimension()):
+            raise ValueError("%s: Shape of matrix doesn't correspond to the vector space dimensions"
+                             % str(path))
+        return (rows, cols, values, shape)
+
+    def get_matrix_sms_file_path(self):
+        """Return the path to the operator matrix file in the SMS format.
+
+        If the matrix is only stored in the binary matrix format, it is exported to the SMS format first, e.g. as
+        input for linbox or rheinfall.
+
+        :return: Path to the SMS matrix file.
+        :rtype: path
+        :raise StoreLoad.FileNotFoundError: Raised if the matrix file cannot be found.
+        """
+        path = self.get_matrix_file_path()
+        if not os.path.isfile(path) and self.exists_matrix_binary_file():
+            MatrixMethods.binary_to_sms_file(self.get_matrix_binary_file_path(), path, data_type=self.data_type)
+        return path
 
     def _load_matrix_list(self):
         """Load the operator matrix in the SMS format from the matrix file.
@@ -288,6 +632,9 @@ class OperatorMatrix:
                 Non-positive matrix indices.
                 Matrix indices outside matrix shape.
         """
+        if self.exists_matrix_binary_file():
+            (rows, cols, values, shape) = self._load_matrix_arrays()
+            return (list(zip(rows.tolist(), cols.tolist(), values.tolist())), shape)
         if not self.exists_matrix_file():
             raise StoreLoad.FileNotFoundError(
                 "Cannot load matrix, No matrix file found for %s: " % str(self))
@@ -361,10 +708,19 @@ class OperatorMatrix:
         :raise StoreLoad.FileNotFoundError: Raised if there is neither a matrix file nor the basis files of the domain and
             target vector spaces.
         """
+        def load_shape():
+            if os.path.isfile(self.get_matrix_info_file_path()):
+                (d, t) = self._load_matrix_info()['shape']
+            elif self.exists_matrix_binary_file():
+                ((d, t), nnz, index_dtype, value_dtype, compression) = \
+                    MatrixMethods.load_binary_matrix_header(self.get_matrix_binary_file_path())
+            else:
+                header = StoreLoad.load_line(self.get_matrix_file_path())
+                (d, t, data_type) = header.split(" ")
+            return (int(d), int(t))
+
         try:
-            header = StoreLoad.load_line(self.get_matrix_file_path())
-            (d, t, data_type) = header.split(" ")
-            (d, t) = (int(d), int(t))
+            (d, t) = Shared.file_cache.load(self._get_stored_matrix_file_path(), 'shape', load_shape)
         except StoreLoad.FileNotFoundError:
             try:
                 d = self.domain.get_dimension()
@@ -388,10 +744,22 @@ class OperatorMatrix:
                 Non-positive matrix indices.
                 Matrix indices outside matrix shape.
         """
+        def load_shape_entries():
+            if self.exists_matrix_binary_file():
+                ((d, t), nnz, index_dtype, value_dtype, compression) = \
+                    MatrixMethods.load_binary_matrix_header(self.get_matrix_binary_file_path())
+            else:
+                info = self._load_matrix_info()
+                ((d, t), nnz) = (info['shape'], info['entries'])
+            return ((int(d), int(t)), int(nnz))
+
         try:
-            (matrixList, shape) = self._load_matrix_list()
-            (d, t) = shape
-            return ((t, d), len(matrixList))
+            ((d, t), nnz) = Shared.file_cache.load(self._get_stored_matrix_file_path(), 'shape_entries',
+                                                   load_shape_entries)
+            if (not self.is_pseudo_matrix) and (d != self.domain.get_dimension() or t != self.target.get_dimension()):
+                raise ValueError("%s: Shape of matrix doesn't correspond to the vector space dimensions"
+                                 % str(self._get_stored_matrix_file_path()))
+            return ((t, d), nnz)
         except StoreLoad.FileNotFoundError:
             raise StoreLoad.FileNotFoundError(
                 "Matrix shape and entries unknown for %s: No matrix file" % str(self))
@@ -498,16 +866,13 @@ class OperatorMatrix:
             logger.warning("Zero matrix: %s is not valid" % str(self))
             shape = (self.domain.get_dimension(), self.target.get_dimension())
         else:
-            (entries_list, shape) = self._load_matrix_list()
-            for (r, c, d) in entries_list:
-                row_ind.append(r)
-                col_ind.append(c)
-                data.append(d)
+            (row_ind, col_ind, data, shape) = self._load_matrix_arrays()
         M = sparse.csc_matrix((data, (row_ind, col_ind)),
                               shape=shape, dtype='d')
         return M
 
-    def compute_rank(self, sage=None, linbox=None, rheinfall=None, ignore_existing_files=False, skip_if_no_matrix=True):
+    def compute_rank(self, sage=None, linbox=None, rheinfall=None, ignore_existing_files=False, skip_if_no_matrix=True,
+                     native=None, n_jobs=1):
         """Compute the rank of the operator matrix.
 
         Compute the rank of the operator matrix and stores it in the rank file. The rank can be determined with
@@ -517,6 +882,7 @@ class OperatorMatrix:
             - Use linbox to determine the rank over the rational numbers or over a finite field, i.e. with all
               calculations modulo a prime number.
             - Use rheinfall to determine the rank over the integers, the rational numbers or modulo 64 bit integers.
+            - Use the native sparse elimination of the module ModularRank to determine the rank over a finite field.
         The prime number is set in the module Parameters.
 
         :param sage: Use sage to compute the rank. Options: 'integer' (exact rank over the integers),
@@ -531,32 +897,33 @@ class OperatorMatrix:
             recompute the rank if True, otherwise skip recomputing the rank if there exists already a
             rank file (Default: False).
         :type ignore_existing_files: bool
+        :param native: Use the native rank computation. Options: 'mod' (rank over a finite field), 'multiprime'
+            (maximal rank modulo several random primes), 'certified' (multiprime rank certified over the rationals)
+            (Default: None).
+        :type native: str or list(str)
+        :param n_jobs: Number of parallel processes for the ranks of the blocks of the matrix if
+            Parameters.rank_block_decomposition is True (Default: 1).
+        :type n_jobs: int
         :raise StoreLoad.FileNotFoundError: Raised if the matrix file cannot be found and skip_if_no_matrix = False.
 
         .. seealso:: - http://www.linalg.org/
                     - https://github.com/linbox-team/linbox/blob/master/examples/rank.C
                     - https://github.com/riccardomurri/rheinfall/blob/master/src.c%2B%2B/examples/rank.cpp
         """
-        if sage is None and linbox is None and rheinfall is None:
+        if sage is None and linbox is None and rheinfall is None and native is None:
             raise ValueError("compute_rank: At least one rank computation method needs to be specified.")
 
-        if not self.is_valid():
+        if not self.needs_rank(sage=sage, linbox=linbox, native=native,
+                               ignore_existing_files=ignore_existing_files):
             return
-        #
-        # if not ignore_existing_files and self.exists_rank_file():
-        is_exact_method = (sage is not None and  "integer" in sage) \
-                     or (linbox is not None and "rational" in linbox)
-        # compute the rank even if rank file is present, if we improve regarding exactness
-        if not ignore_existing_files and self.exists_rank_file():
-            if self.exists_exact_rank() or (not is_exact_method):
-                return
         if ignore_existing_files and self.exists_rank_file():
             self.delete_rank_file()
         print('Compute matrix rank: Domain: ' +
               str(self.domain.get_ordered_param_dict()))
+        rank_notes = {}
         try:
             rank_dict = self._compute_rank(
-                sage=sage, linbox=linbox, rheinfall=rheinfall)
+                sage=sage, linbox=linbox, rheinfall=rheinfall, native=native, n_jobs=n_jobs, rank_notes=rank_notes)
         except StoreLoad.FileNotFoundError as error:
             if skip_if_no_matrix:
                 logger.info(
@@ -565,15 +932,46 @@ class OperatorMatrix:
                 return
             else:
                 raise error
-        self._store_rank_dict(rank_dict)
+        self._store_rank_dict(rank_dict, rank_notes)
+
+    def needs_rank(self, sage=None, linbox=None, native=None, ignore_existing_files=False):
+        """Return whether the rank is to be computed with the given rank computation methods.
+
+        An existing rank is recomputed if ignore_existing_files is True or if an exact rank method is requested and
+        the existing rank is not exact.
 
-    def _compute_rank(self, sage=None, linbox=None, rheinfall=None, prime=Parameters.prime):
+        :param sage: Options for the rank computation with sage (Default: None).
+        :type sage: str or list(str)
+        :param linbox: Options for the rank computation with linbox (Default: None).
+        :type linbox: str or list(str)
+        :param native: Options for the native rank computation (Default: None).
+        :type native: str or list(str)
+        :param ignore_existing_files: Option to ignore an existing rank file (Default: False).
+        :type ignore_existing_files: bool
+        :return: True if the rank is to be computed.
+        :rtype: bool
+        """
+        if not self.is_valid():
+            return False
+        is_exact_method = (sage is not None and  "integer" in sage) \
+                     or (linbox is not None and "rational" in linbox) \
+                     or (native is not None and "certified" in native)
+        # compute the rank even if rank file is present, if we improve regarding exactness
+        if not ignore_existing_files and self.exists_rank_file():
+            if self.exists_exact_rank() or (not is_exact_method):
+                return False
+        return True
+
+    def _compute_rank(self, sage=None, linbox=None, rheinfall=None, prime=Parameters.prime, native=None, n_jobs=1,
+                      rank_notes=None):
         if type(sage) == str:
             sage = [sage]
         if type(linbox) == str:
             linbox = [linbox]
         if type(rheinfall) == str:
             rheinfall = [rheinfall]
+        if type(native) == str:
+            native = [native]
         if self.is_trivial() or self.get_matrix_entries() == 0:
             rank_dict = {'exact': 0}
         else:
@@ -584,14 +982,18 @@ class OperatorMatrix:
                         raise ValueError(
                             "Options for rank computations with sage: " + str(Parameters.sage_rank_options))
                     for option in sage:
+                        if Parameters.rank_block_decomposition:
+                            rank_sage = self._compute_block_rank('sage_' + option, prime, n_jobs=n_jobs)
+                            rank_dict.update({'sage_integer' if option == 'integer' else 'sage_mod_%d' % prime:
+                                              rank_sage})
+                            continue
+                        (M, rankbias) = self._get_rank_input_matrix(prime if option == 'mod' else None)
                         if option == 'integer':
-                            M = self.get_matrix_transposed()
-                            rank_exact = M.rank()
+                            rank_exact = M.rank() + rankbias
                             rank_dict.update({'sage_integer': rank_exact})
                         if option == 'mod':
-                            M = self.get_matrix_transposed()
-                            M.change_ring(GF(prime))
-                            rank_mod_p = M.rank()
+                            M = M.change_ring(GF(prime))
+                            rank_mod_p = M.rank() + rankbias
                             info = 'sage_mod_%d' % prime
                             rank_dict.update({info: rank_mod_p})
                 if linbox is not None:
@@ -600,7 +1002,7 @@ class OperatorMatrix:
                                          str(LinboxInterface.linbox_options))
                     for option in linbox:
                         rank_linbox = LinboxInterface.rank(
-                            option, self.get_matrix_file_path(), prime=prime)
+                            option, self.get_matrix_sms_file_path(), prime=prime)
                         info = "linbox_%s" % option if option == "rational" else "linbox_%s_%d" % (
                             option, prime)
                         rank_dict.update({info: rank_linbox})
@@ -610,16 +1012,134 @@ class OperatorMatrix:
                                          str(RheinfallInterface.rheinfall_options))
                     for option in rheinfall:
                         rank_rheinfall = RheinfallInterface.rank(
-                            option, self.get_matrix_file_path())
+                            option, self.get_matrix_sms_file_path())
                         if rank_rheinfall == 0:
                             return self._compute_rank(sage='integer')
                         info = "rheinfall_" + option
                         rank_dict.update({info: rank_rheinfall})
+                if native is not None:
+                    if not set(native) <= ModularRank.native_options:
+                        raise ValueError("Options for native rank computations: " + str(ModularRank.native_options))
+                    if 'mod' in native:
+                        if Parameters.rank_block_decomposition:
+                            rank_native = self._compute_block_rank('native_mod', prime, n_jobs=n_jobs)
+                        else:
+                            (row_ind, col_ind, data, shape, rankbias) = self._get_rank_input_arrays(prime)
+                            rank_native = ModularRank.rank(row_ind, col_ind, data, shape, prime,
+                                                           progress_bar=Parameters.native_rank_progress) + rankbias
+                        rank_dict.update({"native_mod_%d" % prime: rank_native})
+                    if 'multiprime' in native or 'certified' in native:
+                        rank_dict.update(self._compute_multiprime_rank(
+                            certify=('certified' in native), n_jobs=n_jobs, rank_notes=rank_notes))
             except StoreLoad.FileNotFoundError:
                 raise StoreLoad.FileNotFoundError(
                     "Cannot compute rank of %s: First build operator matrix" % str(self))
         return rank_dict
 
+    def _get_rank_input_arrays(self, prime=None):
+        """Return the operator matrix as numpy arrays for rank computations.
+
+        The matrix is preconditioned with MatrixMethods.precondition_arrays if Parameters.precondition_rank is True.
+
+        :param prime: Prime for rank computations modulo the prime, None for rank computations over the rationals
+            (Default: None).
+        :type prime: int
+        :return: (rows, cols, values, shape, rankbias), where rankbias is to be added to the rank of the returned
+            matrix (modulo prime if given) to obtain the rank of the operator matrix.
+        :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, tuple(int, int), int)
+        """
+        (rows, cols, values, shape) = self._load_matrix_arrays()
+        if not Parameters.precondition_rank:
+            return (rows, cols, values, shape, 0)
+        return MatrixMethods.precondition_arrays(rows, cols, values, shape, prime=prime)
+
+    def _compute_multiprime_rank(self, certify=False, n_jobs=1, rank_notes=None):
+        """Compute the maximal matrix rank modulo Parameters.multiprime_count random primes.
+
+        The ranks modulo the different primes are computed in parallel. The maximal rank is a lower bound for the
+        rank over the rationals, equal to it up to the error probability given by
+        ModularRank.multiprime_error_bound. The primes and the error bound are recorded in rank_notes.
+        Optionally the rank over the rationals is certified with the nonsingular pivot minor of the maximal rank if it
+        has at most Parameters.certify_max_rank rows (see _certify_rank).
+
+        :param certify: Option to certify the rank over the rationals (Default: False).
+        :type certify: bool
+        :param n_jobs: Number of parallel processes (Default: 1).
+        :type n_jobs: int
+        :param rank_notes: Dictionary to be updated with notes about the rank computation (Default: None).
+        :type rank_notes: dict(str -> str)
+        :return: Dictionary with the ranks: 'native_multiprime' and 'native_certified' if the rank is certified.
+        :rtype: dict(str -> int)
+        """
+        (rows, cols, values, shape, rankbias) = self._get_rank_input_arrays()
+        primes = ModularRank.random_primes(Parameters.multiprime_count)
+        results = Parallel.parallel_map(_multiprime_rank, primes, n_jobs=n_jobs,
+                                        matrix_arrays=(rows, cols, values, shape))
+        (r, pivot_rows, pivot_cols) = max(results, key=lambda result: result[0])
+        error_bound = ModularRank.multiprime_error_bound(rows, values, len(primes))
+        notes = {'native_multiprime': "primes %s ranks %s error_bound %.3e" % (
+            ','.join(map(str, primes)), ','.join(str(result[0] + rankbias) for result in results), error_bound)}
+        rank_dict = {'native_multiprime': r + rankbias}
+        if certify:
+            certified = _certify_rank((rows, cols, values, shape), pivot_rows, pivot_cols,
+                                      failure_probability=Parameters.verification_failure_probability)
+            if certified is None:
+                logger.warning("%s: Multiprime rank %d not certified, the pivot minor of size %d exceeds "
+                               "Parameters.certify_max_rank" % (str(self), r + rankbias, r))
+                notes.update({'native_certified': "skipped for pivot minor of size %d" % r})
+            elif certified:
+                rank_dict.update({'native_certified': r + rankbias})
+                notes.update({'native_certified': "pivot minor of size %d failure_probability %.0e" % (
+                    r, Parameters.verification_failure_probability)})
+            else:
+                logger.warning("%s: Multiprime rank %d not certified over the rationals" % (str(self), r + rankbias))
+                notes.update({'native_certified': "failed for rank %d" % (r + rankbias)})
+        if rank_notes is not None:
+            rank_notes.update(notes)
+        return rank_dict
+
+    def _compute_block_rank(self, method, prime, n_jobs=1):
+        """Compute the matrix rank as sum of the ranks of the connected components of the matrix.
+
+        The matrix (preconditioned if Parameters.precondition_rank is True) is split into the blocks given by the
+        connected components of the bipartite graph of rows and columns with an edge for each nonzero entry.
+        The ranks of the blocks are computed in parallel.
+
+        :param method: Rank computation method for the blocks: 'sage_integer', 'sage_mod' or 'native_mod'.
+        :type method: str
+        :param prime: Prime number for modular rank computations.
+        :type prime: int
+        :param n_jobs: Number of parallel processes (Default: 1).
+        :type n_jobs: int
+        :return: Matrix rank.
+        :rtype: int
+        """
+        (rows, cols, values, shape, rankbias) = self._get_rank_input_arrays(
+            None if method == 'sage_integer' else prime)
+        blocks = MatrixMethods.connected_blocks(rows, cols, values, shape)
+        logger.info("%s: Rank computation split into %d blocks, largest block shape %s" % (
+            str(self), len(blocks), str(blocks[0][3]) if blocks else '(0, 0)'))
+        ranks = Parallel.parallel_map(RankServer.array_rank, blocks, n_jobs=n_jobs, method=method, prime=prime)
+        return sum(ranks) + rankbias
+
+    def _get_rank_input_matrix(self, prime=None):
+        """Return the transposed operator matrix as sparse sage matrix over Z for rank computations.
+
+        The matrix is preconditioned with MatrixMethods.precondition_arrays if Parameters.precondition_rank is True.
+
+        :param prime: Prime for rank computations modulo the prime, None for rank computations over the rationals
+            (Default: None).
+        :type prime: int
+        :return: (M, rankbias), where rankbias is to be added to the rank of M (modulo prime if given) to obtain the
+            rank of the operator matrix.
+        :rtype: tuple(Matrix_sparse, int)
+        """
+        if not Parameters.precondition_rank:
+            return (self.get_matrix_transposed(), 0)
+        (rows, cols, values, (d, t), rankbias) = self._get_rank_input_arrays(prime)
+        entries = {(i, j): v for (i, j, v) in zip(rows.tolist(), cols.tolist(), values.tolist())}
+        return (matrix(ZZ, d, t, entries, sparse=True), rankbias)
+
     def exists_exact_rank(self):
         """Determines whether there has been a rank computed that is exact, i.e.,
         over rationals."""
@@ -632,29 +1152,63 @@ class OperatorMatrix:
         return any( s in rank_dict for s in exact_rank_methods )
         # return "sage_integer" in rank_dict or "exact" in rank_dict or "linbox_rational" in rank_dict
 
-    def _store_rank_dict(self, update_rank_dict):
+    def _store_rank_dict(self, update_rank_dict, update_rank_notes=None):
+        # Notes are stored as lines '# mode note' after the ranks.
         try:
             rank_dict = self._load_rank_dict()
+            rank_notes = self._load_rank_notes()
         except StoreLoad.FileNotFoundError:
             rank_dict = {}
+            rank_notes = {}
         rank_dict.update(update_rank_dict)
+        if update_rank_notes is not None:
+            rank_notes.update(update_rank_notes)
         rank_list = [str(rank) + ' ' + mode for (mode, rank)
                      in rank_dict.items()]
+        rank_list += ['# ' + mode + ' ' + note for (mode, note) in rank_notes.items()]
         StoreLoad.store_string_list(rank_list, self.get_rank_file_path())
+        Shared.file_cache.invalidate(self.get_rank_file_path())
+
+    def _load_rank_file(self):
+        # Returns the ranks and the notes of the rank file as dictionaries mode -> rank and mode -> note, cached in
+        # Shared.file_cache.
+        path = self.get_rank_file_path()
+
+        def load():
+            rank_dict = {}
+            rank_notes = {}
+            for line in StoreLoad.load_string_list(path):
+                if line.startswith('#'):
+                    (mode, note) = line[1:].strip().split(" ", 1)
+                    rank_notes.update({mode: note})
+                else:
+                    (rank, mode) = line.split(" ")
+                    rank_dict.update({mode: int(rank)})
+            return (rank_dict, rank_notes)
+
+        return Shared.file_cache.load(path, 'rank', load)
+
+    def _load_rank_notes(self):
+        """Load the notes about the rank computations from the rank file.
+
+        :return: Dictionary mode -> note.
+        :rtype: dict(str -> str)
+        :raise StoreLoad.FileNotFoundError: Raised if the rank file is not found.
+        """
+        if not self.is_valid():
+            return {}
+        (rank_dict, rank_notes) = self._load_rank_file()
+        return dict(rank_notes)
 
     def _load_rank_dict(self):
         if not self.is_valid():
             return {'exact': 0}
         try:
-            rank_list = StoreLoad.load_string_list(self.get_rank_file_path())
+            (rank_dict, rank_notes) = self._load_rank_file()
         except StoreLoad.FileNotFoundError:
             raise StoreLoad.FileNotFoundError(
                 "Cannot load matrix rank, No rank file found for %s: " % str(self))
-        rank_dict = {}
-        for line in rank_list:
-            (rank, mode) = line.split(" ")
-            rank_dict.update({mode: int(rank)})
-        return rank_dict
+        return dict(rank_dict)
 
     def get_matrix_rank(self):
         """Return the matrix rank.
@@ -676,6 +1230,46 @@ class OperatorMatrix:
                 "Matrix ranks computed with different methods are not equal for " + str(self))
         return ranks[0]
 
+    def get_memory_estimate(self, stage='rank', sage=None, linbox=None, rheinfall=None, native=None):
+        """Predict the peak memory of a process building the operator matrix or computing its rank.
+
+        Used by the memory budget of Parallel.Executor. The prediction is based on the dimensions of domain and target,
+        the number of matrix entries and the rank computation backend with the parameters of the module Parameters.
+
+        :param stage: 'matrix' (build the matrix) or 'rank' (compute the rank) (Default: 'rank').
+        :type stage: str
+        :param sage: Options for the rank computation with sage (Default: None).
+        :type sage: str or list(str)
+        :param linbox: Options for the rank computation with linbox (Default: None).
+        :type linbox: str or list(str)
+        :param rheinfall: Options for the rank computation with rheinfall (Default: None).
+        :type rheinfall: str or list(str)
+        :param native: Options for the native rank computation (Default: None).
+        :type native: str or list(str)
+        :return: Predicted peak memory in bytes.
+        :rtype: int
+        """
+        base = Parameters.process_base_memory
+        if not self.is_valid():
+            return base
+        try:
+            if stage == 'matrix':
+                (d, t) = (self.domain.get_dimension(), self.target.get_dimension())
+                entries = d * Parameters.memory_entries_per_row
+                return int(base + (d + t) * Parameters.memory_bytes_per_basis_element
+                           + entries * Parameters.memory_bytes_per_entry['build'])
+            ((d, t), entries) = self.get_matrix_shape_entries()
+        except StoreLoad.FileNotFoundError:
+            return base
+        backends = [backend for (backend, options) in (('sage', sage), ('linbox', linbox), ('rheinfall', rheinfall),
+                                                       ('native', native)) if options is not None]
+        bytes_per_entry = max(Parameters.memory_bytes_per_entry[backend] for backend in backends or ['native'])
+        estimate = base + entries * bytes_per_entry * Parameters.memory_fill_factor
+        if native is not None:
+            # Dense elimination of the remaining active submatrix.
+            estimate += 8 * min(d * t, ModularRank.dense_max_entries)
+        return int(estimate)
+
     def get_sort_size(self):
         """Return the min(nrows, ncolumns) to be used as a sort key. If the matrix shape is unknown the constant
         Parameters.max_sort_value is returned.
@@ -758,12 +1352,114 @@ class GraphOperator(Operator, OperatorMatrix):
 
     Inherits from operator matrix and additionally implements the operator interface, i.e. it acts on graphs as
     described in the method operate on. Build the operator matrix by calling the method build_matrix.
+
+    Graph operators whose image of a graph is the sum of the images of its single edges or vertices set the class
+    attribute element_type to 'edges' or 'vertices' and implement operate_on_element. Then the operator matrix is
+    built by operating only on one edge or vertex per orbit of the automorphism group of a basis element.
     """
     __metaclass__ = ABCMeta
 
+    # None, 'edges' or 'vertices': The elements of a graph on which operate_on_element acts.
+    element_type = None
+    # True if operate_on and operate_on_element also accept CompactGraph.CompactGraph instances.
+    compact_graphs = False
+
     def __init__(self, domain, target):
         super().__init__(domain, target)
 
+    def _use_compact_graphs(self):
+        """Return whether to operate on CompactGraph.CompactGraph instances instead of Sage graphs.
+
+        By default (Parameters.use_compact_graphs = None) compact graphs are only used with the canonical labelling
+        backend 'nauty', which labels them directly, while the other backends convert them to Sage graphs.
+
+        :return: True if the operator supports compact graphs and they are enabled.
+        :rtype: bool
+        """
+        if not self.compact_graphs:
+            return False
+        if Parameters.use_compact_graphs is None:
+            return Parameters.canonical_label_algorithm == 'nauty'
+        return Parameters.use_compact_graphs
+
+    def operate_on_element(self, G, x):
+        """Return the summand of the image of the graph G for a single edge or vertex x.
+
+        The image of the operator is the sum of the summands over all edges or vertices of the graph, i.e.
+        operate_on(G) = sum(operate_on_element(G, x) for x in elements of G). The summands must be equivariant with
+        respect to automorphisms of G.
+
+        :param G: Graph on which the operator is applied.
+        :type G: Graph
+        :param x: Edge (u, v) with u < v or vertex of G.
+        :type x: tuple(int, int) or int
+        :return: List of tuples (GG, factor), such that the summand is sum(factor * GG).
+        :rtype: list(tuple(Graph, factor))
+        """
+        raise NotImplementedError("%s doesn't operate on single elements" % str(self))
+
+    def _get_element_orbits(self, G):
+        """Return the orbits of the automorphism group of the graph G acting on its edges or vertices.
+
+        The automorphisms respect the partition of the vertices of the domain.
+
+        :param G: Graph.
+        :type G: Graph
+        :return: List of orbits, each given as list of edges or vertices in increasing order.
+        :rtype: list(list(tuple(int, int))) or list(list(int))
+        """
+        if self.element_type == 'edges':
+            elements = G.edges(labels=False, sort=True)
+        else:
+            elements = list(range(G.order()))
+        autom_list = CanonicalLabelling.automorphism_group(G, partition=self.domain.get_partition())
+        index = {x: i for (i, x) in enumerate(elements)}
+        parent = list(range(len(elements)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for a in autom_list:
+            for (i, x) in enumerate(elements):
+                if self.element_type == 'edges':
+                    (u, v) = (a[x[0]], a[x[1]])
+                    j = index[(u, v) if u < v else (v, u)]
+                else:
+                    j = a[x]
+                (ri, rj) = (find(i), find(j))
+                if ri != rj:
+                    parent[max(ri, rj)] = min(ri, rj)
+        orbits = collections.OrderedDict()
+        for (i, x) in enumerate(elements):
+            orbits.setdefault(find(i), []).append(x)
+        return list(orbits.values())
+
+    def operate_on_orbits(self, G):
+        """Return the image of the graph G by operating on one edge or vertex per automorphism orbit.
+
+        Since the summands of equivalent edges or vertices are related by an automorphism of G, they agree up to the
+        sign of the automorphism. If G has no odd automorphisms, e.g. if G is a basis element of the domain, the
+        summand of an orbit representative is multiplied with the orbit size.
+
+        :param G: Graph without odd automorphisms on which the operator is applied.
+        :type G: Graph
+        :return: List of tuples (GG, factor), such that (operator)(G) = sum(factor * GG)
+        :rtype: list(tuple(Graph, factor))
+        """
+        if G.has_multiple_edges():
+            return self.operate_on(G)
+        image = []
+        orbits = self._get_element_orbits(G)
+        if self._use_compact_graphs():
+            G = CompactGraph.compact(G)
+        for orbit in orbits:
+            for (GG, factor) in self.operate_on_element(G, orbit[0]):
+                image.append((GG, factor * len(orbit)))
+        return image
+
     @classmethod
     def generate_op_matrix_list(cls, sum_vector_space):
         """Return a list of all possible graph operators of this type with domain and target being sub vector spaces
@@ -814,13 +1510,14 @@ class GraphOperator(Operator, OperatorMatrix):
                     image_dict.pop(G2_g6)
         return image_dict.items()
 
-    def build_matrix(self, ignore_existing_files=False, skip_if_no_basis=True, progress_bar=False, **kwargs):
+    def build_matrix(self, ignore_existing_files=False, skip_if_no_basis=True, progress_bar=False, n_jobs=1,
+                     **kwargs):
         if not self.is_valid():
             return
         if (not ignore_existing_files) and self.exists_matrix_file():
             return
         try:
-            domain_basis = self.domain.get_basis()
+            d = self.domain.get_dimension()
         except StoreLoad.FileNotFoundError:
             if not skip_if_no_basis:
                 raise StoreLoad.FileNotFoundError("Cannot build operator matrix of %s: "
@@ -830,7 +1527,7 @@ class GraphOperator(Operator, OperatorMatrix):
                             "since basis of the domain %s is not built" % (str(self), str(self.domain)))
                 return
         try:
-            target_basis6 = self.target.get_basis_g6()
+            t = self.target.get_dimension()
         except StoreLoad.FileNotFoundError:
             if not skip_if_no_basis:
                 raise StoreLoad.FileNotFoundError("Cannot build operator matrix of %s: "
@@ -840,18 +1537,25 @@ class GraphOperator(Operator, OperatorMatrix):
                             "since basis of the target %s is not built" % (str(self), str(self.target)))
                 return
 
-        shape = (d, t) = (self.domain.get_dimension(),
-                          self.target.get_dimension())
+        shape = (d, t)
         if d == 0 or t == 0:
             self._store_matrix_list([], shape)
             return
 
-        lookup = {G6: j for (j, G6) in enumerate(target_basis6)}
         desc = 'Build matrix of %s operator: Domain: %s' % (
             str(self.get_type()), str(self.domain.get_ordered_param_dict()))
 
         # if not progress_bar:
         print(desc)
+        if n_jobs > 1 or Parameters.matrix_checkpoint_rows is not None:
+            self._build_matrix_in_blocks(shape, n_jobs, progress_bar=progress_bar)
+            return
+
+        if self._use_compact_graphs():
+            domain_basis = self.domain.get_basis_compact()
+        else:
+            domain_basis = self.domain.get_basis()
+        lookup = self.target.get_basis_lookup()
         # list_of_lists = []
         matrix_list = []
         for domain_basis_element in tqdm(enumerate(domain_basis), total=d, desc=desc, disable=(not progress_bar)):
@@ -863,13 +1567,124 @@ class GraphOperator(Operator, OperatorMatrix):
         # matrix_list = list(itertools.chain.from_iterable(list_of_lists))
         matrix_list.sort()
         self._store_matrix_list(matrix_list, shape)
+        self._log_canon_cache_info()
+
+    def _log_canon_cache_info(self):
+        cache_info = self.target.get_canon_cache_info()
+        if cache_info is not None:
+            logger.info("Canonical form cache of %s: %d hits, %d misses, size %d of %d" % (
+                str(self.target), cache_info['hits'], cache_info['misses'], cache_info['size'],
+                cache_info['maxsize']))
+
+    def get_matrix_block_dir(self):
+        """Return the directory for the partial matrix files of a row block matrix build.
+
+        :return: Path to the directory of the partial matrix files.
+        :rtype: path
+        """
+        return self.get_matrix_file_path() + '_blocks'
+
+    def _get_matrix_block_file_path(self, block):
+        (start, stop) = block
+        return os.path.join(self.get_matrix_block_dir(), 'block%d_%d.txt' % (start, stop))
+
+    def _get_matrix_blocks(self, d, block_size):
+        """Split the domain basis indices into consecutive index ranges.
+
+        :param d: Domain dimension.
+        :type d: int
+        :param block_size: Number of domain basis indices per block.
+        :type block_size: int
+        :return: List of index ranges (start, stop).
+        :rtype: list(tuple(int, int))
+        """
+        return [(start, min(start + block_size, d)) for start in range(0, d, block_size)]
+
+    def _build_matrix_in_blocks(self, shape, n_jobs=1, progress_bar=False):
+        """Build the operator matrix in row blocks, optionally using parallel processes.
+
+        The domain basis is split into index ranges of Parameters.matrix_checkpoint_rows rows, or into n_jobs ranges
+        if no checkpoint size is set. Each range is built separately (in parallel if n_jobs > 1) and atomically
+        stored as a sorted partial SMS file, which serves as checkpoint. Ranges for which a partial file exists
+        already from an interrupted build are not rebuilt. The partial files are finally stitched together to the
+        matrix file.
+
+        :param shape: Matrix shape = (domain dimension, target dimension).
+        :type shape: tuple(int, int)
+        :param n_jobs: Number of parallel processes (Default: 1).
+        :type n_jobs: int
+        :param progress_bar: Option to show a progress bar (Default: False). Only active if n_jobs == 1.
+        :type progress_bar: bool
+        :raise RuntimeError: Raised if a row block has not been built.
+        """
+        (d, t) = shape
+        block_size = Parameters.matrix_checkpoint_rows
+        if block_size is None:
+            block_size = -(-d // n_jobs)
+        blocks = self._get_matrix_blocks(d, block_size)
+        block_paths = [self._get_matrix_block_file_path(block) for block in blocks]
+        missing_blocks = [block for (block, block_path) in zip(blocks, block_paths) if not os.path.isfile(block_path)]
+        if len(missing_blocks) < len(blocks):
+            print('Resume building matrix of %s: %d of %d row blocks done' %
+                  (str(self), len(blocks) - len(missing_blocks), len(blocks)))
+        # Build the target basis index before starting the parallel processes, such that they share it.
+        lookup = self.target.get_basis_lookup()
+        # Load the domain basis once and pass each block its slice.
+        domain_basis6 = self.domain.get_basis_g6(shared=True)
+        row_blocks = [_RowBlock(block, domain_basis6[block[0]:block[1]]) for block in missing_blocks]
+        del domain_basis6
+        if n_jobs > 1:
+            Parallel.parallel(self._build_matrix_block, row_blocks, n_jobs=n_jobs, shape=shape)
+        else:
+            for row_block in tqdm(row_blocks, desc='Row blocks', disable=(not progress_bar)):
+                self._build_matrix_block(row_block, shape=shape, lookup=lookup)
+            self._log_canon_cache_info()
+        for block_path in block_paths:
+            if not os.path.isfile(block_path):
+                raise RuntimeError("Row block matrix build of %s failed: %s missing" % (str(self), block_path))
+        self._store_matrix_blocks(block_paths, shape)
+        StoreLoad.delete_dir(self.get_matrix_block_dir())
+
+    def _build_matrix_block(self, row_block, shape=None, lookup=None):
+        """Build the rows of the operator matrix for a range of domain basis indices.
+
+        The matrix entries are stored as sorted partial SMS file with the shape of the whole matrix.
+
+        :param row_block: Index range of the domain basis with the graph6 strings of its basis elements.
+        :type row_block: _RowBlock
+        :param shape: Matrix shape = (domain dimension, target dimension).
+        :type shape: tuple(int, int)
+        :param lookup: Lookup to translate from the graph6 string of a target basis element to its index
+            (Default: None). The target basis lookup is used if None.
+        :type lookup: BasisIndex.BasisIndex or dict(str -> int)
+        """
+        (start, stop) = block = row_block.block
+        domain_basis6 = row_block.basis6
+        if lookup is None:
+            lookup = self.target.get_basis_lookup()
+        if self._use_compact_graphs():
+            domain_basis = Graph6.decode_compact_graphs(domain_basis6)
+        else:
+            domain_basis = map(Graph, domain_basis6)
+        matrix_list = []
+        for (domain_index, G) in enumerate(domain_basis, start):
+            matrix_list.extend(self._generate_matrix_list(
+                (domain_index, G), lookup))
+        matrix_list.sort()
+        self._store_matrix_list(matrix_list, shape, path=self._get_matrix_block_file_path(block))
 
     def _generate_matrix_list(self, domain_basis_element, lookup):
         (domain_index, G) = domain_basis_element
-        image_list = self.operate_on(G)
+        if self.element_type is not None and Parameters.operator_orbit_reduction:
+            # Basis elements don't have odd automorphisms.
+            image_list = self.operate_on_orbits(G)
+        elif self._use_compact_graphs():
+            image_list = self.operate_on(CompactGraph.compact(G))
+        else:
+            image_list = self.operate_on(G)
         canon_images = {}
         for (GG, prefactor) in image_list:
-            (GGcanon6, sgn1) = self.target.graph_to_canon_g6(GG)
+            (GGcanon6, sgn1) = self.target.graph_to_canon_g6_cached(GG)
             sgn0 = canon_images.get(GGcanon6)
             sgn0 = sgn0 if sgn0 is not None else 0
             canon_images.update({GGcanon6: (sgn0 + sgn1 * prefactor)})
@@ -1078,7 +1893,8 @@ class OperatorMatrixCollection:
             matrix file (Default: False).
         :type ignore_existing_files: bool
         :param n_jobs: Option to build different matrices in parallel using
-                n_jobs parallel processes (Default: 1).
+                n_jobs parallel processes (Default: 1). If Parameters.shard_matrix_build is True the matrices are built
+                one after the other, each split into row blocks built by n_jobs processes.
         :type n_jobs: int
         :param progress_bar: Option to show a progress bar (Default: False).
         :type progress_bar: bool
@@ -1095,20 +1911,29 @@ class OperatorMatrixCollection:
         if info_tracker:
             self.start_tracker()
         self.sort()
-        Parallel.parallel(self._build_single_matrix, self.op_matrix_list, n_jobs=n_jobs,
-                          ignore_existing_files=ignore_existing_files, info_tracker=info_tracker,
-                          progress_bar=progress_bar)
+        if Parameters.shard_matrix_build and n_jobs > 1:
+            # Build one matrix after the other, each in row blocks using n_jobs processes.
+            for op in self.op_matrix_list:
+                self._build_single_matrix(op, ignore_existing_files=ignore_existing_files, n_jobs=n_jobs)
+        else:
+            Parallel.parallel(self._build_single_matrix, self.op_matrix_list, n_jobs=n_jobs,
+                              memory_estimate=operator.methodcaller('get_memory_estimate', 'matrix'),
+                              ignore_existing_files=ignore_existing_files, info_tracker=info_tracker,
+                              progress_bar=progress_bar)
         if info_tracker:
             self.stop_tracker()
 
-    def _build_single_matrix(self, op, info_tracker=False, **kwargs):
+    def _build_single_matrix(self, op, info_tracker=False, n_jobs=1, **kwargs):
         info = info_tracker if Parameters.second_info else False
-        op.build_matrix(info_tracker=info, **kwargs)
+        if n_jobs > 1 and isinstance(op, GraphOperator):
+            op.build_matrix(info_tracker=info, n_jobs=n_jobs, **kwargs)
+        else:
+            op.build_matrix(info_tracker=info, **kwargs)
         if info_tracker:
             self.update_tracker(op)
 
     def compute_rank(self, sage=None, linbox=None, rheinfall=None, sort_key='size', ignore_existing_files=False,
-                     n_jobs=1, info_tracker=False):
+                     n_jobs=1, info_tracker=False, native=None):
         """Compute the ranks of the operator matrices.
 
         :param sage: Use sage to compute the rank. Options: 'integer' (exact rank over the integers),
@@ -1132,12 +1957,16 @@ class OperatorMatrixCollection:
         :param info_tracker: Option to plot information about the operator matrices in a web page (Default: False).
                Only active if different ranks are not computed in parallel.
         :type info_tracker: bool
+        :param native: Use the native rank computation. Options: 'mod' (rank over a finite field), 'multiprime'
+            (maximal rank modulo several random primes), 'certified' (multiprime rank certified over the rationals)
+            (Default: None).
+        :type native: str or list(str)
 
         .. seealso:: - http://www.linalg.org/
                     - https://github.com/linbox-team/linbox/blob/master/examples/rank.C
                     - https://github.com/riccardomurri/rheinfall/blob/master/src.c%2B%2B/examples/rank.cpp
         """
-        if sage is None and linbox is None and rheinfall is None:
+        if sage is None and linbox is None and rheinfall is None and native is None:
             raise ValueError("compute_rank: At least one rank computation method needs to be specified.")
 
         print(' ')
@@ -1147,11 +1976,81 @@ class OperatorMatrixCollection:
         if info_tracker:
             self.start_tracker()
         self.sort(key=sort_key)
-        Parallel.parallel(self._compute_single_rank, self.op_matrix_list, n_jobs=n_jobs, sage=sage, linbox=linbox,
-                          rheinfall=rheinfall, ignore_existing_files=ignore_existing_files, info_tracker=info_tracker)
+        if Parameters.rank_server:
+            self._compute_ranks_on_server(sage=sage, linbox=linbox, rheinfall=rheinfall, native=native,
+                                          ignore_existing_files=ignore_existing_files, n_jobs=n_jobs,
+                                          info_tracker=info_tracker)
+        elif Parameters.shard_rank_computation and n_jobs > 1:
+            # Compute one rank after the other, each with the blocks of the matrix distributed over n_jobs processes.
+            for op in self.op_matrix_list:
+                self._compute_single_rank(op, sage=sage, linbox=linbox, rheinfall=rheinfall,
+                                          ignore_existing_files=ignore_existing_files, native=native, n_jobs=n_jobs)
+        else:
+            memory_estimate = operator.methodcaller('get_memory_estimate', 'rank', sage=sage, linbox=linbox,
+                                                    rheinfall=rheinfall, native=native)
+            Parallel.parallel(self._compute_single_rank, self.op_matrix_list, n_jobs=n_jobs,
+                              memory_estimate=memory_estimate, sage=sage, linbox=linbox,
+                              rheinfall=rheinfall, ignore_existing_files=ignore_existing_files,
+                              info_tracker=info_tracker, native=native)
         if info_tracker:
             self.stop_tracker()
 
+    def _compute_ranks_on_server(self, sage=None, linbox=None, rheinfall=None, native=None,
+                                 ignore_existing_files=False, n_jobs=1, info_tracker=False):
+        # Computes the ranks with a RankServer with n_jobs long-lived workers. Operators with an own rank computation
+        # and the native multiprime and certified ranks are computed as usual.
+        (sage, linbox, rheinfall, native) = [[option] if type(option) == str else (option or [])
+                                             for option in (sage, linbox, rheinfall, native)]
+        methods = ['sage_' + option for option in sage] + ['linbox_' + option for option in linbox] \
+            + ['rheinfall_' + option for option in rheinfall] + ['native_' + option for option in native
+                                                                  if option == 'mod']
+        other_native = [option for option in native if option != 'mod']
+        if not set(methods) <= RankServer.rank_methods:
+            raise ValueError("Options for rank computations with the rank server: " + str(RankServer.rank_methods))
+        ops = {}
+        for op in self.op_matrix_list:
+            if type(op)._compute_rank is not OperatorMatrix._compute_rank:
+                self._compute_single_rank(op, sage=sage or None, linbox=linbox or None, rheinfall=rheinfall or None,
+                                          native=native or None, ignore_existing_files=ignore_existing_files,
+                                          n_jobs=n_jobs, info_tracker=info_tracker)
+                continue
+            if not op.needs_rank(sage=sage, linbox=linbox, native=native,
+                                 ignore_existing_files=ignore_existing_files):
+                continue
+            if not op.exists_matrix_file():
+                logger.info("Skip computing rank of %s, since matrix is not built" % str(op))
+                continue
+            if ignore_existing_files and op.exists_rank_file():
+                op.delete_rank_file()
+            if op.is_trivial() or op.get_matrix_entries() == 0:
+                op._store_rank_dict({'exact': 0})
+                continue
+            if other_native:
+                rank_notes = {}
+                rank_dict = op._compute_rank(native=other_native, n_jobs=n_jobs, rank_notes=rank_notes)
+                op._store_rank_dict(rank_dict, rank_notes)
+            if methods:
+                ops[str(op)] = op
+
+        rankbiases = {}
+        # The rank bias of the preconditioning modulo a prime is only valid for modular rank computations.
+        precondition_prime = Parameters.prime if set(methods) <= RankServer.modular_methods else None
+
+        def tasks():
+            for (key, op) in ops.items():
+                (rows, cols, values, shape, rankbiases[key]) = op._get_rank_input_arrays(precondition_prime)
+                yield (key, (rows, cols, values, shape), methods, Parameters.prime)
+
+        with RankServer.RankServer(n_jobs) as server:
+            for (key, ranks, error) in server.compute_ranks(tasks()):
+                op = ops[key]
+                if error is not None:
+                    logger.error("Rank computation of %s failed: %s" % (key, error))
+                    continue
+                op._store_rank_dict({mode: r + rankbiases[key] for (mode, r) in ranks.items()})
+                if info_tracker:
+                    self.update_tracker(op)
+
     def _compute_single_rank(self, op, info_tracker=False, **kwargs):
         op.compute_rank(**kwargs)
         if info_tracker:
@@ -1412,14 +2311,13 @@ class Differential(OperatorMatrixCollection):
         try:
             if op1.is_trivial() or op2.is_trivial():
                 return 'triv'
-            M1 = op1.get_matrix()
-            M2 = op2.get_matrix()
+            vanishes = products_vanish([(1, [op1, op2])], eps=eps)
         except StoreLoad.FileNotFoundError:
             logger.info("Cannot test square zero: "
                         "Operator matrix not built for %s or %s" % (str(op1), str(op2)))
             return 'inc'
 
-        if Shared.matrix_norm(M2 * M1) < eps:
+        if vanishes:
             return 'succ'
         return 'fail'
 
@@ -8,6 +8,7 @@ __all__ = ['VectorSpaceProperties', 'GraphVectorSpaceProperties', 'VectorSpace',
 from abc import ABCMeta, abstractmethod
 from sage.all import *
 import operator
+import itertools
 import collections
 from tqdm import tqdm
 import StoreLoad
@@ -15,6 +16,10 @@ import Parallel
 import Parameters
 import Log
 import DisplayInfo
+import BasisIndex
+import CanonicalLabelling
+import Graph6
+import Shared
 
 
 logger = Log.logger.getChild('graph_vector_space')
@@ -319,8 +324,8 @@ class GraphVectorSpace(VectorSpace):
     def graph_to_canon_g6(self, graph):
         """Return the graph6 string of the canonically labeled graph and the corresponding permutation sign.
 
-        Labels the sage Graph graph canonically using the sage method for canonical labelling and respecting the
-        partition of the vertices.
+        Labels the sage Graph graph canonically using the canonical labelling backend set in
+        Parameters.canonical_label_algorithm and respecting the partition of the vertices.
 
         :param graph: Graph to be canonically labeled.
         :type graph: Graph
@@ -331,14 +336,12 @@ class GraphVectorSpace(VectorSpace):
         # print("graph_to_canon_g6", graph.graph6_string(), self.get_partition())
         # graph = copy(graph)
         # graph = Graph(graph.graph6_string())
-        canonG, perm_dict = graph.canonical_label(
-            partition=self.get_partition(), certificate=True,
-            algorithm=Parameters.canonical_label_algorithm)
-        sgn = self.perm_sign(graph, [perm_dict[j]
-                             for j in range(graph.order())])
-        return (canonG.graph6_string(), sgn)
+        (canon6, perm, autom_list) = CanonicalLabelling.canonical_form(graph, partition=self.get_partition())
+        sgn = self.perm_sign(graph, perm)
+        return (canon6, sgn)
 
-    def build_basis(self, progress_bar=False, ignore_existing_files=False, **kwargs):
+    def build_basis(self, progress_bar=False, ignore_existing_files=False, basis_buffer_size=None, n_jobs=1,
+                    **kwargs):
         """Build the basis of the vector space.
 
         Create the basis file if the vector space is valid, otherwise skip building a basis. If there exists already
@@ -352,7 +355,15 @@ class GraphVectorSpace(VectorSpace):
                 rebuild the basis if True, otherwise skip rebuilding the basis file if there exists a basis file already
                 (Default: False).
         :type ignore_existing_files: bool
+        :param basis_buffer_size: Maximal number of graph6 strings held in memory. If set, sorted runs are spilled
+                to disk and merged into the basis file (Default: Parameters.basis_buffer_size).
+        :type basis_buffer_size: int
+        :param n_jobs: Option to shard the generating graphs over n_jobs parallel processes (Default: 1).
+        :type n_jobs: int
         :param kwargs: Accepting further keyword arguments, which have no influence.
+
+        If Parameters.basis_checkpoint_graphs is set, the progress is checkpointed every basis_checkpoint_graphs
+        generating graphs and an interrupted build resumes from the last checkpoint.
         """
         # print("build basis ", str(self))
         if not self.is_valid():
@@ -361,51 +372,206 @@ class GraphVectorSpace(VectorSpace):
         if (not ignore_existing_files) and self.exists_basis_file():
             # Skip building a basis file if there exists already one and ignore_existing_file is False.
             return
-
-        generating_list = self.get_generating_graphs()
+        if basis_buffer_size is None:
+            basis_buffer_size = Parameters.basis_buffer_size
 
         desc = 'Build basis: ' + str(self.get_ordered_param_dict())
         # if not progress_bar:
         print(desc)
+        if n_jobs > 1:
+            self._build_basis_sharded(n_jobs, basis_buffer_size)
+            return
+
+        generating_list = self.get_generating_graphs()
+
+        if basis_buffer_size is not None or Parameters.basis_checkpoint_graphs is not None:
+            run_paths = self._build_basis_runs(generating_list, basis_buffer_size)
+            self._merge_basis_runs(run_paths)
+            return
         basis_set = set()
         # for G in tqdm(generating_list, desc=desc, disable=(not progress_bar)):
         for G in generating_list:
-            # For each graph G in the generating list, add the canonical labeled graph6 representation to the basis set
-            # if the graph G doesn't have odd automormphisms.
-            if self.get_partition() is None:
-                autom_list = G.automorphism_group().gens()
-                canonG = G.canonical_label(
-                    algorithm=Parameters.canonical_label_algorithm)
-            else:
-                # The canonical labelling respects the partition of the vertices.
-                autom_list = G.automorphism_group(
-                    partition=self.get_partition()).gens()
-                canonG = G.canonical_label(partition=self.get_partition(
-                ), algorithm=Parameters.canonical_label_algorithm)
-
-            canon6 = canonG.graph6_string()
-
-            if canon6 not in basis_set:
-                if not self._has_odd_automorphisms(G, autom_list):
-                    basis_set.add(canon6)
+            canon6 = self._get_basis_candidate_g6(G, basis_set)
+            if canon6 is not None:
+                basis_set.add(canon6)
 
         L = list(basis_set)
         L.sort()
         self._store_basis_g6(L)
 
+    def _get_basis_candidate_g6(self, G, basis_set):
+        """Return the graph6 string of the canonically labeled graph G if it is a new basis element.
+
+        :param G: Graph of the generating list.
+        :type G: Graph
+        :param basis_set: Graph6 strings already known to be basis elements.
+        :type basis_set: set(str)
+        :return: Graph6 string of the canonically labeled graph G if it is not contained in basis_set and G doesn't
+            have odd automorphisms, None otherwise.
+        :rtype: str
+        """
+        # Add the canonical labeled graph6 representation to the basis if the graph G doesn't have odd automormphisms.
+        # The canonical labelling and the automorphisms respect the partition of the vertices.
+        (canon6, perm, autom_list) = CanonicalLabelling.canonical_form(
+            G, partition=self.get_partition(), automorphisms=True)
+
+        if canon6 not in basis_set:
+            if not self._has_odd_automorphisms(G, autom_list):
+                return canon6
+        return None
+
+    def _build_basis_runs(self, generating_list, basis_buffer_size, run_prefix='run'):
+        """Canonically label the generating graphs and spill the basis elements as sorted runs to disk.
+
+        At most basis_buffer_size graph6 strings are held in memory. Each time the buffer is full or
+        Parameters.basis_checkpoint_graphs generating graphs have been processed the buffer is spilled as a sorted run
+        to disk and a checkpoint with the number of processed generating graphs is stored. If a checkpoint exists the
+        build resumes after the last checkpointed generating graph. At least one (possibly empty) run is stored.
+
+        :param generating_list: Graphs spanning the vector space.
+        :type generating_list: iterable(Graph)
+        :param basis_buffer_size: Maximal number of graph6 strings held in memory. If None all graph6 strings are
+            held in memory and stored as a single run.
+        :type basis_buffer_size: int
+        :param run_prefix: Prefix of the run file names (Default: 'run').
+        :type run_prefix: str
+        :return: Paths to the run files.
+        :rtype: list(path)
+        """
+        checkpoint_graphs = Parameters.basis_checkpoint_graphs
+        checkpoint_path = os.path.join(self.get_basis_run_dir(), run_prefix + '.checkpoint')
+        (n_graphs, run_paths) = self._load_basis_checkpoint(checkpoint_path)
+        if n_graphs > 0:
+            print('Resume building basis of %s after %d generating graphs' % (str(self), n_graphs))
+            generating_list = itertools.islice(generating_list, n_graphs, None)
+        basis_set = set()
+        for G in generating_list:
+            n_graphs += 1
+            canon6 = self._get_basis_candidate_g6(G, basis_set)
+            if canon6 is not None:
+                basis_set.add(canon6)
+            is_full = basis_buffer_size is not None and len(basis_set) >= basis_buffer_size
+            is_checkpoint = checkpoint_graphs is not None and n_graphs % checkpoint_graphs == 0
+            if is_full or is_checkpoint:
+                run_paths.append(self._store_basis_run(basis_set, run_prefix, len(run_paths)))
+                StoreLoad.store_string_list([str(n_graphs)] + run_paths, checkpoint_path)
+                basis_set = set()
+        if len(basis_set) > 0 or len(run_paths) == 0:
+            run_paths.append(self._store_basis_run(basis_set, run_prefix, len(run_paths)))
+        return run_paths
+
+    @staticmethod
+    def _load_basis_checkpoint(checkpoint_path):
+        """Load a checkpoint of a basis build.
+
+        :param checkpoint_path: Path to the checkpoint file.
+        :type checkpoint_path: path
+        :return: (Number of processed generating graphs, paths to the stored runs). (0, []) if there is no checkpoint.
+        :rtype: tuple(int, list(path))
+        """
+        if not os.path.isfile(checkpoint_path):
+            return (0, [])
+        checkpoint = StoreLoad.load_string_list(checkpoint_path)
+        return (int(checkpoint.pop(0)), checkpoint)
+
+    def _merge_basis_runs(self, run_paths):
+        """Merge sorted runs into the basis file and delete the runs and checkpoints.
+
+        The resulting basis file is identical to the one built in memory.
+
+        :param run_paths: Paths to the run files.
+        :type run_paths: list(path)
+        """
+        StoreLoad.merge_sorted_runs(run_paths, self.get_basis_file_path())
+        Shared.file_cache.invalidate(self.get_basis_file_path())
+        StoreLoad.delete_dir(self.get_basis_run_dir())
+
+    def _build_basis_sharded(self, n_jobs, basis_buffer_size=None):
+        """Build the basis by sharding the generating graphs over parallel processes.
+
+        Each process canonically labels every n_jobs-th generating graph, tests for odd automorphisms and stores its
+        basis elements as sorted runs. The runs of all shards are finally merged and deduplicated.
+        Shards completed in an interrupted build with the same number of shards are not rebuilt.
+
+        :param n_jobs: Number of shards and parallel processes.
+        :type n_jobs: int
+        :param basis_buffer_size: Maximal number of graph6 strings held in memory per process (Default: None).
+        :type basis_buffer_size: int
+        :raise RuntimeError: Raised if a shard did not finish.
+        """
+        done_paths = [self._get_basis_shard_done_path(shard_idx, n_jobs) for shard_idx in range(n_jobs)]
+        missing_shards = [shard_idx for shard_idx in range(n_jobs) if not os.path.isfile(done_paths[shard_idx])]
+        Parallel.parallel(self._build_basis_shard, missing_shards, n_jobs=n_jobs, n_shards=n_jobs,
+                          basis_buffer_size=basis_buffer_size)
+        run_paths = []
+        for done_path in done_paths:
+            if not os.path.isfile(done_path):
+                raise RuntimeError("Sharded basis build of %s failed: %s missing" % (str(self), done_path))
+            run_paths += StoreLoad.load_string_list(done_path)
+        self._merge_basis_runs(run_paths)
+
+    def _build_basis_shard(self, shard_idx, n_shards=1, basis_buffer_size=None):
+        """Build the sorted runs of one shard of the generating graphs.
+
+        The generating graphs are regenerated in each process and only every n_shards-th graph starting at shard_idx
+        is considered. The list of run files is stored to the shard done file once the shard is complete.
+
+        :param shard_idx: Index of the shard.
+        :type shard_idx: int
+        :param n_shards: Number of shards (Default: 1).
+        :type n_shards: int
+        :param basis_buffer_size: Maximal number of graph6 strings held in memory (Default: None).
+        :type basis_buffer_size: int
+        """
+        generating_list = itertools.islice(self.get_generating_graphs(), shard_idx, None, n_shards)
+        run_paths = self._build_basis_runs(generating_list, basis_buffer_size,
+                                           run_prefix='shard%dof%d_run' % (shard_idx, n_shards))
+        StoreLoad.store_string_list(run_paths, self._get_basis_shard_done_path(shard_idx, n_shards))
+
+    def _get_basis_shard_done_path(self, shard_idx, n_shards):
+        return os.path.join(self.get_basis_run_dir(), 'shard%dof%d.done' % (shard_idx, n_shards))
+
+    def get_basis_run_dir(self):
+        """Return the directory for the sorted runs of a streaming basis build.
+
+        :return: Path to the directory of the sorted runs.
+        :rtype: path
+        """
+        return self.get_basis_file_path() + '_runs'
+
+    def _store_basis_run(self, basis_set, run_prefix, run_idx):
+        """Store a sorted run of graph6 strings for a streaming basis build.
+
+        :param basis_set: Graph6 strings of the run.
+        :type basis_set: set(str)
+        :param run_prefix: Prefix of the run file name.
+        :type run_prefix: str
+        :param run_idx: Index of the run.
+        :type run_idx: int
+        :return: Path to the run file.
+        :rtype: path
+        """
+        run_path = os.path.join(self.get_basis_run_dir(), '%s%d.g6' % (run_prefix, run_idx))
+        StoreLoad.store_string_list(sorted(basis_set), run_path)
+        return run_path
+
     def _has_odd_automorphisms(self, G, autom_list):
         """Return whether the graph G has odd automorphisms.
 
         :param G: Test whether G has odd automoerphisms.
         :type G: Graph
-        :param autom_list: List of generators of the automorphisms group of graph G.
-        :type autom_list: list(group generators)
+        :param autom_list: List of generators of the automorphisms group of graph G, either as group elements or as
+            lists of images.
+        :type autom_list: list(group generators) or list(list(int))
         :return: True if G has odd automorphisms.
         :rtype: bool
         """
         for p in autom_list:
-            pd = p.dict()
-            pp = [pd[j] for j in range(G.order())]
+            if isinstance(p, list):
+                pp = p
+            else:
+                pd = p.dict()
+                pp = [pd[j] for j in range(G.order())]
             if self.perm_sign(G, pp) == -1:
                 return True
         return False
@@ -428,9 +594,9 @@ class GraphVectorSpace(VectorSpace):
         """
         if not self.is_valid():
             return 0
+        path = self.get_basis_file_path()
         try:
-            header = StoreLoad.load_line(self.get_basis_file_path())
-            return int(header)
+            return Shared.file_cache.load(path, 'dimension', lambda: int(StoreLoad.load_line(path)))
         except StoreLoad.FileNotFoundError:
             raise StoreLoad.FileNotFoundError(
                 "Dimension unknown for %s: No basis file" % str(self))
@@ -441,19 +607,25 @@ class GraphVectorSpace(VectorSpace):
         The basis file contains a list of graph6 strings for canonically labeled graphs building a basis of the
         vector space.
         The first line of the basis file contains the dimension of the vector space.
+        Cached values of the basis file are invalidated.
 
         :param basis_list: List of graph6 strings representing the vector space basis.
         :type basis_list: list(str)
         """
         basis_list.insert(0, str(len(basis_list)))
         StoreLoad.store_string_list(basis_list, self.get_basis_file_path())
+        Shared.file_cache.invalidate(self.get_basis_file_path())
 
-    def _load_basis_g6(self):
+    def _load_basis_g6(self, shared=False):
         """Load the basis from the basis file.
 
         Raises an exception if no basis file found or if the dimension in the header of the basis file doesn't
         correspond to the dimension of the basis.
 
+        :param shared: Option to return the list cached in Shared.file_cache instead of a copy. It must not be
+            modified (Default: False).
+        :type shared: bool
+
         :return: List of graph6 strings of canonically labeled graphs building a basis of the
             vector space.
         :rtype: list(str)
@@ -463,16 +635,23 @@ class GraphVectorSpace(VectorSpace):
         if not self.exists_basis_file():
             raise StoreLoad.FileNotFoundError(
                 "Cannot load basis, No basis file found for %s: " % str(self))
-        basis_list = StoreLoad.load_string_list(self.get_basis_file_path())
-        dim = int(basis_list.pop(0))
-        if len(basis_list) != dim:
-            raise ValueError("Basis read from file %s has wrong dimension" % str(
-                self.get_basis_file_path()))
-        return basis_list
-
-    def get_basis_g6(self):
+        path = self.get_basis_file_path()
+
+        def load():
+            basis_list = StoreLoad.load_string_list(path)
+            dim = int(basis_list.pop(0))
+            if len(basis_list) != dim:
+                raise ValueError("Basis read from file %s has wrong dimension" % str(path))
+            return basis_list
+
+        return Shared.file_cache.load(path, 'basis', load, copy=None if shared else list)
+
+    def get_basis_g6(self, shared=False):
         """Return the basis of the vector space as list of graph6 strings.
 
+        :param shared: Option to return the list cached in Shared.file_cache instead of a copy. It must not be
+            modified (Default: False).
+        :type shared: bool
         :return: List of graph6 strings representing the basis elements.
         :rtype: list(str)
         """
@@ -480,7 +659,7 @@ class GraphVectorSpace(VectorSpace):
             # Return empty list if graph vector space is not valid.
             logger.warning("Empty basis: %s is not valid" % str(self))
             return []
-        return self._load_basis_g6()
+        return self._load_basis_g6(shared=shared)
 
     def get_basis(self):
         """Return the basis of the vector space as list of sage graphs.
@@ -488,7 +667,17 @@ class GraphVectorSpace(VectorSpace):
         :return: List of sage graphs representing the basis elements.
         :rtype: list(Graph)
         """
-        return map(Graph, self.get_basis_g6())
+        return map(Graph, self.get_basis_g6(shared=True))
+
+    def get_basis_compact(self):
+        """Return the basis of the vector space as list of compact graphs.
+
+        The basis file is decoded in bulk without constructing sage graphs.
+
+        :return: List of compact graphs representing the basis elements.
+        :rtype: list(CompactGraph.CompactGraph)
+        """
+        return Graph6.decode_compact_graphs(self.get_basis_g6(shared=True))
 
     def get_g6_coordinates_dict(self):
         """Return a dictionary to translate from the graph6 string of graphs in the basis to their index in the basis.
@@ -496,7 +685,93 @@ class GraphVectorSpace(VectorSpace):
         :return: Dictionary to translate from graph6 string to the coordinate of a basis element.
         :rtype: dict(str -> int)
         """
-        return {G6: i for (i, G6) in enumerate(self.get_basis_g6())}
+        return {G6: i for (i, G6) in enumerate(self.get_basis_g6(shared=True))}
+
+    def get_basis_index_file_path(self):
+        """Return the path to the basis index file.
+
+        :return: Path to the basis index file.
+        :rtype: path
+        """
+        return os.path.splitext(self.get_basis_file_path())[0] + '.idx'
+
+    def get_basis_lookup(self):
+        """Return a lookup to translate from the graph6 string of graphs in the basis to their index in the basis.
+
+        For bases with at least Parameters.basis_index_min_dimension elements the lookup is a
+        BasisIndex.BasisIndex, i.e. a memory mapped index file, which is built from the basis file if missing or
+        outdated, and which is shared read-only between processes. Smaller bases are looked up in a dictionary.
+        The lookup is memoized as long as the basis file is unchanged.
+
+        :return: Lookup with the methods get, __getitem__ and __contains__ of a dictionary.
+        :rtype: BasisIndex.BasisIndex or dict(str -> int)
+        :raise StoreLoad.FileNotFoundError: Raised if no basis file found.
+        """
+        if not self.is_valid():
+            return {}
+        if not self.exists_basis_file():
+            raise StoreLoad.FileNotFoundError(
+                "Cannot load basis, No basis file found for %s: " % str(self))
+        stat = os.stat(self.get_basis_file_path())
+        key = (stat.st_size, stat.st_mtime_ns)
+        memo = self.__dict__.get('_basis_lookup')
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        if self.get_dimension() < Parameters.basis_index_min_dimension:
+            lookup = self.get_g6_coordinates_dict()
+        else:
+            index_path = self.get_basis_index_file_path()
+            if not BasisIndex.BasisIndex.is_up_to_date(index_path, self.get_basis_file_path()):
+                BasisIndex.BasisIndex.build(self.get_basis_g6(shared=True), index_path, self.get_basis_file_path())
+            lookup = BasisIndex.BasisIndex(index_path)
+        self._basis_lookup = (key, lookup)
+        return lookup
+
+    def __getstate__(self):
+        # Do not pickle a memoized lookup dictionary, e.g. when sending the vector space to a parallel process.
+        state = self.__dict__.copy()
+        state.pop('_basis_lookup', None)
+        state.pop('_canon_cache', None)
+        return state
+
+    def graph_to_canon_g6_cached(self, graph):
+        """Return the graph6 string of the canonically labeled graph and the corresponding permutation sign, using a
+        cache.
+
+        The result of graph_to_canon_g6 is cached in a bounded LRU cache of Parameters.canon_cache_size entries, keyed
+        by the graph6 string of the (not canonically labeled) graph and the partition of the vertices. Hence graphs
+        occurring repeatedly, e.g. as images of different basis elements under an operator, are canonically labeled
+        only once. Graphs with loops or multiple edges are not cached. If Parameters.canon_cache_size is None, no
+        cache is used.
+
+        :param graph: Graph to be canonically labeled.
+        :type graph: Graph
+        :return: Tuple containing the graph6 string of the canonically labeled graph and the
+            corresponding permutation sign.
+        :rtype: tuple(str, int)
+        """
+        if Parameters.canon_cache_size is None or graph.has_loops() or graph.has_multiple_edges():
+            return self.graph_to_canon_g6(graph)
+        cache = self.__dict__.get('_canon_cache')
+        if cache is None:
+            cache = self._canon_cache = Shared.LRUCache(Parameters.canon_cache_size)
+        partition = self.get_partition()
+        key = (graph.graph6_string(), None if partition is None else tuple(tuple(cell) for cell in partition))
+        value = cache.get(key)
+        if value is None:
+            value = self.graph_to_canon_g6(graph)
+            cache.put(key, value)
+        return value
+
+    def get_canon_cache_info(self):
+        """Return the statistics of the cache used by graph_to_canon_g6_cached.
+
+        :return: Dictionary with the number of hits, misses, the current size and the maximal size of the cache, or
+            None if no cache has been used.
+        :rtype: dict(str -> int)
+        """
+        cache = self.__dict__.get('_canon_cache')
+        return None if cache is None else cache.info()
 
     def graph_list_to_vector(self, v):
         """Converts a list (or iterable) of pairs (G, x) of graphs and coefficients into a vector (list) in the basis of the vector space.
@@ -505,19 +780,23 @@ class GraphVectorSpace(VectorSpace):
         :type v: iterable
         """
         # write graphs in our basis (as dense vector)
-        bd = self.get_g6_coordinates_dict()
+        bd = self.get_basis_lookup()
         vec = [0]*self.get_dimension()
         for (G, x) in v:
             g6, y = self.graph_to_canon_g6(G)
-            if g6 in self.get_g6_coordinates_dict():
-                vec[bd[g6]] += x*y
+            j = bd.get(g6)
+            if j is not None:
+                vec[j] += x*y
         return vec
         
 
     def delete_basis_file(self):
-        """Delete the basis file."""
+        """Delete the basis file and the basis index file."""
         if os.path.isfile(self.get_basis_file_path()):
             os.remove(self.get_basis_file_path())
+        if os.path.isfile(self.get_basis_index_file_path()):
+            os.remove(self.get_basis_index_file_path())
+        Shared.file_cache.invalidate(self.get_basis_file_path())
 
     def update_properties(self):
         """Update the graph vector space properties validity and dimension.
@@ -764,7 +1043,8 @@ class SumVectorSpace(VectorSpace):
                 (Default: False).
         :type ignore_existing_files: bool
         :param n_jobs: Option to compute the basis of the different sub vector spaces in parallel using
-                n_jobs parallel processes (Default: 1).
+                n_jobs parallel processes (Default: 1). If Parameters.shard_basis_build is True the sub vector spaces
+                are built one after the other and the generating graphs of each are sharded over n_jobs processes.
         :type n_jobs: int
         :param progress_bar: Option to show a progress bar (Default: False). Only active if the basis of
                 different sub vector spaces ar not built in parallel.
@@ -784,15 +1064,24 @@ class SumVectorSpace(VectorSpace):
         if info_tracker:
             self.start_tracker()
         self.sort()
-        Parallel.parallel(self._build_single_basis, self.vs_list, n_jobs=n_jobs, progress_bar=progress_bar,
-                          ignore_existing_files=ignore_existing_files, info_tracker=info_tracker)
+        if Parameters.shard_basis_build and n_jobs > 1:
+            # Build one sub vector space after the other, each sharded over n_jobs processes.
+            for vs in self.vs_list:
+                self._build_single_basis(vs, ignore_existing_files=ignore_existing_files, n_jobs=n_jobs)
+        else:
+            Parallel.parallel(self._build_single_basis, self.vs_list, n_jobs=n_jobs, progress_bar=progress_bar,
+                              ignore_existing_files=ignore_existing_files, info_tracker=info_tracker)
         if info_tracker:
             self.stop_tracker()
 
-    def _build_single_basis(self, vs, progress_bar=False, ignore_existing_files=True, info_tracker=False):
+    def _build_single_basis(self, vs, progress_bar=False, ignore_existing_files=True, info_tracker=False, n_jobs=1):
         # print("build single basis ", str(self))
-        vs.build_basis(progress_bar=progress_bar,
-                       ignore_existing_files=ignore_existing_files, info_tracker=info_tracker)
+        if n_jobs > 1:
+            vs.build_basis(progress_bar=progress_bar,
+                           ignore_existing_files=ignore_existing_files, info_tracker=info_tracker, n_jobs=n_jobs)
+        else:
+            vs.build_basis(progress_bar=progress_bar,
+                           ignore_existing_files=ignore_existing_files, info_tracker=info_tracker)
         if info_tracker:
             self.update_tracker(vs)
 
@@ -871,9 +1160,11 @@ class SumVectorSpace(VectorSpace):
         s = ' '.join(sarr)
         DisplayInfo.display_html_body("<table>"+s+"</table>")
 
-    def get_basis_g6(self):
+    def get_basis_g6(self, shared=False):
         """Return the basis of the vector space as list of graph6 strings.
 
+        :param shared: Unused, the returned list is always new (Default: False).
+        :type shared: bool
         :return: List of graph6 strings representing the basis elements.
         :rtype: list(str)
         """
@@ -881,7 +1172,7 @@ class SumVectorSpace(VectorSpace):
         #     # Return empty list if graph vector space is not valid.
         #     logger.warning("Empty basis: %s is not valid" % str(self))
         #     return []
-        L = [s for vs in self.vs_list for s in vs.get_basis_g6()]
+        L = [s for vs in self.vs_list for s in vs.get_basis_g6(shared=True)]
         # L.sort() # no sorting here
         return L
 
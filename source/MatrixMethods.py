@@ -3,6 +3,24 @@
 from typing import List, Tuple
 import StoreLoad
 import os
+import gzip
+import numpy as np
+import scipy.sparse as sparse
+from scipy.sparse import csgraph
+import ModularRank
+import Log
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+logger = Log.logger.getChild('matrix_methods')
+
+# Magic bytes at the start of a binary matrix file.
+binary_magic = b'GHMATRX1'
+# Compression options for binary matrix files, mapped to the code stored in the header.
+binary_compressions = {None: 0, 'gzip': 1, 'zstd': 2}
 
 def matrix_stats(matrix_file):
     """Gathers and prints general information on the operatormatrix.
@@ -66,61 +84,6 @@ def transpose_lst(lst: List[Tuple[int,int,int]] ):
     matrix_list.sort()
     return matrix_list
 
-def _removerstep(lst: List[Tuple[int,int,int]], m,n, rankbias):
-    print("gathering stats...")
-    rcount = [0 for _ in range(m)]
-    ccount = [0 for _ in range(n)]
-    for (i,j, v) in lst:
-        rcount[i] += 1
-        ccount[j] += 1
-
-    print("evaluating...")
-    zerorows = sum( 1 if j==0 else 0 for j in rcount)
-    zerocols = sum( 1 if j==0 else 0 for j in ccount)
-    onerows = sum( 1 if j==1 else 0 for j in rcount)
-    onecols = sum( 1 if j==1 else 0 for j in ccount)
-
-    print(f"Matrix:    {m} x {n}")
-    print(f"Zero rows: {zerorows}")
-    print(f"Zero cols: {zerocols}")
-    print(f"One rows:  {onerows}")
-    print(f"One cols:  {onecols}")
-
-    print("Simplifying matrix, deleting one cols")
-    delrow = [False for _ in range(m)]
-    delcol = [False for _ in range(n)]
-    newrankbias = rankbias
-    for (i,j, v) in lst:
-        if ccount[j] == 1 and v != 0:
-            if not delrow[i] and not delcol[j]:
-                newrankbias += 1
-            delrow[i] = True
-            delcol[j] = True
-    # remove zero cols
-    for (j,v) in enumerate(ccount):
-        if v ==0:
-            delcol[j] = True
-    for (i,v) in enumerate(rcount):
-        if v ==0:
-            delrow[i] = True
-
-
-    newm = m - sum(1 for b in delrow if b)
-    newn = n - sum(1 for b in delcol if b)
-
-    newrowinds = [i for (i,b) in enumerate(delrow) if not b]
-    newcolinds = [j for (j,b) in enumerate(delcol) if not b]
-
-    # dict from old index to new
-    rowdict = { iold : inew for (inew, iold) in enumerate(newrowinds) }
-    coldict = { iold : inew for (inew, iold) in enumerate(newcolinds) }
-
-    print("creating new matrix...")
-    newlst = [ (rowdict[i],coldict[j],v) for (i,j,v) in lst
-                                if not delrow[i] and not delcol[j] ]
-
-    return (newlst, newm, newn, newrankbias)
-
 def load_sms_file(fname: str) -> Tuple[List[Tuple[int,int,int]] , Tuple[int, int]]:
     """Loads a matric from an sms file.
     Returns a pair of a matrix (list) and the matrix dimensions.
@@ -160,32 +123,425 @@ def save_sms_file(lst, m, n, fname):
 
 
 def precondition(mlst, mm, nn, ensure_m_greater_n = False):
-    """Computes a preconditioned version of the operatormatrix, saving it to
-    (original_matrix_filename)preconditioned_{rankbias}.txt
+    """Computes a preconditioned version of the operatormatrix given as list of entries (i, j, v), see
+    precondition_arrays.
     rankbias is to be added to the rank to obtain the true rank, and is also returned.
     """
-    # print("Loading...: ", str(op))
-    # (lst,(m,n)) = op._load_matrix_list()
-    m,n = (mm, nn)
-    lst = mlst
-    rankbias = 0
-    for i in range(10):
-        print(f"remover step {i}, rankbias {rankbias}...")
-        lst, m, n, rankbias = _removerstep(lst, m, n, rankbias)
+    lst = np.array(mlst, dtype=np.int64).reshape(-1, 3)
+    (rows, cols, values, (m, n), rankbias) = precondition_arrays(lst[:, 0], lst[:, 1], lst[:, 2], (mm, nn))
 
     # transpose to ensure we have fewer columns (-> linbox has better progress report)
-    if ensure_m_greater_n and m< n:
-        lst = transpose_lst(lst)
-        m,n = (n,m)
+    if ensure_m_greater_n and m < n:
+        (rows, cols, m, n) = (cols, rows, n, m)
+    order = np.lexsort((cols, rows))
+    lst = list(zip(rows[order].tolist(), cols[order].tolist(), values[order].tolist()))
+    return (lst, (m, n), rankbias)
+
+def precondition_arrays(rows, cols, values, shape, doubletons=True, duplicates=True, prime=None):
+    """Computes a smaller matrix with the same rank up to a known bias, with vectorized numpy operations.
+
+    The following reductions are applied until the matrix doesn't change anymore:
+        - Removing zero rows and columns.
+        - Singleton columns and rows: The entry is a pivot, its row and column are removed and the rank bias is
+          increased by one.
+        - Doubleton columns and rows with an entry +-1: The other entry is eliminated with the +-1 entry as pivot,
+          afterwards the pivot row and column are removed as for singletons. Only integer row (column) operations
+          with unit pivots are used.
+        - Duplicate rows: Rows equal to another row up to sign are removed.
+    Duplicate entries are summed.
+    Without a prime the rank is preserved over the rationals, but not modulo primes: A singleton pivot divisible by
+    a prime p is counted in the rank bias, although it is zero modulo p. With a prime the entries are reduced modulo
+    the prime to nonzero representatives in (-prime/2, prime/2], such that every pivot is a unit modulo the prime and
+    the rank modulo the prime is preserved instead.
+
+    :param rows: Row indices.
+    :type rows: numpy.ndarray
+    :param cols: Column indices.
+    :type cols: numpy.ndarray
+    :param values: Integer values.
+    :type values: numpy.ndarray
+    :param shape: Matrix shape (m, n).
+    :type shape: tuple(int, int)
+    :param doubletons: Option to eliminate doubleton columns and rows (Default: True).
+    :type doubletons: bool
+    :param duplicates: Option to remove duplicate rows (Default: True).
+    :type duplicates: bool
+    :param prime: Prime for rank computations modulo the prime, None for rank computations over the rationals
+        (Default: None).
+    :type prime: int
+    :return: (rows, cols, values, shape, rankbias) of the preconditioned matrix, where rankbias is to be added to
+        its rank (modulo prime if given) to obtain the rank of the original matrix.
+    :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, tuple(int, int), int)
+    """
+    (m, n) = shape
+    (rows, cols, values) = _sum_entries(np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64),
+                                        np.asarray(values, dtype=np.int64), n, prime)
+    rankbias = 0
+    iteration = 0
+    while True:
+        before = ((m, n), len(values))
+        (rows, cols, values, bias) = _eliminate_singleton_cols(rows, cols, values, n)
+        rankbias += bias
+        (cols, rows, values, bias) = _eliminate_singleton_cols(cols, rows, values, m)
+        rankbias += bias
+        if doubletons:
+            (rows, cols, values, bias) = _eliminate_doubleton_cols(rows, cols, values, m, n, prime)
+            rankbias += bias
+            (cols, rows, values, bias) = _eliminate_doubleton_cols(cols, rows, values, n, m, prime)
+            rankbias += bias
+        if duplicates:
+            (rows, cols, values) = _remove_duplicate_rows(rows, cols, values, n)
+        (rows, cols, values, (m, n)) = _remove_zero_rows_cols(rows, cols, values, prime)
+        iteration += 1
+        logger.debug("Precondition step %d: %d x %d, %d entries, rankbias %d" % (iteration, m, n, len(values),
+                                                                                 rankbias))
+        if ((m, n), len(values)) == before:
+            break
+    return (rows, cols, values, (m, n), rankbias)
+
+def connected_blocks(rows, cols, values, shape):
+    """Splits a matrix into the blocks given by the connected components of its bipartite graph.
+
+    The bipartite graph has the rows and columns as vertices and an edge for each entry. The rank of the matrix is the
+    sum of the ranks of the blocks. Zero rows and columns are dropped.
+    Returns the blocks as list of (rows, cols, values, shape) with renumbered indices, sorted by decreasing number of
+    entries.
+    """
+    (m, n) = shape
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    if len(values) == 0:
+        return []
+    adjacency = sparse.coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols + m)), shape=(m + n, m + n))
+    (n_components, labels) = csgraph.connected_components(adjacency, directed=False)
+    entry_labels = labels[rows]
+    order = np.argsort(entry_labels, kind='stable')
+    bounds = np.flatnonzero(np.diff(entry_labels[order])) + 1
+    blocks = []
+    for block in np.split(order, bounds):
+        (block_row_ids, block_rows) = np.unique(rows[block], return_inverse=True)
+        (block_col_ids, block_cols) = np.unique(cols[block], return_inverse=True)
+        blocks.append((block_rows.astype(np.int64), block_cols.astype(np.int64), values[block],
+                       (len(block_row_ids), len(block_col_ids))))
+    blocks.sort(key=lambda b: len(b[2]), reverse=True)
+    return blocks
+
+# Range of the random primes for random_product_test, small enough that the sparse matrix vector products modulo a
+# prime don't overflow 64 bit integers, and the number of primes in this range.
+verification_prime_range = (2**20, 2**21)
+n_verification_primes = 73586
+
+def random_product_test(products, failure_probability=1e-12, min_trials=1, seed=None):
+    """Tests whether a linear combination of products of sparse matrices vanishes, Freivalds-style.
+
+    The matrices are given as 0-based (rows, cols, values, shape) with the rows indexing the domain and the columns
+    indexing the target of the linear map, as in the matrix files. products is a list of (coefficient, factors), where
+    factors lists the maps in the order of application, i.e. (c, [A1, A2]) stands for c * A2^T * A1^T.
+    Each trial applies the linear combination to a random vector modulo a random prime in verification_prime_range,
+    in time linear in the number of entries. A nonzero result proves that the linear combination doesn't vanish.
+    A vanishing linear combination always passes. A nonvanishing one passes a trial with probability at most
+    1/p + (number of primes dividing an entry) / n_verification_primes, where the entries are bounded by the
+    product of the maximal absolute row sums.
+    Returns (vanishes, number of trials).
+    """
+    if len(products) == 0:
+        return (True, 0)
+    n = products[0][1][0][3][0]
+    bound = 0
+    for (coefficient, factors) in products:
+        factor_bound = abs(coefficient)
+        for (rows, cols, values, (d, t)) in factors:
+            if len(values) > 0:
+                factor_bound *= int(np.bincount(np.asarray(cols, dtype=np.int64),
+                                                weights=np.abs(np.asarray(values, dtype=np.float64)),
+                                                minlength=t).max())
+        bound += factor_bound
+    bad_primes = int(np.log2(bound + 1) / np.log2(verification_prime_range[0])) + 1
+    trial_error = 1 / verification_prime_range[0] + bad_primes / n_verification_primes
+    n_trials = max(min_trials, int(np.ceil(np.log(failure_probability) / np.log(trial_error))))
+    rng = np.random.default_rng(seed)
+    primes = ModularRank.random_primes(n_trials, seed=int(rng.integers(2**31)),
+                                       prime_range=verification_prime_range)
+    for prime in primes:
+        x = rng.integers(0, prime, n, dtype=np.int64)
+        result = None
+        for (coefficient, factors) in products:
+            y = x
+            for (rows, cols, values, (d, t)) in factors:
+                A = sparse.csr_matrix((np.mod(np.asarray(values, dtype=np.int64), prime),
+                                       (np.asarray(cols, dtype=np.int64), np.asarray(rows, dtype=np.int64))),
+                                      shape=(t, d), dtype=np.int64)
+                y = np.mod(A.dot(y), prime)
+            y = np.mod(coefficient * y, prime)
+            result = y if result is None else np.mod(result + y, prime)
+        if np.any(result):
+            return (False, n_trials)
+    return (True, n_trials)
 
-    # save_sms_file(lst, m, n, op.get_matrix_file_path()+f".preconditioned_{rankbias}.txt")
-    return (lst, (m,n), rankbias)
+def _sum_entries(rows, cols, values, n, prime=None):
+    # Sums duplicate entries and removes zeros, the entries are sorted by rows and columns.
+    # If prime is given the sums are reduced modulo prime to representatives in (-prime/2, prime/2].
+    keys = rows * n + cols
+    (keys, inverse) = np.unique(keys, return_inverse=True)
+    sums = np.zeros(len(keys), dtype=np.int64)
+    np.add.at(sums, inverse, values)
+    if prime is not None:
+        sums = np.mod(sums, prime)
+        sums[sums > prime // 2] -= prime
+    nonzero = sums != 0
+    (rows, cols) = np.divmod(keys[nonzero], n) if n > 0 else (keys[nonzero], keys[nonzero])
+    return (rows, cols, sums[nonzero])
+
+def _eliminate_singleton_cols(rows, cols, values, n):
+    # Each column with a single entry gives a pivot, whose row is removed.
+    # Further singleton columns of the same row become zero columns.
+    if len(values) == 0:
+        return (rows, cols, values, 0)
+    single = np.bincount(cols, minlength=n)[cols] == 1
+    pivot_rows = np.unique(rows[single])
+    keep = ~np.isin(rows, pivot_rows)
+    return (rows[keep], cols[keep], values[keep], len(pivot_rows))
+
+def _eliminate_doubleton_cols(rows, cols, values, m, n, prime=None):
+    # Eliminates doubleton columns with an entry +-1, choosing a set of columns with pairwise distinct rows, such
+    # that the eliminations are independent.
+    if len(values) == 0:
+        return (rows, cols, values, 0)
+    double = np.flatnonzero(np.bincount(cols, minlength=n)[cols] == 2)
+    if len(double) == 0:
+        return (rows, cols, values, 0)
+    double = double[np.argsort(cols[double], kind='stable')]
+    (first, second) = (double[0::2], double[1::2])
+    # Use an entry +-1 as pivot.
+    swap = np.abs(values[first]) != 1
+    (pivot, other) = (np.where(swap, second, first), np.where(swap, first, second))
+    unit = np.abs(values[pivot]) == 1
+    (pivot, other) = (pivot[unit], other[unit])
+    used = np.zeros(m, dtype=bool)
+    selected = []
+    for (k, (i1, i2)) in enumerate(zip(rows[pivot].tolist(), rows[other].tolist())):
+        if not used[i1] and not used[i2]:
+            used[i1] = used[i2] = True
+            selected.append(k)
+    (pivot, other) = (pivot[selected], other[selected])
+    # row other -= (b / a) * row pivot, with 1 / a = a for a = +-1.
+    target = np.full(m, -1, dtype=np.int64)
+    target[rows[pivot]] = rows[other]
+    coefficient = np.zeros(m, dtype=np.int64)
+    coefficient[rows[pivot]] = values[other] * values[pivot]
+    moved = target[rows] >= 0
+    new_values = -coefficient[rows[moved]] * values[moved]
+    if len(new_values) > 0 and np.abs(new_values).max() >= 2**31:
+        # Avoid the growth of the entries.
+        return (rows, cols, values, 0)
+    (rows, cols, values) = _sum_entries(np.concatenate((rows[~moved], target[rows[moved]])),
+                                        np.concatenate((cols[~moved], cols[moved])),
+                                        np.concatenate((values[~moved], new_values)), n, prime)
+    return (rows, cols, values, len(selected))
+
+def _remove_duplicate_rows(rows, cols, values, n):
+    # Removes rows which are equal to another row up to sign.
+    if len(values) == 0:
+        return (rows, cols, values)
+    order = np.lexsort((cols, rows))
+    (rows, cols, values) = (rows[order], cols[order], values[order])
+    starts = np.flatnonzero(np.concatenate(([True], rows[1:] != rows[:-1])))
+    lengths = np.diff(np.concatenate((starts, [len(rows)])))
+    sign = np.repeat(np.sign(values[starts]), lengths)
+    normalized = values * sign
+    # Hash the rows, rows with equal hash are compared exactly.
+    with np.errstate(over='ignore'):
+        h = (cols.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) ^ \
+            (normalized.astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F))
+        h ^= h >> np.uint64(29)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+    row_hash = np.add.reduceat(h, starts)
+    order = np.lexsort((lengths, row_hash))
+    duplicate_rows = []
+    k = 0
+    while k < len(order):
+        l = k + 1
+        while l < len(order) and row_hash[order[l]] == row_hash[order[k]] and lengths[order[l]] == lengths[order[k]]:
+            l += 1
+        if l - k > 1:
+            seen = {}
+            for r in order[k:l]:
+                block = slice(starts[r], starts[r] + lengths[r])
+                key = (cols[block].tobytes(), normalized[block].tobytes())
+                if key in seen:
+                    duplicate_rows.append(rows[starts[r]])
+                else:
+                    seen[key] = r
+        k = l
+    if len(duplicate_rows) == 0:
+        return (rows, cols, values)
+    keep = ~np.isin(rows, duplicate_rows)
+    return (rows[keep], cols[keep], values[keep])
+
+def _remove_zero_rows_cols(rows, cols, values, prime=None):
+    # Renumbers the nonzero rows and columns consecutively.
+    (row_ids, rows) = np.unique(rows, return_inverse=True)
+    (col_ids, cols) = np.unique(cols, return_inverse=True)
+    (rows, cols, values) = _sum_entries(rows.astype(np.int64), cols.astype(np.int64), values, len(col_ids), prime)
+    return (rows, cols, values, (len(row_ids), len(col_ids)))
 
 def precondition_file(matrix_file, ensure_m_greater_n = False):
     """preconditions, and saves matrix to (original_matrix_filename)preconditioned_{rankbias}.txt
     returns new filename and rankbias."""
-    lst, (m,n) = load_sms_file(matrix_file)
-    lst2, (m2,n2), rankbias = precondition(lst, m, n, ensure_m_greater_n=ensure_m_greater_n)
+    (rows, cols, values, (m, n)) = load_sms_arrays(matrix_file)
+    (rows, cols, values, (m, n), rankbias) = precondition_arrays(rows, cols, values, (m, n))
+    if ensure_m_greater_n and m < n:
+        order = np.lexsort((rows, cols))
+        (rows, cols, values, m, n) = (cols[order], rows[order], values[order], n, m)
     precond_fname = matrix_file + f".preconditioned_{rankbias}.txt"
-    save_sms_file(lst2, m2, n2, precond_fname)
+    save_sms_arrays(rows, cols, values, (m, n), precond_fname)
     return (precond_fname, rankbias)
+
+
+def load_sms_arrays(fname: str):
+    """Loads a matrix from an sms file into numpy arrays.
+    Returns the 0-based row indices, column indices and values and the matrix dimensions.
+    Much faster than load_sms_file for large matrices, since the file is parsed by numpy.
+    """
+    if not os.path.isfile(fname):
+        raise StoreLoad.FileNotFoundError(
+            "Cannot load matrix, No matrix file found for %s: " % fname)
+    with open(fname, 'r') as f:
+        (d, t, data_type) = f.readline().split(" ")
+        shape = (d, t) = (int(d), int(t))
+        data = np.array(f.read().split(), dtype=np.int64)
+    if len(data) % 3 != 0 or len(data) < 3 or list(data[-3:]) != [0, 0, 0]:
+        raise ValueError("%s: End line missing or matrix not correctly read from file"
+                            % fname)
+    data = data[:-3].reshape(-1, 3)
+    (rows, cols, values) = (data[:, 0] - 1, data[:, 1] - 1, data[:, 2])
+    _check_matrix_indices(rows, cols, shape, fname)
+    return (rows, cols, values, shape)
+
+def _check_matrix_indices(rows, cols, shape, fname):
+    (d, t) = shape
+    if len(rows) == 0:
+        return
+    if rows.min() < 0 or cols.min() < 0:
+        raise ValueError("%s: Invalid matrix index: non-positive index" % fname)
+    if rows.max() >= d or cols.max() >= t:
+        raise ValueError("%s: Invalid matrix index outside matrix size: %d %d"
+                            % (fname, rows.max() + 1, cols.max() + 1))
+
+def _min_int_dtype(max_abs, dtypes):
+    for dtype in dtypes:
+        if max_abs <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise ValueError("Matrix entry %d too large for binary matrix format" % max_abs)
+
+def save_binary_matrix(rows, cols, values, shape, fname, compression=None):
+    """Saves a matrix of the given shape as file fname in the binary matrix format.
+
+    The file starts with the magic bytes and a header of int64 numbers
+    (nrows, ncols, number of entries, index item size, value item size, compression code),
+    followed by the arrays of row indices, column indices and values.
+    Indices are stored as int32 (or int64 if required), values as int8 (or int16, int32, int64 if required).
+    The arrays can optionally be compressed with gzip or zstd, otherwise they can be memory mapped when loading.
+    """
+    if compression not in binary_compressions:
+        raise ValueError("Compression options for binary matrix files: " + str(set(binary_compressions)))
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("zstd compression of binary matrix files requires the zstandard package")
+    (d, t) = shape
+    values = np.asarray(values, dtype=np.int64)
+    index_dtype = _min_int_dtype(max(d, t), [np.int32, np.int64])
+    value_dtype = _min_int_dtype(int(np.abs(values).max()) if len(values) > 0 else 0,
+                                 [np.int8, np.int16, np.int32, np.int64])
+    header = np.array([d, t, len(values), index_dtype.itemsize, value_dtype.itemsize,
+                       binary_compressions[compression]], dtype='<i8')
+    body = [np.asarray(rows).astype('<' + index_dtype.str[1:]), np.asarray(cols).astype('<' + index_dtype.str[1:]),
+            values.astype('<' + value_dtype.str[1:])]
+    with StoreLoad.atomic_open(fname, 'wb') as f:
+        f.write(binary_magic)
+        f.write(header.tobytes())
+        if compression is None:
+            for a in body:
+                f.write(a.tobytes())
+        elif compression == 'gzip':
+            with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=6) as gz:
+                for a in body:
+                    gz.write(a.tobytes())
+        else:
+            with zstandard.ZstdCompressor().stream_writer(f, closefd=False) as zf:
+                for a in body:
+                    zf.write(a.tobytes())
+
+def load_binary_matrix_header(fname: str):
+    """Loads the header of a binary matrix file.
+    Returns the matrix dimensions, the number of entries, the index and value dtypes and the compression.
+    """
+    if not os.path.isfile(fname):
+        raise StoreLoad.FileNotFoundError(
+            "Cannot load matrix, No matrix file found for %s: " % fname)
+    with open(fname, 'rb') as f:
+        magic = f.read(len(binary_magic))
+        header = np.frombuffer(f.read(6 * 8), dtype='<i8')
+    if magic != binary_magic or len(header) != 6:
+        raise ValueError("%s: Not a binary matrix file" % fname)
+    (d, t, nnz, index_size, value_size, compression_code) = map(int, header)
+    compression = {code: c for (c, code) in binary_compressions.items()}[compression_code]
+    index_dtype = np.dtype('<i%d' % index_size)
+    value_dtype = np.dtype('<i%d' % value_size)
+    return ((d, t), nnz, index_dtype, value_dtype, compression)
+
+def load_binary_matrix(fname: str):
+    """Loads a matrix from a binary matrix file.
+    Returns the 0-based row indices, column indices and values as numpy arrays and the matrix dimensions.
+    Uncompressed files are memory mapped, such that the arrays are read lazily from disk.
+    """
+    (shape, nnz, index_dtype, value_dtype, compression) = load_binary_matrix_header(fname)
+    offset = len(binary_magic) + 6 * 8
+    sizes = [nnz * index_dtype.itemsize, nnz * index_dtype.itemsize, nnz * value_dtype.itemsize]
+    dtypes = [index_dtype, index_dtype, value_dtype]
+    if nnz == 0:
+        return tuple(np.zeros(0, dtype=dtype) for dtype in dtypes) + (shape,)
+    if compression is None:
+        if os.path.getsize(fname) != offset + sum(sizes):
+            raise ValueError("%s: Matrix not correctly read from file" % fname)
+        arrays = []
+        for (size, dtype) in zip(sizes, dtypes):
+            arrays.append(np.memmap(fname, dtype=dtype, mode='r', offset=offset, shape=(nnz,)))
+            offset += size
+    else:
+        with open(fname, 'rb') as f:
+            f.seek(offset)
+            if compression == 'gzip':
+                body = gzip.GzipFile(fileobj=f, mode='rb').read()
+            else:
+                if zstandard is None:
+                    raise ImportError("Loading zstd compressed binary matrix files requires the zstandard package")
+                body = zstandard.ZstdDecompressor().stream_reader(f).read()
+        if len(body) != sum(sizes):
+            raise ValueError("%s: Matrix not correctly read from file" % fname)
+        arrays = []
+        start = 0
+        for (size, dtype) in zip(sizes, dtypes):
+            arrays.append(np.frombuffer(body, dtype=dtype, count=nnz, offset=start))
+            start += size
+    (rows, cols, values) = arrays
+    _check_matrix_indices(rows, cols, shape, fname)
+    return (rows, cols, values, shape)
+
+def binary_to_sms_file(binary_fname, sms_fname, data_type="M"):
+    """Exports a binary matrix file to an sms file, e.g. as input for linbox or rheinfall."""
+    (rows, cols, values, shape) = load_binary_matrix(binary_fname)
+    save_sms_arrays(rows, cols, values, shape, sms_fname, data_type=data_type)
+
+def save_sms_arrays(rows, cols, values, shape, sms_fname, data_type="M"):
+    """Saves a matrix given by 0-based numpy index and value arrays as sms file."""
+    (d, t) = shape
+    with StoreLoad.atomic_open(sms_fname, 'w') as f:
+        f.write("%d %d %s\n" % (d, t, data_type))
+        chunk = 1 << 20
+        for start in range(0, len(values), chunk):
+            block = np.column_stack((np.asarray(rows[start:start + chunk], dtype=np.int64) + 1,
+                                     np.asarray(cols[start:start + chunk], dtype=np.int64) + 1,
+                                     np.asarray(values[start:start + chunk], dtype=np.int64)))
+            np.savetxt(f, block, fmt="%d")
+        f.write("0 0 0\n")
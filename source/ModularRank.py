@@ -0,0 +1,260 @@
+"""Native rank computation of sparse matrices over finite fields.
+
+Structured Gaussian elimination over GF(p) on compact integer arrays, requiring no external executable.
+Pivots are chosen with the Markowitz strategy: the pivot column is a column with the fewest nonzero entries and the
+pivot row is the shortest row with a nonzero entry in this column, such that the fill-in stays small.
+Once the remaining active submatrix gets dense, the elimination continues with a vectorized dense elimination.
+The prime has to be smaller than 2**31, such that products of entries fit into 64 bit integers.
+"""
+
+__all__ = ['native_options', 'rank', 'is_prime', 'random_primes', 'multiprime_error_bound']
+
+import heapq
+import math
+import random
+import numpy as np
+from tqdm import tqdm
+import Log
+
+logger = Log.logger.getChild('modular_rank')
+
+# Options for the native rank computation: 'mod' (rank over a finite field), 'multiprime' (maximal rank modulo
+# several random primes), 'certified' (multiprime with a certification of the exact rank over the rationals).
+native_options = {'mod', 'multiprime', 'certified'}
+
+# Range of the random primes for multiprime rank computations and the number of primes in this range.
+multiprime_range = (2**30, 2**31)
+n_primes_in_range = 50697537
+
+# Switch to dense elimination if the density of the active submatrix exceeds dense_density and the active submatrix
+# has at most dense_max_entries entries.
+dense_density = 0.1
+dense_max_entries = 2 * 10**7
+
+
+def rank(rows, cols, values, shape, prime, progress_bar=False, return_pivots=False):
+    """Return the rank of a sparse matrix over the finite field GF(prime).
+
+    :param rows: Row indices of the nonzero entries.
+    :type rows: numpy.ndarray
+    :param cols: Column indices of the nonzero entries.
+    :type cols: numpy.ndarray
+    :param values: Values of the nonzero entries.
+    :type values: numpy.ndarray
+    :param shape: Matrix shape (number of rows, number of columns).
+    :type shape: tuple(int, int)
+    :param prime: Prime number smaller than 2**31.
+    :type prime: int
+    :param progress_bar: Option to show a progress bar (Default: False).
+    :type progress_bar: bool
+    :param return_pivots: Option to return the pivot rows and columns as well (Default: False).
+    :type return_pivots: bool
+    :return: Rank of the matrix modulo prime, or (rank, pivot rows, pivot columns) if return_pivots is True. The
+        submatrix of the pivot rows and columns is nonsingular modulo prime.
+    :rtype: int or tuple(int, list(int), list(int))
+    :raise ValueError: Raised if the prime is too large.
+    """
+    if prime >= 2**31:
+        raise ValueError("Native rank computation requires a prime smaller than 2**31")
+    (row_list, col_rows) = _to_rows(rows, cols, values, shape, prime)
+    col_count = np.array([len(r) for r in col_rows], dtype=np.int64)
+    nnz = sum(len(c) for (c, v) in row_list.values())
+    heap = [(int(col_count[j]), j) for j in range(shape[1]) if col_count[j] > 0]
+    heapq.heapify(heap)
+    n_cols = len(heap)
+    r = 0
+    (pivot_rows, pivot_cols) = ([], [])
+    with tqdm(total=min(len(row_list), n_cols), desc='Native rank', disable=(not progress_bar)) as progress:
+        while heap:
+            n_active = (len(row_list), n_cols)
+            if n_active[0] * n_active[1] <= dense_max_entries and nnz > dense_density * n_active[0] * n_active[1]:
+                logger.info("Switch to dense elimination of %d x %d matrix after %d pivots" % (n_active + (r,)))
+                (dense_rows, dense_cols) = _dense_rank(row_list, prime)
+                r += len(dense_rows)
+                pivot_rows.extend(dense_rows)
+                pivot_cols.extend(dense_cols)
+                break
+            (count, j) = heapq.heappop(heap)
+            if count != col_count[j] or count == 0:
+                # Outdated heap entry or eliminated column.
+                continue
+            pivot = min(col_rows[j], key=lambda i: len(row_list[i][0]))
+            pivot_rows.append(pivot)
+            pivot_cols.append(j)
+            (pcols, pvals) = row_list.pop(pivot)
+            nnz -= len(pcols)
+            for c in pcols:
+                col_rows[c].discard(pivot)
+                col_count[c] -= 1
+                n_cols -= (col_count[c] == 0)
+            pinv = pow(int(pvals[np.searchsorted(pcols, j)]), prime - 2, prime)
+            for i in list(col_rows[j]):
+                (icols, ivals) = row_list[i]
+                f = int(ivals[np.searchsorted(icols, j)]) * pinv % prime
+                (ncols, nvals) = _axpy(icols, ivals, pcols, pvals, prime - f, prime)
+                nnz += len(ncols) - len(icols)
+                for c in np.setdiff1d(icols, ncols, assume_unique=True):
+                    col_rows[c].discard(i)
+                    col_count[c] -= 1
+                    n_cols -= (col_count[c] == 0)
+                for c in np.setdiff1d(ncols, icols, assume_unique=True):
+                    col_rows[c].add(i)
+                    n_cols += (col_count[c] == 0)
+                    col_count[c] += 1
+                if len(ncols) == 0:
+                    del row_list[i]
+                else:
+                    row_list[i] = (ncols, nvals)
+            for c in pcols:
+                if col_count[c] > 0:
+                    heapq.heappush(heap, (int(col_count[c]), int(c)))
+            r += 1
+            progress.update(1)
+            if len(row_list) == 0:
+                break
+    if return_pivots:
+        return (r, pivot_rows, pivot_cols)
+    return r
+
+
+def is_prime(n):
+    """Return whether n is prime, deterministic for n < 3.3 * 10**24."""
+    if n < 2:
+        return False
+    small_primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+    for q in small_primes:
+        if n % q == 0:
+            return n == q
+    (d, s) = (n - 1, 0)
+    while d % 2 == 0:
+        (d, s) = (d // 2, s + 1)
+    for a in small_primes:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def random_primes(n_primes, seed=None, prime_range=multiprime_range):
+    """Return distinct random primes in prime_range.
+
+    :param n_primes: Number of primes.
+    :type n_primes: int
+    :param seed: Seed of the random number generator (Default: None).
+    :type seed: int
+    :param prime_range: Range (min, max) of the primes (Default: multiprime_range).
+    :type prime_range: tuple(int, int)
+    :return: List of primes.
+    :rtype: list(int)
+    """
+    rng = random.Random(seed)
+    primes = set()
+    while len(primes) < n_primes:
+        n = rng.randrange(*prime_range) | 1
+        if is_prime(n):
+            primes.add(n)
+    return sorted(primes)
+
+
+def multiprime_error_bound(rows, values, n_primes):
+    """Return an upper bound for the probability that the maximal rank modulo n_primes random primes from
+    multiprime_range is smaller than the rank over the rationals.
+
+    The rank modulo p is smaller only if p divides a nonzero maximal minor of the matrix, whose absolute value is
+    bounded by the Hadamard bound, i.e. the product of the Euclidean norms of the rows. Hence at most
+    log(Hadamard bound) / log(2**30) primes of the range are bad.
+
+    :param rows: Row indices of the nonzero entries.
+    :type rows: numpy.ndarray
+    :param values: Values of the nonzero entries.
+    :type values: numpy.ndarray
+    :param n_primes: Number of random primes.
+    :type n_primes: int
+    :return: Upper bound for the error probability.
+    :rtype: float
+    """
+    if len(values) == 0:
+        return 0.0
+    squares = np.bincount(np.asarray(rows, dtype=np.int64), weights=np.asarray(values, dtype=np.float64)**2)
+    log2_bound = float(np.sum(np.log2(squares[squares > 1]))) / 2
+    n_bad = math.floor(log2_bound / math.log2(multiprime_range[0]))
+    return min(1.0, n_bad / n_primes_in_range) ** n_primes
+
+
+def _to_rows(rows, cols, values, shape, prime):
+    # Returns the rows as dictionary {row index: (sorted column array, value array)} with nonzero values modulo prime
+    # and the sets of rows with nonzero entries in each column.
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    values = np.mod(np.asarray(values).astype(np.int64), prime)
+    # Sum duplicate entries.
+    keys = rows * shape[1] + cols
+    (keys, inverse) = np.unique(keys, return_inverse=True)
+    sums = np.zeros(len(keys), dtype=np.int64)
+    np.add.at(sums, inverse, values)
+    sums %= prime
+    nonzero = sums != 0
+    (rows, cols) = np.divmod(keys[nonzero], shape[1])
+    sums = sums[nonzero]
+    row_list = {}
+    col_rows = [set() for j in range(shape[1])]
+    # The keys are sorted, hence the entries are sorted by rows and columns.
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(rows)) + 1, [len(rows)]))
+    for (start, stop) in zip(bounds[:-1], bounds[1:]):
+        if start == stop:
+            continue
+        i = int(rows[start])
+        row_list[i] = (cols[start:stop], sums[start:stop])
+        for c in cols[start:stop]:
+            col_rows[c].add(i)
+    return (row_list, col_rows)
+
+
+def _axpy(xcols, xvals, ycols, yvals, f, prime):
+    # Returns x + f * y modulo prime as sorted column and nonzero value arrays.
+    cols = np.concatenate((xcols, ycols))
+    vals = np.concatenate((xvals, yvals * f % prime))
+    order = np.argsort(cols, kind='stable')
+    (cols, vals) = (cols[order], vals[order])
+    (ucols, start) = np.unique(cols, return_index=True)
+    sums = np.add.reduceat(vals, start) % prime
+    nonzero = sums != 0
+    return (ucols[nonzero], sums[nonzero])
+
+
+def _dense_rank(row_list, prime):
+    # Returns the pivot rows and columns of the matrix given by the rows in row_list by dense Gaussian elimination
+    # modulo prime.
+    active_cols = np.unique(np.concatenate([c for (c, v) in row_list.values()]))
+    row_ids = list(row_list.keys())
+    M = np.zeros((len(row_list), len(active_cols)), dtype=np.int64)
+    for (k, (c, v)) in enumerate(row_list.values()):
+        M[k, np.searchsorted(active_cols, c)] = v
+    r = 0
+    (pivot_rows, pivot_cols) = ([], [])
+    (n_rows, n_cols) = M.shape
+    for j in range(n_cols):
+        if r == n_rows:
+            break
+        nonzero = np.flatnonzero(M[r:, j])
+        if len(nonzero) == 0:
+            continue
+        p = r + nonzero[0]
+        if p != r:
+            M[[r, p]] = M[[p, r]]
+            (row_ids[r], row_ids[p]) = (row_ids[p], row_ids[r])
+        pivot_rows.append(row_ids[r])
+        pivot_cols.append(int(active_cols[j]))
+        M[r, j:] = M[r, j:] * pow(int(M[r, j]), prime - 2, prime) % prime
+        below = M[r + 1:, j]
+        rows = np.flatnonzero(below) + r + 1
+        if len(rows) > 0:
+            M[rows, j:] = (M[rows, j:] - np.outer(M[rows, j], M[r, j:]) % prime) % prime
+        r += 1
+    return (pivot_rows, pivot_cols)
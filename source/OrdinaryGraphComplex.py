@@ -12,6 +12,7 @@ import GraphVectorSpace
 import GraphOperator
 import GraphComplex
 import Shared
+import CompactGraph
 import NautyInterface
 import Parameters
 import GCDimensions
@@ -110,12 +111,7 @@ class OrdinaryGVS(GraphVectorSpace.GraphVectorSpace):
             # The sign is (induced sign of the edge permutation)
             # We assume the edges are always lexicographically ordered
             # For the computation we use that G.edges() returns the edges in lex ordering
-            # We first label the edges on a copy of G lexicographically
-            G1 = copy(G)
-            Shared.enumerate_edges(G1)
-            # We permute the graph, and read of the new labels
-            G1.relabel(p, inplace=True)
-            return Shared.Perm([j for (u, v, j) in G1.edges(sort=True)]).signature()
+            return Shared.edge_perm_sign_from_relabelling(G.edges(labels=False, sort=True), p)
 
 
 class OrdinaryGraphSumVS(GraphVectorSpace.SumVectorSpace):
@@ -249,32 +245,46 @@ class ContractEdgesGO(GraphOperator.GraphOperator):
     def get_type(self):
         return 'contract edges'
 
+    element_type = 'edges'
+    compact_graphs = True
+
     def operate_on(self, G):
         # Operates on the graph G by contracting an edge and unifying the adjacent vertices.
         image = []
-        for (i, e) in enumerate(G.edges(labels=False,sort=True)):
-            (u, v) = e
-            # print("contract", u, v)
-            pp = Shared.permute_to_left(
-                (u, v), range(0, self.domain.n_vertices))
-            sgn = self.domain.perm_sign(G, pp)
-            G1 = copy(G)
-            G1.relabel(pp, inplace=True)
+        for e in G.edges(labels=False,sort=True):
+            image.extend(self.operate_on_element(G, e))
+        return image
+
+    def operate_on_element(self, G, e):
+        # Contracts the edge e and unifies the adjacent vertices.
+        (u, v) = e
+        # print("contract", u, v)
+        pp = Shared.permute_to_left(
+            (u, v), range(0, self.domain.n_vertices))
+        sgn = self.domain.perm_sign(G, pp)
+        G1 = copy(G)
+        G1.relabel(pp, inplace=True)
+        if isinstance(G1, CompactGraph.CompactGraph):
+            G1.enumerate_edges()
+            # Merging keeps multiple edges and relabels the vertices to 0, ..., n-2.
+            G1.merge_vertices([0, 1])
+            if G1.has_multiple_edges():
+                return []
+        else:
             Shared.enumerate_edges(G1)
             previous_size = G1.size()
             G1.merge_vertices([0, 1])
             if (previous_size - G1.size()) != 1:
-                continue
+                return []
             # print(sgn)
             G1.relabel(list(range(0, G1.order())), inplace=True)
-            if not self.domain.even_edges:
-                # p = [j for (a, b, j) in G1.edges()]
-                # sgn *= Permutation(p).signature()
-                sgn *= Shared.shifted_edge_perm_sign(G1)
-            else:
-                sgn *= -1  # TODO overall sign for even edges
-            image.append((G1, sgn))
-        return image
+        if not self.domain.even_edges:
+            # p = [j for (a, b, j) in G1.edges()]
+            # sgn *= Permutation(p).signature()
+            sgn *= Shared.shifted_edge_perm_sign(G1)
+        else:
+            sgn *= -1  # TODO overall sign for even edges
+        return [(G1, sgn)]
 
 
 class ContractEdgesD(GraphOperator.Differential):
@@ -393,6 +403,8 @@ class DeleteEdgesGO(GraphOperator.GraphOperator):
     def get_type(self):
         return 'delete edges'
 
+    compact_graphs = True
+
     def operate_on(self, G):
         # Operates on the graph G by deleting an edge.
         image = []
@@ -1,10 +1,418 @@
-"""Provide parallel mapping of a function to an iterable argument.."""
+"""Provide parallel mapping of a function to an iterable argument.
 
+The Executor runs the tasks in worker processes and keeps track of the outcome of each task: results and exceptions
+are collected, failed tasks are retried, tasks exceeding a timeout are stopped and workers which are killed, e.g. by
+the out of memory killer, are detected and replaced. After all tasks are processed a status report is available for
+each task.
+With a memory budget the Executor only starts a task if the predicted peak memory of the running tasks together with
+the new task fits into the budget. The largest pending task fitting into the remaining budget is started first, such
+that small tasks are packed around large ones. A task exceeding the budget on its own is only started once no other
+task is running.
+"""
+
+import time
+import pickle
+import traceback
+import collections
 import multiprocessing as mp
+from multiprocessing import connection
+from tqdm import tqdm
+import Log
+import Parameters
+
+logger = Log.logger.getChild('parallel')
+
+
+class TaskStatus:
+    """Outcome of a task of the Executor.
+
+    Attributes:
+        - index (int): Position of the task in the iterable argument.
+        - arg: Argument of the task.
+        - status (str): 'done', 'failed' (exception), 'killed' (worker exited) or 'timeout'.
+        - result: Return value of the function if the status is 'done', otherwise None.
+        - error (str): Description of the last error or None.
+        - exception (Exception): Exception raised by the last failed attempt, if it could be passed from the worker
+          process, otherwise None.
+        - attempts (int): Number of attempts.
+        - duration (float): Duration of the last attempt in seconds.
+        - memory (int): Predicted peak memory in bytes, if the Executor has a memory budget.
+    """
+
+    def __init__(self, index, arg):
+        self.index = index
+        self.arg = arg
+        self.memory = None
+        self.status = None
+        self.result = None
+        self.error = None
+        self.exception = None
+        self.attempts = 0
+        self.duration = 0.0
+
+    def is_done(self):
+        return self.status == 'done'
+
+    def __str__(self):
+        return '%s: %s after %d attempt(s) (%.1fs)' % (str(self.arg), self.status, self.attempts, self.duration)
+
+
+def _run_task(func, arg, kwargs):
+    # Returns (status, result, error, exception) of func(arg, **kwargs).
+    try:
+        return ('done', func(arg, **kwargs), None, None)
+    except Exception as exception:
+        return ('failed', None, traceback.format_exc(), exception)
+
+
+def _serve(conn, func, kwargs):
+    # Worker loop: receive task indices and arguments, reply (index, status, result, error, exception).
+    # Exit on receiving None.
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        (index, arg) = task
+        (status, result, error, exception) = _run_task(func, arg, kwargs)
+        if exception is not None:
+            try:
+                # Some exceptions can be pickled but not unpickled, which would fail in the executor.
+                pickle.loads(pickle.dumps(exception))
+            except Exception:
+                exception = None
+        try:
+            conn.send((index, status, result, error, exception))
+        except Exception:
+            # The result cannot be pickled.
+            conn.send((index, 'failed', None, traceback.format_exc(), None))
+
+
+class _Worker:
+    # Worker process connected to the executor by a pipe, with at most one task in flight.
+
+    def __init__(self, func, kwargs):
+        (self.conn, child_conn) = mp.Pipe()
+        self.process = mp.Process(target=_serve, args=(child_conn, func, kwargs), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None
+        self.start_time = None
+        self.n_tasks = 0
+
+    def submit(self, task):
+        self.task = task
+        self.start_time = time.time()
+        self.n_tasks += 1
+        self.conn.send((task.index, task.arg))
+
+    def close(self, terminate=False):
+        if not terminate:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class Executor:
+    """Fault tolerant execution of a function on the elements of an iterable argument.
+
+    Attributes:
+        - n_jobs (int): Number of parallel processes. With n_jobs=1 the tasks are executed in the calling process,
+          such that timeouts are not enforced and a killed process can't be detected.
+        - retries (int): Number of times a task is retried after it failed, timed out or its worker was killed.
+        - timeout (float): Time limit for a single attempt of a task in seconds or None.
+        - maxtasksperchild (int): Number of tasks after which a worker process is replaced by a fresh one, to release
+          memory held by the process, or None.
+        - progress_bar (bool): Option to show a progress bar.
+        - callback (function): Function called with the TaskStatus of each finished task or None.
+        - memory_budget (int): Memory budget in bytes for the running tasks or None.
+        - memory_estimate (function): Function returning the predicted peak memory in bytes of a task for its
+          argument. Required for the memory budget.
+        - fail_fast (bool): Option to propagate the exception of a failing task at once if n_jobs=1 and retries=0,
+          instead of continuing with the next task.
+    """
+
+    def __init__(self, n_jobs=1, retries=0, timeout=None, maxtasksperchild=None, progress_bar=False, callback=None,
+                 memory_budget=None, memory_estimate=None, fail_fast=False):
+        """Initialize the executor.
+
+        :param n_jobs: Number of parallel processes (Default: 1).
+        :type n_jobs: int
+        :param retries: Number of retries of failed tasks (Default: 0).
+        :type retries: int
+        :param timeout: Time limit for a single attempt of a task in seconds (Default: None).
+        :type timeout: float
+        :param maxtasksperchild: Number of tasks after which a worker process is replaced (Default: None).
+        :type maxtasksperchild: int
+        :param progress_bar: Option to show a progress bar (Default: False).
+        :type progress_bar: bool
+        :param callback: Function called with the TaskStatus of each finished task (Default: None).
+        :type callback: function object
+        :param memory_budget: Memory budget in bytes for the running tasks (Default: None).
+        :type memory_budget: int
+        :param memory_estimate: Function returning the predicted peak memory in bytes of a task for its argument
+            (Default: None).
+        :type memory_estimate: function object
+        :param fail_fast: Option to propagate the exception of a failing task at once if n_jobs=1 and retries=0
+            (Default: False).
+        :type fail_fast: bool
+        """
+        self.n_jobs = max(1, n_jobs)
+        self.retries = retries
+        self.timeout = timeout
+        self.maxtasksperchild = maxtasksperchild
+        self.progress_bar = progress_bar
+        self.callback = callback
+        self.memory_budget = memory_budget if memory_estimate is not None else None
+        self.memory_estimate = memory_estimate
+        self.fail_fast = fail_fast
+
+    def map(self, func, iter_arg, **kwargs):
+        """Execute the function func on the elements of iter_arg.
+
+        :param func: Function to be mapped on the iterable argument.
+        :type func: function object
+        :param iter_arg: Iterable argument.
+        :type iter_arg: iterable
+        :param kwargs: Keyword arguments to be passed forward to the function.
+        :return: Status of the tasks in the order of iter_arg.
+        :rtype: list(TaskStatus)
+        """
+        tasks = [TaskStatus(index, arg) for (index, arg) in enumerate(iter_arg)]
+        with tqdm(total=len(tasks), disable=(not self.progress_bar)) as progress:
+            for task in self.imap(func, tasks, **kwargs):
+                progress.update(1)
+                progress.set_postfix(failed=sum(1 for t in tasks if t.status not in {None, 'done'}))
+        return tasks
+
+    def imap(self, func, tasks, **kwargs):
+        """Execute the function func on the arguments of the tasks and yield the tasks as they are finished.
 
+        If tasks is a deque, the caller may append new tasks to it while iterating, e.g. tasks whose dependencies are
+        satisfied by a finished task.
 
-def parallel(func, iter_arg, n_jobs=1, **kwargs):
+        :param func: Function to be mapped on the arguments.
+        :type func: function object
+        :param tasks: Tasks to be executed.
+        :type tasks: list(TaskStatus) or collections.deque(TaskStatus)
+        :param kwargs: Keyword arguments to be passed forward to the function.
+        :return: Generator of the finished tasks, including finally failed tasks.
+        :rtype: generator(TaskStatus)
+        """
+        if self.n_jobs == 1:
+            generator = self._imap_sequential(func, tasks, kwargs)
+        else:
+            generator = self._imap_parallel(func, tasks, kwargs)
+        for task in generator:
+            if self.callback is not None:
+                self.callback(task)
+            yield task
+
+    def _imap_sequential(self, func, tasks, kwargs):
+        queue = tasks if isinstance(tasks, collections.deque) else collections.deque(tasks)
+        while queue:
+            task = queue.popleft()
+            if self.fail_fast and self.retries == 0:
+                # Execute the task directly, such that an exception propagates with its original traceback.
+                task.attempts += 1
+                start_time = time.time()
+                (task.status, task.result) = ('done', func(task.arg, **kwargs))
+                task.duration = time.time() - start_time
+                yield task
+                continue
+            while True:
+                task.attempts += 1
+                start_time = time.time()
+                (task.status, task.result, task.error, task.exception) = _run_task(func, task.arg, kwargs)
+                task.duration = time.time() - start_time
+                if task.is_done() or task.attempts > self.retries:
+                    break
+                logger.warning("Retry task %s: %s" % (str(task.arg), task.error))
+            yield task
+
+    def _imap_parallel(self, func, tasks, kwargs):
+        pending = tasks if isinstance(tasks, collections.deque) else collections.deque(tasks)
+        workers = []
+        idle = []
+        busy = {}
+        try:
+            while pending or busy:
+                while pending and (idle or len(workers) < self.n_jobs):
+                    task = self._admit_task(pending, busy)
+                    if task is None:
+                        break
+                    if not idle:
+                        # Workers are started on demand.
+                        workers.append(_Worker(func, kwargs))
+                        idle.append(workers[-1])
+                    worker = idle.pop()
+                    worker.submit(task)
+                    busy[worker.conn] = worker
+                wait_timeout = None
+                if self.timeout is not None:
+                    now = time.time()
+                    wait_timeout = max(0.0, min(worker.start_time + self.timeout - now for worker in busy.values()))
+                sentinels = {worker.process.sentinel: worker for worker in busy.values()}
+                ready = connection.wait(list(busy.keys()) + list(sentinels.keys()), timeout=wait_timeout)
+                finished = []
+                for obj in ready:
+                    worker = busy.get(obj) or sentinels.get(obj)
+                    if worker.conn not in busy or worker in [w for (w, _) in finished]:
+                        continue
+                    result = None
+                    if worker.conn.poll():
+                        try:
+                            result = worker.conn.recv()
+                        except EOFError:
+                            pass
+                    if result is not None:
+                        (index, status, value, error, exception) = result
+                        finished.append((worker, (status, value, error, exception)))
+                    elif not worker.process.is_alive():
+                        error = "Worker process exited with code %s" % worker.process.exitcode
+                        finished.append((worker, ('killed', None, error, None)))
+                if self.timeout is not None:
+                    now = time.time()
+                    for worker in busy.values():
+                        if now - worker.start_time > self.timeout and worker not in [w for (w, _) in finished]:
+                            finished.append((worker, ('timeout', None, "Timeout after %.1fs" % self.timeout, None)))
+                for (worker, (status, value, error, exception)) in finished:
+                    del busy[worker.conn]
+                    task = worker.task
+                    task.attempts += 1
+                    task.duration = time.time() - worker.start_time
+                    (task.status, task.result, task.error, task.exception) = (status, value, error, exception)
+                    worker.task = None
+                    if status in {'killed', 'timeout'} or (self.maxtasksperchild is not None and
+                                                           worker.n_tasks >= self.maxtasksperchild):
+                        # Stop killed and stuck workers as well as workers which executed maxtasksperchild tasks.
+                        # New workers are started on demand.
+                        worker.close(terminate=(status != 'done' and status != 'failed'))
+                        workers.remove(worker)
+                    else:
+                        idle.append(worker)
+                    if not task.is_done() and task.attempts <= self.retries:
+                        logger.warning("Retry task %s: %s" % (str(task.arg), task.error))
+                        pending.append(task)
+                        continue
+                    yield task
+        finally:
+            for worker in workers:
+                worker.close(terminate=(worker.task is not None))
+
+    def _admit_task(self, pending, busy):
+        # Removes and returns the next task to be started, or returns None if no pending task fits into the memory
+        # budget.
+        if self.memory_budget is None:
+            return pending.popleft()
+        for task in pending:
+            if task.memory is None:
+                task.memory = self.memory_estimate(task.arg)
+        available = self.memory_budget - sum(worker.task.memory for worker in busy.values())
+        fitting = [task for task in pending if task.memory <= available]
+        if fitting:
+            task = max(fitting, key=lambda t: t.memory)
+        elif not busy:
+            task = pending[0]
+            logger.warning("Task %s exceeds the memory budget: %.2f GB predicted" % (str(task.arg), task.memory / 2**30))
+        else:
+            return None
+        pending.remove(task)
+        return task
+
+    @staticmethod
+    def report(tasks):
+        """Return a status report of the tasks.
+
+        :param tasks: Tasks returned by Executor.map.
+        :type tasks: list(TaskStatus)
+        :return: Report with the number of tasks per status and a line for each task which is not done.
+        :rtype: str
+        """
+        counts = {}
+        for task in tasks:
+            counts[task.status] = counts.get(task.status, 0) + 1
+        lines = ['%d tasks: ' % len(tasks) + ', '.join('%d %s' % (n, status) for (status, n) in sorted(counts.items()))]
+        for task in tasks:
+            if not task.is_done():
+                lines.append(str(task))
+                lines.append(str(task.error).rstrip())
+        return '\n'.join(lines)
+
+
+def get_executor(n_jobs, progress_bar=False, memory_estimate=None, fail_fast=False):
+    """Return an executor configured with the parameters of the module Parameters.
+
+    :param n_jobs: Number of parallel processes.
+    :type n_jobs: int
+    :param progress_bar: Option to show a progress bar (Default: False).
+    :type progress_bar: bool
+    :param memory_estimate: Function returning the predicted peak memory in bytes of a task for its argument, used
+        with the memory budget Parameters.memory_budget (Default: None).
+    :type memory_estimate: function object
+    :param fail_fast: Option to propagate the exception of a failing task at once if n_jobs=1 and there are no
+        retries (Default: False).
+    :type fail_fast: bool
+    :return: Executor.
+    :rtype: Executor
+    """
+    return Executor(n_jobs=n_jobs, retries=Parameters.task_retries, timeout=Parameters.task_timeout,
+                    maxtasksperchild=Parameters.max_tasks_per_child, progress_bar=progress_bar,
+                    memory_budget=Parameters.memory_budget, memory_estimate=memory_estimate, fail_fast=fail_fast)
+
+
+def _check_tasks(func, tasks):
+    # Logs the status report and raises an error if a task is not done: the original exception of the first failed
+    # task if available, otherwise a RuntimeError with the status report.
+    failed = [task for task in tasks if not task.is_done()]
+    if failed:
+        report = Executor.report(tasks)
+        logger.error("Parallel execution of %s:\n%s" % (getattr(func, '__name__', str(func)), report))
+        for task in failed:
+            if task.exception is not None:
+                raise task.exception
+        raise RuntimeError("%d of %d tasks of %s did not finish:\n%s"
+                           % (len(failed), len(tasks), getattr(func, '__name__', str(func)), report))
+
+
+def parallel(func, iter_arg, n_jobs=1, memory_estimate=None, **kwargs):
     """Map the function func on the iterable iter_arg and executes it using n_jobs parallel processes.
+
+    The tasks are executed by an Executor configured with Parameters.task_retries, Parameters.task_timeout,
+    Parameters.max_tasks_per_child and Parameters.memory_budget. With n_jobs=1 and no retries the tasks are executed
+    in the calling process and the exception of a failing task propagates at once. Otherwise all tasks are executed,
+    even if some of them fail, and the exception of the first failed task is raised at the end.
+
+    :param func: Function to be mapped on the iterable argument.
+    :type func: function object
+    :param iter_arg: Iterable argument.
+    :type iter_arg: iterable
+    :param n_jobs: Number of parallel processes.
+    :type n_jobs: int
+    :param memory_estimate: Function returning the predicted peak memory in bytes of a task for its argument
+        (Default: None).
+    :type memory_estimate: function object
+    :param kwargs: Keyword arguments to be passed forward to the function.
+    :return: Status of the tasks in the order of iter_arg.
+    :rtype: list(TaskStatus)
+    :raise RuntimeError: Raised with the status report if a task was killed, timed out or its exception could not
+        be passed from the worker process.
+    """
+    tasks = get_executor(n_jobs, memory_estimate=memory_estimate, fail_fast=True).map(func, iter_arg, **kwargs)
+    _check_tasks(func, tasks)
+    return tasks
+
+
+def parallel_map(func, iter_arg, n_jobs=1, **kwargs):
+    """Map the function func on the iterable iter_arg using n_jobs parallel processes and return the results.
     :param func: Function to be mapped on the iterable argument.
     :type func: function object
     :param iter_arg: Iterable argument.
@@ -12,13 +420,11 @@ def parallel(func, iter_arg, n_jobs=1, **kwargs):
     :param n_jobs: Number of parallel processes.
     :type n_jobs: int
     :param kwargs: Keyword arguments to be passed forward to the function.
+    :return: List of the results in the order of iter_arg.
+    :rtype: list
+    :raise RuntimeError: Raised with the status report if a task was killed, timed out or its exception could not
+        be passed from the worker process.
     """
-    if n_jobs == 1:
-        for x in iter_arg:
-            func(x, **kwargs)
-
-    else:
-        pool = mp.Pool(n_jobs)
-        [pool.apply_async(func, args=(x, ), kwds=kwargs) for x in iter_arg]
-        pool.close()
-        pool.join()
+    tasks = get_executor(n_jobs, fail_fast=True).map(func, iter_arg, **kwargs)
+    _check_tasks(func, tasks)
+    return [task.result for task in tasks]
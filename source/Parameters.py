@@ -19,14 +19,95 @@ square_zero_test_eps = 1e-6
 commute_test_eps = 1e-6
 
 # ---- Graph canonization algorithm ----
-# None, bliss or sage... if changed, all computations have to be repeated
+# None, sage or nauty (requires pynauty), see CanonicalLabelling... if changed, all computations have to be
+# repeated
 canonical_label_algorithm = 'sage'
 
+# ---- Basis Construction ----
+# Maximal number of canonical graph6 strings held in memory while building a basis. If None the basis is built in
+# memory, otherwise sorted runs are spilled to disk and merged into the basis file.
+basis_buffer_size = None
+# Number of generating graphs after which a checkpoint of the basis construction is stored. If None no checkpoints
+# are stored.
+basis_checkpoint_graphs = None
+# Option to parallelize the basis construction within a vector space by sharding its generating graphs over the
+# parallel processes instead of building the bases of different vector spaces in parallel.
+shard_basis_build = False
+# Minimal dimension of a basis for which graph6 strings are looked up in a memory mapped index file instead of a
+# dictionary, e.g. when building operator matrices.
+basis_index_min_dimension = 10**6
+
+# ---- Matrix Construction ----
+# Option to parallelize the construction of an operator matrix by building row blocks of the matrix in the parallel
+# processes instead of building different operator matrices in parallel.
+shard_matrix_build = False
+# Number of domain basis elements (matrix rows) after which a checkpoint of the matrix construction is stored. If None
+# no checkpoints are stored.
+matrix_checkpoint_rows = None
+# Option to build the matrices of graph operators acting on single edges or vertices by operating only on one edge or
+# vertex per automorphism orbit of a basis element. This requires the automorphism group of each basis element, hence
+# it is off by default.
+operator_orbit_reduction = False
+# Option to apply operators supporting it (compact_graphs = True) to CompactGraph.CompactGraph instances instead of
+# Sage graphs. If None, compact graphs are only used with the canonical labelling backend 'nauty', which labels them
+# directly, while the other backends convert them back to Sage graphs.
+use_compact_graphs = None
+# Maximal number of canonical forms of operator images cached per target vector space while building operator
+# matrices. If None no cache is used.
+canon_cache_size = None
+# Format to store operator matrices: 'sms' (text, as required by linbox and rheinfall) or 'binary' (row, column and
+# value arrays, loaded with numpy). Binary matrices are exported to the SMS format when needed for rank computations.
+matrix_storage_format = 'sms'
+# Compression of binary matrix files: None, 'gzip' or 'zstd' (requires the zstandard package). Only uncompressed
+# files are memory mapped when loaded.
+matrix_compression = None
+
 # ---- Rank Computation ----
 prime = 32189   # Prime number to be used in rank computations.
 # Use sage to determine the matrix rank over the integers or over a finite field
 sage_rank_options = {'integer', 'mod'}
 # (modulo a prime number).
+# Option to show a progress bar for native rank computations (module ModularRank).
+native_rank_progress = False
+# Option to precondition operator matrices (MatrixMethods.precondition_arrays) before computing their ranks with
+# sage or the native rank computation. The linbox option 'modprecond' always preconditions.
+precondition_rank = False
+# Option to compute matrix ranks (with sage or the native rank computation) as sum of the ranks of the connected
+# components of the matrix.
+rank_block_decomposition = False
+# Option to compute the ranks of an operator collection one after the other, each with the blocks of the matrix
+# distributed over the parallel processes, instead of computing the ranks of different matrices in parallel.
+shard_rank_computation = False
+# Number of random primes for multiprime rank computations (native options 'multiprime' and 'certified').
+multiprime_count = 4
+# Maximal size of the pivot minor for the certification of multiprime ranks over the rationals (native option
+# 'certified'). The certification solves sparse rational systems whose solutions grow quadratically with this size.
+certify_max_rank = 20000
+# Compute the ranks of operator matrix collections with a RankServer with long-lived worker processes.
+rank_server = False
+# Number of retries of failed parallel tasks, time limit in seconds for a parallel task (None for no limit) and number of
+# tasks after which a worker process is replaced (None for no replacement), see Parallel.Executor.
+task_retries = 0
+task_timeout = None
+max_tasks_per_child = None
+# Memory budget in bytes for parallel matrix builds and rank computations (None for no budget) and the parameters of
+# the prediction of the peak memory of a task (see OperatorMatrix.get_memory_estimate): memory of a worker process,
+# bytes per basis element and per matrix entry while building a matrix, expected matrix entries per domain basis
+# element, bytes per matrix entry for the rank computation backends and a factor for the fill-in during elimination.
+memory_budget = None
+process_base_memory = 300 * 2**20
+memory_bytes_per_basis_element = 200
+memory_entries_per_row = 20
+memory_bytes_per_entry = {'build': 150, 'sage': 250, 'native': 150, 'linbox': 64, 'rheinfall': 64}
+memory_fill_factor = 4
+# Square zero and anti-commutativity tests: Probabilistic test with random vectors modulo random primes with the given
+# failure probability and minimal number of trials, or exact matrix products if exact_verification is True.
+exact_verification = False
+verification_failure_probability = 1e-12
+verification_trials = 1
+# Byte budget of the in-process cache of bases, matrices, matrix shapes and ranks loaded from files, see
+# Shared.FileCache. The cache is disabled by default (0).
+file_cache_bytes = 0
 
 # ---- Display Parameters ----
 # x width of the unit squares in the cohomology dimension plots.
@@ -0,0 +1,242 @@
+"""Dependency aware execution of the stages basis -> matrix -> rank -> cohomology.
+
+Instead of running each stage for the whole range of parameters before the next stage starts, a Pipeline builds a
+task graph for one or several graph complexes:
+
+    - basis: Basis of a graph vector space.
+    - matrix: Operator matrix, depending on the bases of its domain and target.
+    - rank: Rank of an operator matrix, depending on the matrix.
+    - cohomology: Cohomology dimension of a vector space with respect to a differential, depending on the basis of
+      the vector space and the ranks of the two operator matrices.
+
+A task is executed as soon as the tasks it depends on are done. The basis, matrix and rank tasks are executed in
+parallel by a Parallel.Executor, subject to the memory budget Parameters.memory_budget, the cheap cohomology tasks in
+the calling process.
+Only the selected stages are part of the task graph, the results of the other stages are expected to exist already.
+If a task fails, the tasks depending on it are skipped and reported.
+"""
+
+__all__ = ['stages', 'PipelineTask', 'Pipeline']
+
+import collections
+from tqdm import tqdm
+import Log
+import Parallel
+import Parameters
+import GraphVectorSpace
+import GraphOperator
+
+logger = Log.logger.getChild('pipeline')
+
+# Stages of the pipeline in the order of their dependencies.
+stages = ['basis', 'matrix', 'rank', 'cohomology']
+
+
+class PipelineTask:
+    """Task of the pipeline.
+
+    Attributes:
+        - stage (str): Stage of the task in stages.
+        - obj: Vector space (basis), operator matrix (matrix, rank) or pair of operator matrices (cohomology).
+        - key (str): Unique description of the task.
+        - dependencies (list(str)): Keys of the tasks which need to be done before this task.
+    """
+
+    def __init__(self, stage, obj, key, dependencies=()):
+        self.stage = stage
+        self.obj = obj
+        self.key = key
+        self.dependencies = list(dependencies)
+
+    def __str__(self):
+        return self.key
+
+
+def _basis_key(vs):
+    return 'basis of %s' % str(vs)
+
+
+def _op_key(stage, op):
+    return '%s of %s' % (stage, str(op))
+
+
+def _leaf_vector_spaces(vs):
+    # Returns the graph vector spaces composing a sum vector space or degree slice.
+    if isinstance(vs, GraphVectorSpace.SumVectorSpace):
+        return [leaf for sub_vs in vs.get_vs_list() for leaf in _leaf_vector_spaces(sub_vs)]
+    return [vs]
+
+
+def _run_task(task, ignore_existing_files=False, sage=None, linbox=None, rheinfall=None, native=None):
+    # Executes a basis, matrix or rank task.
+    if task.stage == 'basis':
+        task.obj.build_basis(ignore_existing_files=ignore_existing_files)
+    elif task.stage == 'matrix':
+        task.obj.build_matrix(ignore_existing_files=ignore_existing_files)
+    elif task.stage == 'rank':
+        task.obj.compute_rank(sage=sage, linbox=linbox, rheinfall=rheinfall, native=native,
+                              ignore_existing_files=ignore_existing_files)
+    else:
+        raise ValueError("Unknown pipeline stage: %s" % task.stage)
+
+
+def _memory_estimate(task, rank_options):
+    # Returns the predicted peak memory of a basis, matrix or rank task in bytes.
+    if task.stage == 'basis':
+        return Parameters.process_base_memory
+    return task.obj.get_memory_estimate(task.stage, **rank_options)
+
+
+class Pipeline:
+    """Task graph of the stages basis -> matrix -> rank -> cohomology for several graph complexes.
+
+    Attributes:
+        - graph_complex_list (list(GraphComplex.GraphComplex)): Graph complexes.
+        - stage_list (list(str)): Selected stages.
+        - tasks (dict(str -> PipelineTask)): Tasks by key, in the order of insertion.
+        - cohomology_dims (dict(str -> int)): Cohomology dimensions computed by the cohomology tasks.
+    """
+
+    def __init__(self, graph_complex_list, stage_list=stages):
+        """Initialize the pipeline and build the task graph.
+
+        :param graph_complex_list: Graph complexes.
+        :type graph_complex_list: list(GraphComplex.GraphComplex)
+        :param stage_list: Stages to be executed (Default: all stages).
+        :type stage_list: list(str)
+        :raise ValueError: Raised if a stage is unknown.
+        """
+        if not set(stage_list) <= set(stages):
+            raise ValueError("Pipeline stages: " + str(stages))
+        self.graph_complex_list = graph_complex_list
+        self.stage_list = list(stage_list)
+        self.tasks = collections.OrderedDict()
+        self.cohomology_dims = {}
+        self._build_task_graph()
+
+    def _add_task(self, stage, obj, key, dependencies=()):
+        if stage in self.stage_list and key not in self.tasks:
+            self.tasks[key] = PipelineTask(stage, obj, key, dependencies)
+
+    def _build_task_graph(self):
+        for graph_complex in self.graph_complex_list:
+            for vs in _leaf_vector_spaces(graph_complex.get_vector_space()):
+                if vs.is_valid():
+                    self._add_task('basis', vs, _basis_key(vs))
+            for op_collection in graph_complex.get_operator_list():
+                for op in op_collection.get_op_list():
+                    if not op.is_valid():
+                        continue
+                    leaves = _leaf_vector_spaces(op.get_domain()) + _leaf_vector_spaces(op.get_target())
+                    self._add_task('matrix', op, _op_key('matrix', op), [_basis_key(vs) for vs in leaves])
+                    self._add_task('rank', op, _op_key('rank', op), [_op_key('matrix', op)])
+                if isinstance(op_collection, GraphOperator.Differential):
+                    for opD in op_collection.get_op_list():
+                        for opDD in op_collection.get_op_list():
+                            if opD is opDD or opD.get_domain() != opDD.get_target():
+                                continue
+                            dependencies = [_basis_key(vs) for vs in _leaf_vector_spaces(opD.get_domain())] + \
+                                [_op_key('rank', op) for op in (opD, opDD) if op.is_valid()]
+                            self._add_task('cohomology', (opD, opDD),
+                                           'cohomology of %s for %s' % (str(opD.get_domain()), str(op_collection)),
+                                           dependencies)
+        # Dependencies on stages which are not selected are assumed to be satisfied.
+        for task in self.tasks.values():
+            task.dependencies = [key for key in task.dependencies if key in self.tasks]
+
+    def run(self, n_jobs=1, ignore_existing_files=False, progress_bar=False, **rank_options):
+        """Execute the tasks, each as soon as the tasks it depends on are done.
+
+        :param n_jobs: Number of parallel processes (Default: 1).
+        :type n_jobs: int
+        :param ignore_existing_files: Option to ignore existing basis, matrix and rank files (Default: False).
+        :type ignore_existing_files: bool
+        :param progress_bar: Option to show a progress bar over all tasks (Default: False).
+        :type progress_bar: bool
+        :param rank_options: Rank computation methods sage, linbox, rheinfall and native, as for
+            OperatorMatrix.compute_rank.
+        :return: Status of the tasks by key. Skipped tasks have the status 'skipped'.
+        :rtype: dict(str -> Parallel.TaskStatus)
+        :raise ValueError: Raised if the rank stage is selected without a rank computation method.
+        """
+        if 'rank' in self.stage_list and all(rank_options.get(method) is None
+                                              for method in ('sage', 'linbox', 'rheinfall', 'native')):
+            raise ValueError("Pipeline: At least one rank computation method needs to be specified.")
+        dependents = {key: [] for key in self.tasks}
+        n_missing = {}
+        for task in self.tasks.values():
+            n_missing[task.key] = len(task.dependencies)
+            for dependency in task.dependencies:
+                dependents[dependency].append(task.key)
+        status = collections.OrderedDict(
+            (key, Parallel.TaskStatus(index, task)) for (index, (key, task)) in enumerate(self.tasks.items()))
+        ready = collections.deque()
+        local = collections.deque()
+
+        def schedule(key):
+            if self.tasks[key].stage == 'cohomology':
+                local.append(key)
+            else:
+                ready.append(status[key])
+
+        def finish(key):
+            # Schedules the dependents of a finished task or skips them if the task is not done.
+            if status[key].is_done():
+                for dependent in dependents[key]:
+                    n_missing[dependent] -= 1
+                    if n_missing[dependent] == 0:
+                        schedule(dependent)
+            else:
+                for dependent in dependents[key]:
+                    if status[dependent].status is None:
+                        status[dependent].status = 'skipped'
+                        status[dependent].error = "Dependency %s %s" % (key, status[key].status)
+                        progress.update(1)
+                        finish(dependent)
+
+        def run_local():
+            while local:
+                key = local.popleft()
+                self._run_cohomology_task(status[key])
+                progress.update(1)
+                finish(key)
+
+        for key in self.tasks:
+            if n_missing[key] == 0:
+                schedule(key)
+        executor = Parallel.get_executor(n_jobs, memory_estimate=lambda task: _memory_estimate(task, rank_options))
+        with tqdm(total=len(self.tasks), desc='Pipeline', disable=(not progress_bar)) as progress:
+            run_local()
+            for task_status in executor.imap(_run_task, ready, ignore_existing_files=ignore_existing_files,
+                                             **rank_options):
+                progress.update(1)
+                if not task_status.is_done():
+                    logger.error("Pipeline task %s: %s" % (task_status.arg.key, task_status.error))
+                finish(task_status.arg.key)
+                run_local()
+            run_local()
+        return status
+
+    def _run_cohomology_task(self, task_status):
+        (opD, opDD) = task_status.arg.obj
+        task_status.attempts += 1
+        try:
+            dim = GraphOperator.Differential.cohomology_dim(opD, opDD)
+        except Exception as error:
+            (task_status.status, task_status.error) = ('failed', str(error))
+            logger.error("Pipeline task %s: %s" % (task_status.arg.key, str(error)))
+            return
+        (task_status.status, task_status.result) = ('done', dim)
+        self.cohomology_dims[task_status.arg.key] = dim
+        logger.info("%s: %s" % (task_status.arg.key, str(dim)))
+
+    @staticmethod
+    def report(status):
+        """Return a status report of the tasks of a pipeline run.
+
+        :param status: Status of the tasks returned by Pipeline.run.
+        :type status: dict(str -> Parallel.TaskStatus)
+        :return: Report with the number of tasks per status and a line for each task which is not done.
+        :rtype: str
+        """
+        return Parallel.Executor.report(list(status.values()))
@@ -0,0 +1,319 @@
+"""Long-lived worker processes for the rank computation of many matrices.
+
+Instead of starting a new process and parsing a text file for each matrix, a RankServer keeps one worker process per
+core alive. The matrices are sent to the workers over pipes in a compact binary format (see encode_matrix) and the
+workers return the ranks as soon as they are computed.
+Workers compute ranks with sage and the native sparse elimination in process. For linbox and rheinfall they still
+call the external executable, writing a single temporary SMS file per matrix, also for linbox with preconditioning.
+A worker that exits unexpectedly is reported with its exit code and replaced by a new worker.
+"""
+
+__all__ = ['rank_methods', 'modular_methods', 'encode_matrix', 'decode_matrix', 'rank_mode', 'array_rank', 'rank_dict',
+           'RankServer']
+
+import os
+import struct
+import tempfile
+import traceback
+import multiprocessing as mp
+from multiprocessing import connection
+import numpy as np
+import Log
+import MatrixMethods
+import ModularRank
+import LinboxInterface
+import RheinfallInterface
+
+logger = Log.logger.getChild('rank_server')
+
+# Rank computation methods of the workers.
+rank_methods = {'sage_integer', 'sage_mod', 'native_mod'} \
+    | {'linbox_' + option for option in LinboxInterface.linbox_options} \
+    | {'rheinfall_' + option for option in RheinfallInterface.rheinfall_options}
+# Rank computation methods modulo the given prime.
+modular_methods = {'sage_mod', 'native_mod', 'linbox_mod', 'linbox_modprecond'}
+
+# Header of the binary matrix format: magic, number of rows, number of columns, number of entries.
+# The header is followed by the row indices (int32), column indices (int32) and values (int64) of the entries.
+_magic = b'SMSB'
+_header = struct.Struct('<4sqqq')
+
+
+def encode_matrix(rows, cols, values, shape):
+    """Encode a sparse matrix in the binary format of the rank server.
+
+    :param rows: Row indices of the nonzero entries.
+    :type rows: numpy.ndarray
+    :param cols: Column indices of the nonzero entries.
+    :type cols: numpy.ndarray
+    :param values: Values of the nonzero entries.
+    :type values: numpy.ndarray
+    :param shape: Matrix shape (number of rows, number of columns).
+    :type shape: tuple(int, int)
+    :return: Binary encoding of the matrix.
+    :rtype: bytes
+    """
+    return b''.join((_header.pack(_magic, shape[0], shape[1], len(values)),
+                     np.asarray(rows, dtype='<i4').tobytes(),
+                     np.asarray(cols, dtype='<i4').tobytes(),
+                     np.asarray(values, dtype='<i8').tobytes()))
+
+
+def decode_matrix(data):
+    """Decode a sparse matrix from the binary format of the rank server.
+
+    :param data: Binary encoding of the matrix.
+    :type data: bytes
+    :return: (rows, cols, values, shape) of the matrix.
+    :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, tuple(int, int))
+    :raise ValueError: Raised if data is not a matrix in the binary format.
+    """
+    (magic, d, t, nnz) = _header.unpack_from(data)
+    if magic != _magic or len(data) != _header.size + 16 * nnz:
+        raise ValueError("Invalid binary matrix data")
+    offset = _header.size
+    rows = np.frombuffer(data, dtype='<i4', count=nnz, offset=offset)
+    cols = np.frombuffer(data, dtype='<i4', count=nnz, offset=offset + 4 * nnz)
+    values = np.frombuffer(data, dtype='<i8', count=nnz, offset=offset + 8 * nnz)
+    return (rows, cols, values, (d, t))
+
+
+def rank_mode(method, prime):
+    """Return the key of a rank computation method in the rank files.
+
+    :param method: Rank computation method in rank_methods.
+    :type method: str
+    :param prime: Prime number for modular rank computations.
+    :type prime: int
+    :return: Rank mode, e.g. 'sage_integer' or 'native_mod_<prime>'.
+    :rtype: str
+    """
+    if method in {'sage_integer', 'linbox_rational'} or method.startswith('rheinfall_'):
+        return method
+    return '%s_%d' % (method, prime)
+
+
+def array_rank(matrix_arrays, method, prime):
+    """Return the rank of a matrix given as numpy arrays.
+
+    :param matrix_arrays: (rows, cols, values, shape) of the matrix.
+    :type matrix_arrays: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, tuple(int, int))
+    :param method: Rank computation method in rank_methods.
+    :type method: str
+    :param prime: Prime number for modular rank computations.
+    :type prime: int
+    :return: Matrix rank.
+    :rtype: int
+    :raise ValueError: Raised if the method is not supported.
+    """
+    (rows, cols, values, (d, t)) = matrix_arrays
+    if method not in rank_methods:
+        raise ValueError("Rank computation methods of the rank server: " + str(rank_methods))
+    if method == 'native_mod':
+        return ModularRank.rank(rows, cols, values, (d, t), prime)
+    if method.startswith('sage_'):
+        from sage.all import matrix, ZZ, GF
+        entries = {}
+        for (i, j, v) in zip(rows.tolist(), cols.tolist(), values.tolist()):
+            entries[(i, j)] = entries.get((i, j), 0) + v
+        ring = ZZ if method == 'sage_integer' else GF(prime)
+        return matrix(ring, d, t, entries, sparse=True).rank()
+    (library, option) = method.split('_', 1)
+    rankbias = 0
+    if option == 'modprecond':
+        # Precondition in memory, such that only the preconditioned matrix is written to disk.
+        (rows, cols, values, (d, t), rankbias) = MatrixMethods.precondition_arrays(
+            rows, cols, values, (d, t), prime=prime)
+        if d < t:
+            (rows, cols, (d, t)) = (cols, rows, (t, d))
+            order = np.lexsort((cols, rows))
+            (rows, cols, values) = (rows[order], cols[order], values[order])
+        option = 'mod'
+    (fd, sms_path) = tempfile.mkstemp(suffix='.sms')
+    os.close(fd)
+    try:
+        MatrixMethods.save_sms_arrays(rows, cols, values, (d, t), sms_path)
+        if library == 'linbox':
+            return LinboxInterface.rank(option, sms_path, prime=prime) + rankbias
+        return RheinfallInterface.rank(option, sms_path)
+    finally:
+        os.remove(sms_path)
+
+
+def rank_dict(matrix_arrays, methods, prime):
+    """Return the ranks of a matrix with several rank computation methods.
+
+    As for OperatorMatrix._compute_rank, the exact rank over the integers is computed with sage if rheinfall
+    returns the rank 0 for a nonzero matrix.
+
+    :param matrix_arrays: (rows, cols, values, shape) of the matrix.
+    :type matrix_arrays: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, tuple(int, int))
+    :param methods: Rank computation methods in rank_methods.
+    :type methods: list(str)
+    :param prime: Prime number for modular rank computations.
+    :type prime: int
+    :return: Dictionary rank mode -> rank.
+    :rtype: dict(str -> int)
+    """
+    ranks = {}
+    for method in methods:
+        r = array_rank(matrix_arrays, method, prime)
+        if method.startswith('rheinfall_') and r == 0 and len(matrix_arrays[2]) > 0:
+            return {'sage_integer': array_rank(matrix_arrays, 'sage_integer', prime)}
+        ranks.update({rank_mode(method, prime): r})
+    return ranks
+
+
+def _serve(conn):
+    # Worker loop: receive (task_id, methods, prime) followed by the binary matrix, reply (task_id, ranks, error).
+    # The worker exits on receiving None.
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        (task_id, methods, prime) = request
+        try:
+            matrix_arrays = decode_matrix(conn.recv_bytes())
+            conn.send((task_id, rank_dict(matrix_arrays, methods, prime), None))
+        except Exception:
+            conn.send((task_id, None, traceback.format_exc()))
+
+
+class _Worker:
+    # Worker process connected to the server by a pipe, with at most one task in flight.
+
+    def __init__(self):
+        (self.conn, child_conn) = mp.Pipe()
+        self.process = mp.Process(target=_serve, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task_id = None
+
+    def submit(self, task_id, matrix_data, methods, prime):
+        self.task_id = task_id
+        self.conn.send((task_id, methods, prime))
+        self.conn.send_bytes(matrix_data)
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class RankServer:
+    """Pool of long-lived rank worker processes.
+
+    Use as context manager:
+
+        with RankServer(n_workers) as server:
+            for (task_id, ranks, error) in server.compute_ranks(tasks):
+                ...
+
+    Attributes:
+        - n_workers (int): Number of worker processes.
+    """
+
+    def __init__(self, n_workers=1):
+        """Initialize the rank server.
+
+        :param n_workers: Number of worker processes, e.g. one per core (Default: 1).
+        :type n_workers: int
+        """
+        self.n_workers = max(1, n_workers)
+        self.workers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.shutdown()
+
+    def start(self):
+        """Start the worker processes."""
+        while len(self.workers) < self.n_workers:
+            self.workers.append(_Worker())
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
+
+    def compute_ranks(self, tasks):
+        """Compute the ranks of matrices with the workers and yield the results as they are finished.
+
+        Each worker processes one matrix at a time, the next matrix is sent once a worker is idle.
+        If a worker exits unexpectedly, an error with its exit code is reported for its task and the worker is
+        replaced.
+
+        :param tasks: Tasks (task_id, matrix_arrays, methods, prime), where matrix_arrays are the
+            (rows, cols, values, shape) of a matrix and methods are rank computation methods in rank_methods.
+        :type tasks: iterable(tuple(hashable, tuple, list(str), int))
+        :return: Generator of (task_id, ranks, error), where ranks is a dictionary rank mode -> rank or None and
+            error is None or a description of the error.
+        :rtype: generator(tuple(hashable, dict(str -> int), str))
+        """
+        self.start()
+        tasks = iter(tasks)
+        idle = list(self.workers)
+        busy = {}
+        exhausted = False
+        while True:
+            while idle and not exhausted:
+                try:
+                    (task_id, matrix_arrays, methods, prime) = next(tasks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                worker = idle.pop()
+                worker.submit(task_id, encode_matrix(*matrix_arrays), methods, prime)
+                busy[worker.conn] = worker
+            if not busy:
+                return
+            sentinels = {worker.process.sentinel: worker for worker in busy.values()}
+            for ready in connection.wait(list(busy.keys()) + list(sentinels.keys())):
+                worker = busy.get(ready) or sentinels.get(ready)
+                if worker.conn not in busy:
+                    # Already handled by the pipe or the sentinel of the same worker.
+                    continue
+                if worker.conn.poll():
+                    try:
+                        result = worker.conn.recv()
+                    except (EOFError, OSError):
+                        # The worker closed its end of the pipe without a result (or exited with unread data, which
+                        # resets the connection), so the pipe stays ready. Wait for the worker to exit instead of
+                        # polling the pipe again.
+                        result = None
+                        worker.process.join(timeout=1)
+                        if worker.process.is_alive():
+                            worker.process.terminate()
+                            worker.process.join()
+                    if result is not None:
+                        del busy[worker.conn]
+                        worker.task_id = None
+                        idle.append(worker)
+                        yield result
+                        continue
+                if worker.process.is_alive():
+                    continue
+                # The worker exited without a result.
+                del busy[worker.conn]
+                task_id = worker.task_id
+                exitcode = worker.process.exitcode
+                logger.warning("Rank worker exited with code %s while computing rank of %s" % (exitcode, task_id))
+                worker.close()
+                self.workers.remove(worker)
+                replacement = _Worker()
+                self.workers.append(replacement)
+                idle.append(replacement)
+                yield (task_id, None, "Rank worker exited with code %s" % exitcode)
@@ -10,7 +10,8 @@ __all__ = ['RefGraphVectorSpace', 'RefOperatorMatrix']
 import Log
 from sage.all import ZZ, matrix, Graph
 import StoreLoad
-import Parameters
+import CanonicalLabelling
+import Graph6
 
 
 logger = Log.logger.getChild('ref_graph_complex')
@@ -75,12 +76,12 @@ class RefGraphVectorSpace:
         return StoreLoad.load_string_list(self.basis_file_path)
 
     def _g6_to_canon_g6(self, graph6, sgn=False):
+        # Canonical form with the same backend as get_basis_g6 and the basis of the graph vector space.
         graph = Graph(graph6)
+        (canon6, perm, autom_list) = CanonicalLabelling.canonical_form(graph, partition=self.graph_vs.get_partition())
         if not sgn:
-            return graph.canonical_label(partition=self.graph_vs.get_partition(), algorithm=Parameters.canonical_label_algorithm).graph6_string()
-        canonG, perm_dict = graph.canonical_label(partition=self.graph_vs.get_partition(), certificate=True, algorithm=Parameters.canonical_label_algorithm)
-        sgn = self.graph_vs.perm_sign(graph, perm_dict.values())
-        return (canonG.graph6_string(), sgn)
+            return canon6
+        return (canon6, self.graph_vs.perm_sign(graph, perm))
 
     def get_basis_g6(self):
         """Return the reference basis as list of graph6 strings.
@@ -90,7 +91,9 @@ class RefGraphVectorSpace:
         :raise StoreLoad.FileNotFoundError: If the reference basis file is not found.
         """
         basis_g6 = self._load_basis_g6()
-        return [self._g6_to_canon_g6(G6) for G6 in basis_g6]
+        partition = self.graph_vs.get_partition()
+        return [CanonicalLabelling.canonical_form(G, partition=partition)[0]
+                for G in Graph6.decode_compact_graphs(basis_g6)]
 
     def get_dimension(self):
         """Return the dimension of the reference vector space.
@@ -19,6 +19,7 @@ def rank(rheinfall_option, matrix_file):
     :type matrix_file: path
     :return: Matrix rank calculated by the rheinfall library.
     :rtype: int
+    :raise RuntimeError: Raised if rheinfall returns a nonzero exit code.
 
     .. seealso:: - https://github.com/riccardomurri/rheinfall/blob/master/src.c%2B%2B/examples/rank.cpp
                  - http://ljk.imag.fr/membres/Jean-Guillaume.Dumas/simc.html
@@ -28,6 +29,8 @@ def rank(rheinfall_option, matrix_file):
     rheinfall_path = os.path.join(os.path.curdir, "rank_exe", "rank")
     with tempfile.NamedTemporaryFile() as temp_rank_file:
         rheinfall_command = "%s-%s %s %s" % (rheinfall_path, rheinfall_option, matrix_file, temp_rank_file.name)
-        os.system(rheinfall_command)
+        ret = os.system(rheinfall_command)
+        if ret != 0:
+            raise RuntimeError("Rheinfall rank returned a nonzero exit code.")
         rank = int(temp_rank_file.read())
     return rank
@@ -1,10 +1,16 @@
 """Provide shared code."""
 
-__all__ = ['Perm', 'OrderedDict', 'enumerate_edges', 'edge_perm_sign', 'shifted_edge_perm_sign', 'permute_to_left',
+__all__ = ['Perm', 'permutation_sign', 'permutation_signs', 'OrderedDict', 'enumerate_edges', 'edge_perm_sign',
+           'edge_perm_sign_from_relabelling', 'hair_labellings', 'LRUCache', 'FileCache', 'file_cache', 'shifted_edge_perm_sign', 'permute_to_left',
            'matrix_norm', 'power_2']
 
 from sage.all import *
+import os
+import sys
 import collections
+import itertools
+import numpy as np
+import Parameters
 
 
 class Perm:
@@ -36,7 +42,7 @@ class Perm:
         :return: Sign of the permutation.
         :rtype: int
         """
-        return Permutation([j+1 for j in self.p]).signature()
+        return permutation_sign(self.p)
 
     @classmethod
     def shifted(cls, p):
@@ -45,15 +51,73 @@ class Perm:
         :Note: The inverse of the returned permutation does not correspond to the inverse of the permutation induced by
                p but rather to the corresponding inverse permutation of the shifted indices starting at zero.
 
-        :param p: Image of the permutation with consecutive indices.
+        :param p: Image of the permutation with consecutive indices, possibly empty.
         :type p: list(int)
         :return: Permutation of consecutive indices starting at zero.
         :rtype: Perm
         """
-        pmin = min(p)
+        pmin = min(p, default=0)
         return cls([j - pmin for j in p])
 
 
+def permutation_sign(p):
+    """Return the sign of a permutation starting at zero.
+
+    The sign is computed in O(n) by counting the cycles of the permutation: sign = (-1)^(n - number of cycles).
+
+    :param p: Image of the permutation with consecutive indices starting at zero.
+    :type p: list(int) or numpy.ndarray
+    :return: Sign of the permutation.
+    :rtype: int
+    :raise ValueError: Raised if p is not a permutation of 0, ..., len(p) - 1.
+    """
+    if isinstance(p, np.ndarray):
+        p = p.tolist()
+    n = len(p)
+    visited = [False] * n
+    parity = 0
+    for i in range(n):
+        if not visited[i]:
+            # A cycle of length l is a product of l - 1 transpositions.
+            j = p[i]
+            visited[i] = True
+            while j != i:
+                # Starting from an unvisited index, a permutation only reaches unvisited indices until it returns.
+                if not (0 <= j < n) or visited[j]:
+                    raise ValueError("permutation_sign: %s is not a permutation starting at zero" % str(p))
+                visited[j] = True
+                j = p[j]
+                parity ^= 1
+    return -1 if parity else 1
+
+
+def permutation_signs(P):
+    """Return the signs of many permutations of the same length at once.
+
+    The number of cycles of each permutation is counted by labelling each element with the minimal element of its
+    cycle via pointer jumping, which needs O(log n) vectorized steps.
+
+    :param P: Array with one permutation starting at zero per row.
+    :type P: numpy.ndarray or list(list(int))
+    :return: Signs of the permutations.
+    :rtype: numpy.ndarray
+    """
+    P = np.asarray(P, dtype=np.intp)
+    if P.ndim != 2:
+        raise ValueError("permutation_signs: Expected a two dimensional array of permutations")
+    (m, n) = P.shape
+    if n == 0:
+        return np.ones(m, dtype=np.int64)
+    cycle_min = np.broadcast_to(np.arange(n), (m, n)).copy()
+    jump = P.copy()
+    # After k steps cycle_min[i] is the minimum over the next 2^k elements in the cycle of i.
+    for _ in range(max(n - 1, 1).bit_length()):
+        cycle_min = np.minimum(cycle_min, np.take_along_axis(cycle_min, jump, axis=1))
+        jump = np.take_along_axis(jump, jump, axis=1)
+    n_cycles = np.count_nonzero(cycle_min == np.arange(n), axis=1)
+    return np.where((n - n_cycles) % 2 == 0, 1, -1)
+
+
 class OrderedDict(collections.OrderedDict):
     """Ordered dictionary.
 
@@ -82,6 +146,202 @@ class OrderedDict(collections.OrderedDict):
         return tuple(self.values())
 
 
+class LRUCache:
+    """Bounded dictionary discarding the least recently used entries, counting hits and misses.
+
+    Attributes:
+        - maxsize (int): Maximal number of entries.
+        - hits (int): Number of lookups which found an entry.
+        - misses (int): Number of lookups which didn't find an entry.
+    """
+
+    def __init__(self, maxsize):
+        """Initialize an empty cache.
+
+        :param maxsize: Maximal number of entries.
+        :type maxsize: int
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Return the value for key and mark it as recently used, or default if key is not cached."""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Cache the value for key, discarding the least recently used entry if the cache is full."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def info(self):
+        """Return the cache statistics.
+
+        :return: Dictionary with the number of hits, misses, the current size and the maximal size.
+        :rtype: dict(str -> int)
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
+
+
+def _estimated_size(value):
+    # Returns the approximate memory in bytes of a value built from numpy arrays, strings, numbers and containers.
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 100
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_estimated_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimated_size(k) + _estimated_size(v) for (k, v) in value.items())
+    return sys.getsizeof(value)
+
+
+class FileCache:
+    """Cache of values loaded from files, discarding the least recently used values if the size of all cached values
+    exceeds a byte budget.
+
+    A value is cached for a path and a kind, e.g. 'basis' or 'rank', together with the file identity
+    (device, inode, modification time, size) of the file at the time it was loaded. A cached value is only returned
+    if the file identity is unchanged, such that files written by other processes are loaded again. Files are
+    written via StoreLoad.atomic_open, which replaces the file and hence its inode, such that a rewrite is detected
+    even if size and modification time agree. Methods writing a file call invalidate in addition.
+
+    Attributes:
+        - maxbytes (int): Byte budget, the cache is disabled if it is 0 or None.
+        - nbytes (int): Approximate size of the cached values in bytes.
+        - hits (int): Number of lookups which found a valid value.
+        - misses (int): Number of lookups which didn't find a valid value.
+    """
+
+    def __init__(self, maxbytes):
+        """Initialize an empty cache.
+
+        :param maxbytes: Byte budget, the cache is disabled if it is 0 or None.
+        :type maxbytes: int
+        """
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+        self._kinds = collections.defaultdict(set)
+
+    def __len__(self):
+        return len(self._data)
+
+    def is_enabled(self):
+        """Return whether the cache is enabled, i.e. the byte budget is positive."""
+        return bool(self.maxbytes)
+
+    def load(self, path, kind, loader, copy=None):
+        """Return the value of kind for the file at path from the cache or load and cache it.
+
+        :param path: Path of the file.
+        :type path: path
+        :param kind: Kind of the value, to cache several values derived from the same file.
+        :type kind: str
+        :param loader: Function without arguments loading the value from the file.
+        :type loader: callable
+        :param copy: Function applied to values shared with the cache before they are returned, e.g. to return
+            copies of mutable values (Default: None). Not applied if the cache is disabled.
+        :type copy: callable
+        :return: Value returned by loader, or its copy.
+        """
+        if not self.is_enabled():
+            return loader()
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Leave the error to the loader.
+            return loader()
+        key = (path, kind)
+        identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        entry = self._data.get(key)
+        if entry is not None and entry[0] == identity:
+            self._data.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        else:
+            self.misses += 1
+            # The identity is taken before loading, such that a file changed meanwhile is loaded again.
+            value = loader()
+            self._put(key, identity, value)
+        return value if copy is None else copy(value)
+
+    def _put(self, key, identity, value):
+        self._discard(key)
+        nbytes = _estimated_size(value)
+        if nbytes > self.maxbytes:
+            return
+        self._data[key] = (identity, value, nbytes)
+        self._kinds[key[0]].add(key[1])
+        self.nbytes += nbytes
+        while self.nbytes > self.maxbytes:
+            self._discard(next(iter(self._data)))
+
+    def _discard(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
+            kinds = self._kinds[key[0]]
+            kinds.discard(key[1])
+            if not kinds:
+                del self._kinds[key[0]]
+
+    def invalidate(self, *paths):
+        """Discard the cached values of all kinds for the files at paths.
+
+        :param paths: Paths of files which are written or deleted.
+        :type paths: path
+        """
+        for path in paths:
+            for kind in list(self._kinds.get(path, ())):
+                self._discard((path, kind))
+
+    def clear(self):
+        """Discard all cached values."""
+        self._data.clear()
+        self._kinds.clear()
+        self.nbytes = 0
+
+    def resize(self, maxbytes):
+        """Change the byte budget, discarding the least recently used values if necessary.
+
+        :param maxbytes: Byte budget, the cache is disabled if it is 0 or None.
+        :type maxbytes: int
+        """
+        self.maxbytes = maxbytes
+        if not maxbytes:
+            self.clear()
+            return
+        while self.nbytes > self.maxbytes:
+            self._discard(next(iter(self._data)))
+
+    def info(self):
+        """Return the cache statistics.
+
+        :return: Dictionary with the number of hits, misses, cached values, the current size and the byte budget.
+        :rtype: dict(str -> int)
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'nbytes': self.nbytes,
+                'maxbytes': self.maxbytes}
+
+
+# Process-wide cache of bases, matrices, matrix shapes and ranks loaded from files.
+file_cache = FileCache(Parameters.file_cache_bytes)
+
+
 def enumerate_edges(graph):
     """Label the edges of the graph lexicographically.
 
@@ -107,6 +367,89 @@ def edge_perm_sign(graph):
     return Perm(p).signature()
 
 
+def edge_perm_sign_from_relabelling(edges, p):
+    """Return the sign of the permutation of the edges induced by relabelling the vertices by the permutation p.
+
+    The edges are labeled by their position in the list edges. After relabelling vertex j to p[j], the edges are
+    ordered lexicographically again and the sign of the resulting order of the labels is returned.
+    This gives the same sign as labelling the edges of a copy of the graph, relabelling it and reading off the edge
+    labels, but without copying or mutating the graph.
+
+    :param edges: Edges (u, v) of the graph in lexicographic order, i.e. G.edges(labels=False, sort=True).
+    :type edges: list(tuple(int, int))
+    :param p: Image of the vertex permutation: vertex j becomes vertex p[j].
+    :type p: list(int)
+    :return: Sign of the induced edge permutation.
+    :rtype: int
+    """
+    image = []
+    for (k, (u, v)) in enumerate(edges):
+        (a, b) = (p[u], p[v])
+        image.append((a, b, k) if a <= b else (b, a, k))
+    image.sort()
+    return permutation_sign([k for (a, b, k) in image])
+
+
+def hair_labellings(G, partition, hairs, target_cells):
+    """Generate the distinct labellings of the hairs of the graph G.
+
+    The hairs are mapped bijectively to the target vertices, where the targets within a cell are interchangeable,
+    i.e. a subset of hairs is mapped to a cell in increasing order. Two labellings give isomorphic graphs if they
+    differ by an automorphism of G. Hence only one labelling per orbit of the automorphism group of G acting on the
+    labellings is generated, i.e. coset representatives instead of all permutations of the hairs.
+    The orbits are enumerated by assigning the target cells one after the other, choosing the hairs assigned to a cell
+    up to the action of the subgroup stabilizing the hairs assigned so far.
+
+    :param G: Graph with unlabeled hairs.
+    :type G: Graph
+    :param partition: Partition of the vertices of G respected by the automorphisms, where the hairs form one cell.
+    :type partition: list(list(int))
+    :param hairs: Hair vertices to be labeled.
+    :type hairs: list(int)
+    :param target_cells: Cells of target vertices. The sizes of the cells sum up to the number of hairs.
+    :type target_cells: list(list(int))
+    :return: Generator of labellings as lists of the targets of the hairs, in the order of hairs.
+    :rtype: generator(list(int))
+    """
+    hair_index = {h: i for (i, h) in enumerate(hairs)}
+    gens = []
+    for a in G.automorphism_group(partition=[cell for cell in partition if len(cell) > 0]).gens():
+        ad = a.dict()
+        gens.append(tuple(hair_index[ad[h]] for h in hairs))
+    group = _permutation_group_elements(gens, len(hairs))
+
+    def assign(cell_idx, remaining, stabilizer, images):
+        if cell_idx == len(target_cells):
+            yield list(images)
+            return
+        cell = target_cells[cell_idx]
+        for subset in itertools.combinations(remaining, len(cell)):
+            # Keep only the subset which is lexicographically minimal in its orbit.
+            if any(tuple(sorted(a[i] for i in subset)) < subset for a in stabilizer):
+                continue
+            subset_set = set(subset)
+            for (i, t) in zip(subset, cell):
+                images[i] = t
+            yield from assign(cell_idx + 1, [i for i in remaining if i not in subset_set],
+                              [a for a in stabilizer if all(a[i] in subset_set for i in subset)], images)
+
+    yield from assign(0, list(range(len(hairs))), group, [None] * len(hairs))
+
+
+def _permutation_group_elements(gens, n):
+    identity = tuple(range(n))
+    elements = {identity}
+    queue = [identity]
+    while queue:
+        a = queue.pop()
+        for g in gens:
+            b = tuple(g[j] for j in a)
+            if b not in elements:
+                elements.add(b)
+                queue.append(b)
+    return list(elements)
+
+
 def shifted_edge_perm_sign(graph):
     """Return the sign of the permutation induced by the order of edges of the graph.
 
@@ -1,5 +1,10 @@
 import os
+import heapq
+import shutil
+import json
+import zlib
 import pickle
+import contextlib
 
 
 class FileNotFoundError(RuntimeError):
@@ -24,9 +29,36 @@ def delete_file_and_empty_dir(path):
         os.rmdir(dir_name)
 
 
-def store_string_list(L, path):
+def delete_dir(directory):
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode='w'):
+    """Open a temporary file, which atomically replaces the file at path once it has been written without error.
+
+    An interrupted write never leaves an incomplete file at path.
+
+    :param path: Path of the file to be written.
+    :type path: path
+    :param mode: File mode (Default: 'w').
+    :type mode: str
+    """
     generate_path(path)
-    with open(path, 'w') as f:
+    temp_path = '%s.tmp%d' % (path, os.getpid())
+    try:
+        with open(temp_path, mode) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def store_string_list(L, path):
+    with atomic_open(path, 'w') as f:
         for x in L:
             f.write(x + '\n')
 
@@ -39,6 +71,50 @@ def load_string_list(path):
         return f.read().splitlines()
 
 
+def merge_sorted_runs(run_paths, path, count_header=True):
+    """Merge files of sorted strings into a single sorted file without duplicates.
+
+    The runs are k-way merged line by line, such that only one line per run is held in memory.
+
+    :param run_paths: Paths to files containing sorted lists of strings, one per line.
+    :type run_paths: list(path)
+    :param path: Path to the merged file.
+    :type path: path
+    :param count_header: Option to write the number of merged lines as a header line (Default: True).
+    :type count_header: bool
+    :return: Number of distinct lines written to the merged file.
+    :rtype: int
+    """
+    # The merged lines are written to an intermediate body file first, since the header needs their number.
+    # The body file is written atomically and removed in any case, a leftover of a killed merge is removed on rerun.
+    body_path = path + '.body'
+    if os.path.exists(body_path):
+        os.remove(body_path)
+    count = 0
+    try:
+        run_files = [open(run_path, 'r') for run_path in run_paths]
+        try:
+            with atomic_open(body_path, 'w') as f:
+                previous = None
+                for line in heapq.merge(*run_files):
+                    if line != previous:
+                        f.write(line)
+                        count += 1
+                        previous = line
+        finally:
+            for run_file in run_files:
+                run_file.close()
+        with atomic_open(path, 'w') as f:
+            if count_header:
+                f.write('%d\n' % count)
+            with open(body_path, 'r') as body:
+                shutil.copyfileobj(body, f)
+    finally:
+        if os.path.exists(body_path):
+            os.remove(body_path)
+    return count
+
+
 def load_line(path):
     if not os.path.exists(path):
         raise FileNotFoundError(
@@ -48,14 +124,12 @@ def load_line(path):
 
 
 def store_line(S, path):
-    generate_path(path)
-    with open(path, 'w') as f:
+    with atomic_open(path, 'w') as f:
         f.write(S + '\n')
 
 
 def pickle_store(Ob, path):
-    generate_path(path)
-    with open(path, 'wb') as f:
+    with atomic_open(path, 'wb') as f:
         pickle.dump(Ob, f)
 
 
@@ -65,3 +139,33 @@ def pickle_load(path):
             "Cannot load from %s: The file does not exist" % str(path))
     with open(path, 'rb') as f:
         return pickle.load(f)
+
+
+def json_store(Ob, path):
+    with atomic_open(path, 'w') as f:
+        json.dump(Ob, f, indent=1, sort_keys=True)
+
+
+def json_load(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            "Cannot load from %s: The file does not exist" % str(path))
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def file_crc32(path, chunk_size=1 << 24):
+    """Return the CRC32 checksum of a file, read in chunks.
+
+    :param path: Path of the file.
+    :type path: path
+    :param chunk_size: Number of bytes read at once (Default: 16 MiB).
+    :type chunk_size: int
+    :return: CRC32 checksum as hex string.
+    :rtype: str
+    """
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            crc = zlib.crc32(chunk, crc)
+    return '%08x' % crc
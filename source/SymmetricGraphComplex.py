@@ -134,7 +134,8 @@ class SymmetricProjectionOperator(GraphOperator.GraphOperator):
         A = self.get_matrix()
         return A.trace() / self.get_normalizing_c()
 
-    def _compute_rank(self, sage=None, linbox=None, rheinfall=None, prime=Parameters.prime):
+    def _compute_rank(self, sage=None, linbox=None, rheinfall=None, prime=Parameters.prime, native=None, n_jobs=1,
+                      rank_notes=None):
         # We override _compute_rank so as to avoid expensive rank computation by other means
         if self.is_trivial() or self.get_matrix_entries() == 0:
             return {'exact': 0}
@@ -424,12 +425,13 @@ class SymmetricRestrictedOperatorMatrix(GraphOperator.OperatorMatrix):
     def is_valid(self):
         return self.opD.is_valid()
 
-    def compute_rank(self, sage=None, linbox=None, rheinfall=None, ignore_existing_files=False, skip_if_no_matrix=True):
+    def compute_rank(self, sage=None, linbox=None, rheinfall=None, ignore_existing_files=False, skip_if_no_matrix=True,
+                     native=None, n_jobs=1):
         print("Compute projector rank "+str(self.opP))
         self.opP.compute_rank(sage, linbox, rheinfall,
-                              ignore_existing_files, skip_if_no_matrix)
+                              ignore_existing_files, skip_if_no_matrix, native, n_jobs)
         print("Done")
-        return super().compute_rank(sage, linbox, rheinfall, ignore_existing_files, skip_if_no_matrix)
+        return super().compute_rank(sage, linbox, rheinfall, ignore_existing_files, skip_if_no_matrix, native, n_jobs)
 
 
 class SymmetricGraphOperator(GraphOperator.GraphOperator):
@@ -0,0 +1,91 @@
+"""Test the canonical labelling backends, including a regression test for memory leaks as seen in BlissMemLeak.py."""
+
+import unittest
+import os
+import random
+import psutil
+from sage.all import *
+import CanonicalLabelling
+
+
+n_graphs = 200
+n_leak_graphs = 20000
+# Maximal growth of the resident memory in bytes while canonically labelling n_leak_graphs graphs.
+max_leak_bytes = 20 * 2**20
+
+
+def available_backends():
+    backends = ['sage']
+    if CanonicalLabelling.pynauty is not None:
+        backends.append('nauty')
+    return backends
+
+
+def leak_test(test, algorithm):
+    process = psutil.Process(os.getpid())
+    graph_list = [random_graph(10, 20, k) for k in range(100)]
+    # Warm up to exclude one time allocations.
+    for G in graph_list:
+        CanonicalLabelling.canonical_form(G, automorphisms=True, algorithm=algorithm)
+    oldmem = process.memory_info().rss
+    for i in range(n_leak_graphs):
+        CanonicalLabelling.canonical_form(graph_list[i % len(graph_list)], partition=[list(range(10))],
+                                          automorphisms=True, algorithm=algorithm)
+    delta = process.memory_info().rss - oldmem
+    test.assertLess(delta, max_leak_bytes, "%s: mem usage (Delta) %d after %d graphs"
+                    % (algorithm, delta, n_leak_graphs))
+
+
+def random_graph(n, m, seed):
+    G = graphs.RandomGNM(n, m, seed=seed)
+    G.relabel(list(range(n)), inplace=True)
+    return G
+
+
+class CanonicalFormTest(unittest.TestCase):
+    def test_canonical_form(self):
+        for algorithm in available_backends():
+            for k in range(n_graphs):
+                G = random_graph(10, 20, k)
+                partition = [list(range(0, 4)), list(range(4, 10))]
+                (canon6, perm, autom_list) = CanonicalLabelling.canonical_form(
+                    G, partition=partition, automorphisms=True, algorithm=algorithm)
+                self.assertEqual(G.relabel(perm, inplace=False).graph6_string(), canon6,
+                                 "%s: labelling permutation doesn't give the canonical form" % algorithm)
+                if algorithm == 'sage':
+                    # The single search tree traversal yields the canonical form of Graph.canonical_label.
+                    self.assertEqual(G.canonical_label(partition=partition, algorithm='sage').graph6_string(), canon6,
+                                     "sage: canonical form differs from Graph.canonical_label")
+                # A relabelling respecting the partition yields the same canonical form.
+                p = random.sample(range(0, 4), 4) + random.sample(range(4, 10), 6)
+                (canon6_p, perm_p, autom_list_p) = CanonicalLabelling.canonical_form(
+                    G.relabel(p, inplace=False), partition=partition, algorithm=algorithm)
+                self.assertEqual(canon6, canon6_p, "%s: canonical form not invariant" % algorithm)
+                for a in autom_list:
+                    self.assertEqual(G.relabel(a, inplace=False), G, "%s: generator is no automorphism" % algorithm)
+                    self.assertTrue(all(a[j] < 4 for j in range(0, 4)),
+                                    "%s: automorphism doesn't respect the partition" % algorithm)
+
+
+class MemoryLeakTest(unittest.TestCase):
+    def test_memory_leak(self):
+        for algorithm in available_backends():
+            leak_test(self, algorithm)
+
+    def test_no_bliss(self):
+        # Sage's bliss bindings leak memory, see BlissMemLeak.py.
+        self.assertRaises(ValueError, CanonicalLabelling.canonical_form, graphs.PetersenGraph(), algorithm='bliss')
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(CanonicalFormTest('test_canonical_form'))
+    suite.addTest(MemoryLeakTest('test_memory_leak'))
+    suite.addTest(MemoryLeakTest('test_no_bliss'))
+    return suite
+
+
+if __name__ == '__main__':
+    print("\n#####################################\n" + "----- Start test suite for canonical labelling -----")
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
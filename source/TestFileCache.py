@@ -0,0 +1,109 @@
+"""Test the process-wide cache of values loaded from files: validation by file identity, invalidation and eviction."""
+
+import unittest
+import os
+import tempfile
+import numpy as np
+import StoreLoad
+import Shared
+
+
+class CountingLoader:
+    # Loads the string list of a file and counts the loads.
+
+    def __init__(self, path):
+        self.path = path
+        self.n_loads = 0
+
+    def __call__(self):
+        self.n_loads += 1
+        return StoreLoad.load_string_list(self.path)
+
+
+class FileCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'basis.txt')
+        StoreLoad.store_string_list(['2', 'Bw', 'Ch'], self.path)
+        self.loader = CountingLoader(self.path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_hit(self):
+        cache = Shared.FileCache(10**6)
+        self.assertEqual(cache.load(self.path, 'basis', self.loader), ['2', 'Bw', 'Ch'])
+        self.assertEqual(cache.load(self.path, 'basis', self.loader), ['2', 'Bw', 'Ch'])
+        self.assertEqual(self.loader.n_loads, 1)
+        self.assertEqual((cache.info()['hits'], cache.info()['misses']), (1, 1))
+
+    def test_copy(self):
+        cache = Shared.FileCache(10**6)
+        cache.load(self.path, 'basis', self.loader, copy=list).append('modified')
+        self.assertEqual(cache.load(self.path, 'basis', self.loader, copy=list), ['2', 'Bw', 'Ch'])
+        self.assertEqual(self.loader.n_loads, 1)
+
+    def test_rewrite_with_same_size_and_mtime(self):
+        # A rewrite by another process is detected by the inode, even if size and modification time agree.
+        cache = Shared.FileCache(10**6)
+        cache.load(self.path, 'basis', self.loader)
+        stat = os.stat(self.path)
+        StoreLoad.store_string_list(['2', 'Bo', 'Cl'], self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(os.stat(self.path).st_size, stat.st_size)
+        self.assertEqual(cache.load(self.path, 'basis', self.loader), ['2', 'Bo', 'Cl'])
+        self.assertEqual(self.loader.n_loads, 2)
+
+    def test_invalidate(self):
+        cache = Shared.FileCache(10**6)
+        cache.load(self.path, 'basis', self.loader)
+        cache.load(self.path, 'dimension', lambda: 2)
+        cache.invalidate(self.path)
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+        cache.load(self.path, 'basis', self.loader)
+        self.assertEqual(self.loader.n_loads, 2)
+
+    def test_eviction(self):
+        array_bytes = np.zeros(1000).nbytes
+        cache = Shared.FileCache(3 * array_bytes + 1000)
+        for k in range(5):
+            cache.load(self.path, 'array%d' % k, lambda: np.zeros(1000))
+        self.assertEqual(len(cache), 3)
+        self.assertLessEqual(cache.nbytes, cache.maxbytes)
+        # The least recently used values are evicted first.
+        cache.load(self.path, 'array2', lambda: np.ones(1000))
+        cache.load(self.path, 'array5', lambda: np.zeros(1000))
+        self.assertEqual(sorted(kind for (path, kind) in cache._data), ['array2', 'array4', 'array5'])
+        # Values exceeding the budget are not cached.
+        cache.load(self.path, 'large', lambda: np.zeros(10**6))
+        self.assertNotIn((self.path, 'large'), cache._data)
+
+    def test_disabled(self):
+        cache = Shared.FileCache(0)
+        cache.load(self.path, 'basis', self.loader)
+        cache.load(self.path, 'basis', self.loader)
+        self.assertEqual((self.loader.n_loads, len(cache)), (2, 0))
+
+    def test_missing_file(self):
+        cache = Shared.FileCache(10**6)
+        missing_path = os.path.join(self.temp_dir.name, 'missing.txt')
+        self.assertRaises(StoreLoad.FileNotFoundError, cache.load, missing_path, 'basis',
+                          lambda: StoreLoad.load_string_list(missing_path))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(FileCacheTest('test_hit'))
+    suite.addTest(FileCacheTest('test_copy'))
+    suite.addTest(FileCacheTest('test_rewrite_with_same_size_and_mtime'))
+    suite.addTest(FileCacheTest('test_invalidate'))
+    suite.addTest(FileCacheTest('test_eviction'))
+    suite.addTest(FileCacheTest('test_disabled'))
+    suite.addTest(FileCacheTest('test_missing_file'))
+    return suite
+
+
+if __name__ == '__main__':
+    print("\n#####################################\n" + "----- Start test suite for the file cache -----")
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
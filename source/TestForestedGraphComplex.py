@@ -1,9 +1,11 @@
 import unittest
 import itertools
 import logging
+from sage.all import *
 import Log
 import TestGraphComplex
 import ForestedGraphComplex
+import Shared
 
 
 log_file = "FGC_Unittest.log"
@@ -55,6 +57,22 @@ class AntiCommutativityTest(TestGraphComplex.AntiCommutativityTest):
         self.gc_list = [ForestedGraphComplex.ForestedGC(v_range, l_range, m_range, h_range, even_edges, ['contract', 'unmark'])
                         for even_edges in edges_types]
 
+class ContractOneMarkedEdgeTest(unittest.TestCase):
+    def test_contract_one_marked_edge(self):
+        # Contracting the only marked edge leaves an empty permutation of the marked edges for odd edges.
+        for even_edges in edges_types:
+            op = ForestedGraphComplex.ContractEdgesGO.generate_operator(2, 2, 1, 0, even_edges)
+            # Two vertices joined by the marked edge and by the two unmarked edges encoded by the vertices 2 and 3.
+            G = Graph([(0, 1), (0, 2), (1, 2), (0, 3), (1, 3)])
+            image = op.operate_on_element(G, (0, 1))
+            self.assertEqual(len(image), 1)
+            (G1, sgn) = image[0]
+            self.assertEqual(G1.order(), 3)
+            self.assertIn(sgn, [1, -1])
+            self.assertEqual(op.operate_on_element(G, (0, 2)), [])
+        self.assertEqual(Shared.Perm.shifted([]).signature(), 1)
+
+
 def suite():
     suite = unittest.TestSuite()
     suite.addTest(BasisTest('test_basis_functionality'))
@@ -65,6 +83,7 @@ def suite():
     suite.addTest(CohomologyTest('test_cohomology_functionality'))
     suite.addTest(SquareZeroTest('test_square_zero'))
     suite.addTest(AntiCommutativityTest('test_anti_commutativity'))
+    suite.addTest(ContractOneMarkedEdgeTest('test_contract_one_marked_edge'))
     return suite
 
 
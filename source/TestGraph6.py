@@ -0,0 +1,57 @@
+"""Test the bulk graph6 codec against Sage's graph6 encoding and decoding."""
+
+import unittest
+import random
+from sage.all import *
+import Graph6
+
+
+n_graphs = 200
+
+
+def random_graph(n, seed):
+    rng = random.Random(seed)
+    m = rng.randint(0, n * (n - 1) // 2)
+    return graphs.RandomGNM(n, m, seed=seed)
+
+
+class DecodeEdgesTest(unittest.TestCase):
+    def test_mixed_orders(self):
+        # Graphs with 2, 3 and 4 vertices have graph6 strings of the same length, as well as with 0 and 1 vertices.
+        decoded = Graph6.decode_edges(['Bw', 'Ch', 'A_', '@', '?'])
+        self.assertEqual([(n, edges.tolist()) for (n, edges) in decoded],
+                         [(3, [[0, 1], [0, 2], [1, 2]]), (4, [[0, 1], [1, 2], [2, 3]]), (2, [[0, 1]]), (1, []),
+                          (0, [])])
+
+    def test_decode_edges(self):
+        graph_list = [random_graph(random.Random(k).randint(1, 12), k) for k in range(n_graphs)]
+        decoded = Graph6.decode_edges([G.graph6_string() for G in graph_list])
+        for (G, (n, edges)) in zip(graph_list, decoded):
+            self.assertEqual(n, G.order())
+            self.assertEqual(edges.tolist(), [list(e) for e in G.edges(labels=False, sort=True)])
+
+    def test_bitsets_reject_mixed_orders(self):
+        self.assertRaises(ValueError, Graph6.decode_bitsets, ['Bw', 'Ch'])
+
+
+class EncodeEdgesTest(unittest.TestCase):
+    def test_encode_edges(self):
+        for n in range(1, 12):
+            graph_list = [random_graph(n, 1000 * n + k) for k in range(20)]
+            g6_list = Graph6.encode_edges(n, [G.edges(labels=False, sort=True) for G in graph_list])
+            self.assertEqual(g6_list, [G.graph6_string() for G in graph_list])
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(DecodeEdgesTest('test_mixed_orders'))
+    suite.addTest(DecodeEdgesTest('test_decode_edges'))
+    suite.addTest(DecodeEdgesTest('test_bitsets_reject_mixed_orders'))
+    suite.addTest(EncodeEdgesTest('test_encode_edges'))
+    return suite
+
+
+if __name__ == '__main__':
+    print("\n#####################################\n" + "----- Start test suite for the graph6 codec -----")
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -1,18 +1,37 @@
 
 __all__ = ['BasisTest', 'OperatorTest', 'GraphComplexTest',
-           'SquareZeroTest', 'AntiCommutativityTest', 'TestAcyclic']
+           'SquareZeroTest', 'AntiCommutativityTest', 'TestAcyclic', 'CompactGraphTest', 'OrbitReductionTest',
+           'generate_matrix_list']
 
 from abc import ABCMeta, abstractmethod
 import unittest
 from sage.all import *
 import Log
 import StoreLoad
+import Parameters
 import ReferenceGraphComplex
 
 
 logger = Log.logger.getChild('test_graph_complex')
 
 
+def generate_matrix_list(op, **parameters):
+    """Return the sorted entries of the operator matrix of op, generated in memory with the given values of
+    Parameters set temporarily. The bases of the domain and the target need to be built."""
+    saved = {name: getattr(Parameters, name) for name in parameters}
+    try:
+        for (name, value) in parameters.items():
+            setattr(Parameters, name, value)
+        lookup = op.target.get_basis_lookup()
+        matrix_list = []
+        for domain_basis_element in enumerate(op.domain.get_basis()):
+            matrix_list.extend(op._generate_matrix_list(domain_basis_element, lookup))
+    finally:
+        for (name, value) in saved.items():
+            setattr(Parameters, name, value)
+    return sorted(matrix_list)
+
+
 class BasisTest(unittest.TestCase):
     __metaclass__ = ABCMeta
 
@@ -263,3 +282,49 @@ class TestAcyclic(unittest.TestCase):
         for dif in self.dif_list:
             self.assertTrue(dif.complex_is_acyclic(),
                             'Graph complex is not acyclic for ' + str(dif))
+
+
+class CompactGraphTest(unittest.TestCase):
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_compact_graphs(self):
+        print('----- Compare operator matrices with and without compact graphs -----')
+        for op in self.op_list:
+            if not op.is_valid():
+                continue
+            op.domain.build_basis()
+            op.target.build_basis()
+            self.assertTrue(op.compact_graphs, '%s: operator does not support compact graphs' % str(op))
+            self.assertEqual(generate_matrix_list(op, use_compact_graphs=True, operator_orbit_reduction=False),
+                             generate_matrix_list(op, use_compact_graphs=False, operator_orbit_reduction=False),
+                             '%s: matrix differs for compact graphs' % str(op))
+
+
+class OrbitReductionTest(unittest.TestCase):
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_orbit_reduction(self):
+        print('----- Compare operator matrices with and without orbit reduction -----')
+        for op in self.op_list:
+            if not op.is_valid():
+                continue
+            op.domain.build_basis()
+            op.target.build_basis()
+            self.assertIsNotNone(op.element_type, '%s: operator does not support orbit reduction' % str(op))
+            self.assertEqual(generate_matrix_list(op, operator_orbit_reduction=True),
+                             generate_matrix_list(op, operator_orbit_reduction=False),
+                             '%s: matrix differs with orbit reduction' % str(op))
@@ -0,0 +1,85 @@
+"""Test the generation of hair labellings up to automorphisms against the enumeration of all permutations of the
+hairs.
+"""
+
+import unittest
+import itertools
+from sage.all import *
+import Shared
+
+
+def hairy_graph(n_vertices, edges, hair_vertices):
+    # Graph with the vertices 0, ..., n_vertices-1 and the given edges, and a hair attached to each vertex in
+    # hair_vertices, with the hair vertices n_vertices, n_vertices+1, ...
+    hair_edges = [(v, n_vertices + k) for (k, v) in enumerate(hair_vertices)]
+    G = Graph(n_vertices + len(hair_vertices))
+    G.add_edges(list(edges) + hair_edges)
+    return G
+
+
+# (graph, cells of the non-hair vertices)
+graph_list = [
+    (hairy_graph(3, [(0, 1), (1, 2), (0, 2)], [0, 1, 2]), [[0, 1, 2]]),
+    (hairy_graph(1, [], [0, 0, 0, 0]), [[0]]),
+    (hairy_graph(3, [(0, 1), (1, 2)], [0, 0, 1, 2]), [[0, 1, 2]]),
+    (hairy_graph(4, [(0, 1), (1, 2), (2, 3), (0, 3)], [0, 1, 1, 2]), [[0, 1, 2, 3]]),
+    (hairy_graph(4, [(0, 1), (1, 2), (2, 3), (0, 3)], [0, 1, 2, 3]), [[0, 1], [2], [3]]),
+]
+
+
+def labelled_class(G, vertex_cells, target_cells, labelling):
+    # Isomorphism class of G with the hairs mapped to the targets, where the targets within a cell are
+    # interchangeable.
+    idv = list(range(G.order() - len(labelling)))
+    H = G.relabel(idv + list(labelling), inplace=False)
+    return H.canonical_label(partition=[cell for cell in vertex_cells + target_cells if len(cell) > 0]).graph6_string()
+
+
+class HairLabellingsTest(unittest.TestCase):
+    def check_labellings(self, G, vertex_cells, target_cells):
+        hairs = [v for v in G.vertices(sort=True) if all(v not in cell for cell in vertex_cells)]
+        labellings = list(Shared.hair_labellings(G, vertex_cells + [hairs], hairs, target_cells))
+        # The labellings map the hairs bijectively to the targets and give pairwise non-isomorphic graphs.
+        targets = sorted(t for cell in target_cells for t in cell)
+        for labelling in labellings:
+            self.assertEqual(sorted(labelling), targets)
+        new_classes = [labelled_class(G, vertex_cells, target_cells, p) for p in labellings]
+        self.assertEqual(len(set(new_classes)), len(new_classes))
+        # Every isomorphism class of the enumeration of all permutations of the hairs is generated.
+        all_classes = {labelled_class(G, vertex_cells, target_cells, p) for p in itertools.permutations(targets)}
+        self.assertEqual(set(new_classes), all_classes)
+
+    def test_single_targets(self):
+        for (G, vertex_cells) in graph_list:
+            n_vertices = sum(len(cell) for cell in vertex_cells)
+            hairs = list(range(n_vertices, G.order()))
+            self.check_labellings(G, vertex_cells, [[h] for h in hairs])
+
+    def test_target_cells(self):
+        # Interchangeable targets, as for the hairs encoding tadpoles in the forested graph complex.
+        for (G, vertex_cells) in graph_list:
+            n_vertices = sum(len(cell) for cell in vertex_cells)
+            hairs = list(range(n_vertices, G.order()))
+            for tp in range(len(hairs) + 1):
+                self.check_labellings(G, vertex_cells, [hairs[:tp]] + [[h] for h in hairs[tp:]])
+            self.check_labellings(G, vertex_cells, [hairs[:2], hairs[2:]])
+
+    def test_fewer_labellings(self):
+        # The triangle with a hair at each vertex has a single labelling up to automorphisms.
+        (G, vertex_cells) = graph_list[0]
+        self.assertEqual(len(list(Shared.hair_labellings(G, vertex_cells + [[3, 4, 5]], [3, 4, 5],
+                                                         [[3], [4], [5]]))), 1)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(HairLabellingsTest('test_single_targets'))
+    suite.addTest(HairLabellingsTest('test_target_cells'))
+    suite.addTest(HairLabellingsTest('test_fewer_labellings'))
+    return suite
+
+
+if __name__ == '__main__':
+    print("\n#####################################\n" + "----- Start test suite for hair labellings -----")
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -54,6 +54,14 @@ class AntiCommutativityTest(TestGraphComplex.AntiCommutativityTest):
     def setUp(self):
         self.gc_list = [HairyGraphComplex.HairyGC(v_range, l_range, h_range, False, False, ['contract', 'et1h'])]
 
+
+class OrbitReductionTest(TestGraphComplex.OrbitReductionTest):
+    def setUp(self):
+        # The automorphisms respect the partition into internal vertices and hairs.
+        self.op_list = [HairyGraphComplex.ContractEdgesGO.generate_operator(v, l, h, even_edges, even_hairs) for
+                        (v, l, h, even_edges, even_hairs) in itertools.product(range(3, 7), range(2, 5), range(1, 4),
+                                                                               edges_types, hairs_types)]
+
 def suite():
     suite = unittest.TestSuite()
     suite.addTest(BasisTest('test_basis_functionality'))
@@ -64,6 +72,7 @@ def suite():
     suite.addTest(CohomologyTest('test_cohomology_functionality'))
     suite.addTest(SquareZeroTest('test_square_zero'))
     suite.addTest(AntiCommutativityTest('test_anti_commutativity'))
+    suite.addTest(OrbitReductionTest('test_orbit_reduction'))
     return suite
 
 
@@ -0,0 +1,182 @@
+"""Test the preconditioning and the block decomposition of sparse matrices against Sage's rank over the rationals and
+finite fields, and the probabilistic test of vanishing matrix products.
+"""
+
+import unittest
+from sage.all import *
+import numpy as np
+import MatrixMethods
+
+
+def random_operator_arrays(m, n, seed, value_list=(-2, -1, -1, 1, 1, 2)):
+    # Random sparse matrix with entries from value_list and one to five entries per column, resembling an operator
+    # matrix, with some rows repeated up to sign, given as (rows, cols, values, shape).
+    rng = np.random.default_rng(seed)
+    entries = {}
+    for j in range(n):
+        for i in rng.choice(m, size=rng.integers(1, 6), replace=False):
+            entries[(int(i), j)] = int(rng.choice(value_list))
+    for i in rng.choice(m, size=m // 5, replace=False):
+        (i2, sign) = (int(rng.integers(m)), int(rng.choice([-1, 1])))
+        entries = {key: v for (key, v) in entries.items() if key[0] != i2}
+        entries.update({(i2, j): sign * v for ((i1, j), v) in list(entries.items()) if i1 == i})
+    (rows, cols) = (np.array([i for (i, j) in entries], dtype=np.int64),
+                    np.array([j for (i, j) in entries], dtype=np.int64))
+    return (rows, cols, np.array(list(entries.values()), dtype=np.int64), (m, n))
+
+
+def sage_rank(rows, cols, values, shape, ring=QQ):
+    entries = {}
+    for (i, j, v) in zip(rows, cols, values):
+        entries[(int(i), int(j))] = entries.get((int(i), int(j)), 0) + int(v)
+    return matrix(ring, shape[0], shape[1], entries, sparse=True).rank()
+
+
+def map_arrays(X):
+    # Arrays of the linear map given by the integer matrix X, with the rows indexing the domain as in the matrix files.
+    (rows, cols) = np.nonzero(X.T)
+    return (rows, cols, X.T[rows, cols], X.T.shape)
+
+
+def square_zero_pair(n, k, l, seed):
+    # Integer matrices X (k x n) and Y (l x k) with Y X = 0, obtained from [[V], [0]] and [0, W] by a change of basis
+    # with a random unimodular matrix G, whose inverse is computed from the elementary factors.
+    rng = np.random.default_rng(seed)
+    r = k // 2
+    (G, G_inv) = (np.eye(k, dtype=np.int64), np.eye(k, dtype=np.int64))
+    for _ in range(3 * k):
+        (i, j) = rng.choice(k, size=2, replace=False)
+        c = int(rng.choice([-1, 1]))
+        G[i] += c * G[j]
+        G_inv[:, j] -= c * G_inv[:, i]
+    X = G @ np.vstack((rng.integers(-2, 3, size=(r, n)), np.zeros((k - r, n), dtype=np.int64)))
+    Y = np.hstack((np.zeros((l, r), dtype=np.int64), rng.integers(-2, 3, size=(l, k - r)))) @ G_inv
+    return (X, Y)
+
+
+class PreconditionTest(unittest.TestCase):
+    def test_rank(self):
+        for seed in range(30):
+            A = random_operator_arrays(10 + seed, 8 + 2 * seed % 25, seed)
+            rank = sage_rank(*A)
+            for doubletons in [False, True]:
+                for duplicates in [False, True]:
+                    (rows, cols, values, shape, rankbias) = MatrixMethods.precondition_arrays(
+                        *A, doubletons=doubletons, duplicates=duplicates)
+                    self.assertEqual(sage_rank(rows, cols, values, shape) + rankbias, rank)
+
+    def test_rank_mod_p(self):
+        # Entries divisible by the primes are only pivots over the rationals.
+        for seed in range(30):
+            A = random_operator_arrays(10 + seed, 8 + 2 * seed % 25, seed, value_list=(-3, -2, -1, 1, 2, 3, 5, 6))
+            for prime in [2, 3, 5]:
+                (rows, cols, values, shape, rankbias) = MatrixMethods.precondition_arrays(*A, prime=prime)
+                self.assertTrue(np.all(np.abs(values) <= prime // 2) and np.all(values != 0))
+                self.assertEqual(sage_rank(rows, cols, values, shape, GF(prime)) + rankbias,
+                                 sage_rank(*A, GF(prime)))
+        A = (np.array([0, 1]), np.array([0, 1]), np.array([3, 1]), (2, 2))
+        self.assertEqual(MatrixMethods.precondition_arrays(*A)[4], 2)
+        self.assertEqual(MatrixMethods.precondition_arrays(*A, prime=3)[4], 1)
+
+    def test_fixpoint(self):
+        for seed in range(10):
+            B = MatrixMethods.precondition_arrays(*random_operator_arrays(30, 30, seed))
+            C = MatrixMethods.precondition_arrays(*B[:4])
+            self.assertEqual((C[3], C[4], len(C[2])), (B[3], 0, len(B[2])))
+
+    def test_reductions(self):
+        # Duplicate entries are summed, the duplicate row 2 = -row 1 is removed and the singleton column 3 is a pivot.
+        rows = np.array([0, 0, 0, 1, 1, 2, 2, 3, 3, 3])
+        cols = np.array([0, 1, 1, 0, 1, 0, 1, 0, 1, 3])
+        values = np.array([1, 1, 1, 1, 3, -1, -3, 2, 5, 7])
+        (rows, cols, values, shape, rankbias) = MatrixMethods.precondition_arrays(
+            rows, cols, values, (4, 4), doubletons=False)
+        self.assertEqual((shape, rankbias), ((2, 2), 1))
+        self.assertEqual(sorted(zip(rows.tolist(), cols.tolist(), values.tolist())),
+                         [(0, 0, 1), (0, 1, 2), (1, 0, 1), (1, 1, 3)])
+
+    def test_empty(self):
+        empty = np.zeros(0, dtype=np.int64)
+        (rows, cols, values, shape, rankbias) = MatrixMethods.precondition_arrays(empty, empty, empty, (3, 4))
+        self.assertEqual((len(values), shape, rankbias), (0, (0, 0), 0))
+
+
+class ConnectedBlocksTest(unittest.TestCase):
+    def test_blocks(self):
+        # Block diagonal matrix with the rows and columns shuffled.
+        rng = np.random.default_rng(0)
+        block_list = [random_operator_arrays(8 + 4 * k, 3 + 3 * k, k) for k in range(5)]
+        (m, n) = (sum(b[3][0] for b in block_list) + 2, sum(b[3][1] for b in block_list) + 3)
+        (row_perm, col_perm) = (rng.permutation(m), rng.permutation(n))
+        (row_offset, col_offset) = (0, 0)
+        (rows, cols, values) = ([], [], [])
+        for (b_rows, b_cols, b_values, (b_m, b_n)) in block_list:
+            rows.append(row_perm[b_rows + row_offset])
+            cols.append(col_perm[b_cols + col_offset])
+            values.append(b_values)
+            (row_offset, col_offset) = (row_offset + b_m, col_offset + b_n)
+        A = (np.concatenate(rows), np.concatenate(cols), np.concatenate(values), (m, n))
+        blocks = MatrixMethods.connected_blocks(*A)
+        self.assertEqual(sum(sage_rank(*block) for block in blocks), sage_rank(*A))
+        self.assertEqual(sum(len(block[2]) for block in blocks), len(A[2]))
+        self.assertEqual([len(block[2]) for block in blocks], sorted([len(block[2]) for block in blocks], reverse=True))
+        self.assertGreaterEqual(len(blocks), 5)
+        for (b_rows, b_cols, b_values, (b_m, b_n)) in blocks:
+            # Each block has no zero rows and columns and is connected.
+            self.assertEqual((len(set(b_rows.tolist())), len(set(b_cols.tolist()))), (b_m, b_n))
+            self.assertEqual(len(MatrixMethods.connected_blocks(b_rows, b_cols, b_values, (b_m, b_n))), 1)
+
+    def test_empty(self):
+        empty = np.zeros(0, dtype=np.int64)
+        self.assertEqual(MatrixMethods.connected_blocks(empty, empty, empty, (3, 4)), [])
+
+
+class RandomProductTest(unittest.TestCase):
+    def test_vanishing(self):
+        for seed in range(10):
+            (X, Y) = square_zero_pair(12, 10, 9, seed)
+            self.assertEqual(np.abs(Y @ X).max(), 0)
+            (vanishes, n_trials) = MatrixMethods.random_product_test([(1, [map_arrays(X), map_arrays(Y)])], seed=seed)
+            self.assertTrue(vanishes)
+            self.assertGreaterEqual(n_trials, 1)
+            # Linear combination of products with different numbers of factors.
+            products = [(2, [map_arrays(X), map_arrays(Y)]), (-1, [map_arrays(X), map_arrays(2 * Y)]),
+                        (3, [map_arrays(Y @ X)])]
+            self.assertTrue(MatrixMethods.random_product_test(products, seed=seed)[0])
+
+    def test_corrupted(self):
+        for seed in range(10):
+            (X, Y) = square_zero_pair(12, 10, 9, seed)
+            # Change a single entry of Y, in a column for which the row of X is nonzero.
+            rng = np.random.default_rng(seed)
+            j = int(rng.choice(np.flatnonzero(np.abs(X).sum(axis=1))))
+            Y[int(rng.integers(Y.shape[0])), j] += 1
+            products = [(1, [map_arrays(X), map_arrays(Y)])]
+            self.assertFalse(MatrixMethods.random_product_test(products, seed=seed)[0])
+            # The product of the corrupted matrices is cancelled only with the right sign.
+            self.assertTrue(MatrixMethods.random_product_test(products + [(-1, [map_arrays(Y @ X)])], seed=seed)[0])
+            self.assertFalse(MatrixMethods.random_product_test(products + [(1, [map_arrays(Y @ X)])], seed=seed)[0])
+
+    def test_empty(self):
+        self.assertEqual(MatrixMethods.random_product_test([]), (True, 0))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(PreconditionTest('test_rank'))
+    suite.addTest(PreconditionTest('test_rank_mod_p'))
+    suite.addTest(PreconditionTest('test_fixpoint'))
+    suite.addTest(PreconditionTest('test_reductions'))
+    suite.addTest(PreconditionTest('test_empty'))
+    suite.addTest(ConnectedBlocksTest('test_blocks'))
+    suite.addTest(ConnectedBlocksTest('test_empty'))
+    suite.addTest(RandomProductTest('test_vanishing'))
+    suite.addTest(RandomProductTest('test_corrupted'))
+    suite.addTest(RandomProductTest('test_empty'))
+    return suite
+
+
+if __name__ == '__main__':
+    print("\n#####################################\n" + "----- Start test suite for matrix methods -----")
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,109 @@
+"""Test the native rank computation over finite fields against Sage's rank of sparse matrices, and the certification of
+multiprime ranks over the rationals.
+"""
+
+import unittest
+from sage.all import *
+import numpy as np
+import ModularRank
+import Parameters
+import GraphOperator
+
+
+primes = [2, 3, 32003, 2**31 - 1]
+
+
+def random_matrix_arrays(m, n, rank, density, seed):
+    # Random integer matrix as product of an m x rank and a rank x n matrix with small entries and the given density,
+    # given as (rows, cols, values, shape).
+    rng = np.random.default_rng(seed)
+    left = rng.integers(-3, 4, size=(m, rank)) * (rng.random((m, rank)) < density)
+    right = rng.integers(-3, 4, size=(rank, n)) * (rng.random((rank, n)) < density)
+    A = left @ right
+    (rows, cols) = np.nonzero(A)
+    return (rows, cols, A[rows, cols], (m, n))
+
+
+def sage_rank(rows, cols, values, shape, prime):
+    return matrix(GF(prime), shape[0], shape[1], {(int(i), int(j)): int(v) for (i, j, v) in zip(rows, cols, values)},
+                  sparse=True).rank()
+
+
+class ModularRankTest(unittest.TestCase):
+    def test_rank(self):
+        for seed in range(40):
+            (m, n) = (5 + seed % 7 * 6, 3 + seed % 5 * 9)
+            A = random_matrix_arrays(m, n, min(m, n) - seed % 4, [0.1, 0.3, 1.0][seed % 3], seed)
+            for prime in primes:
+                self.assertEqual(ModularRank.rank(*A, prime), sage_rank(*A, prime))
+
+    def test_dense_elimination(self):
+        # Dense matrices switch to the dense elimination after a few pivots.
+        for seed in range(5):
+            A = random_matrix_arrays(60, 50, 40 + seed, 1.0, seed)
+            for prime in primes:
+                self.assertEqual(ModularRank.rank(*A, prime), sage_rank(*A, prime))
+
+    def test_pivots(self):
+        for seed in range(10):
+            (rows, cols, values, shape) = random_matrix_arrays(20, 15, 12, 0.3, seed)
+            for prime in primes:
+                (r, pivot_rows, pivot_cols) = ModularRank.rank(rows, cols, values, shape, prime, return_pivots=True)
+                self.assertEqual((len(pivot_rows), len(pivot_cols)), (r, r))
+                M = matrix(GF(prime), shape[0], shape[1],
+                           {(int(i), int(j)): int(v) for (i, j, v) in zip(rows, cols, values)})
+                self.assertEqual(M.matrix_from_rows_and_columns(pivot_rows, pivot_cols).rank(), r)
+
+    def test_empty(self):
+        empty = np.zeros(0, dtype=np.int64)
+        self.assertEqual(ModularRank.rank(empty, empty, empty, (0, 0), 3), 0)
+        self.assertEqual(ModularRank.rank(empty, empty, empty, (4, 5), 3), 0)
+
+    def test_large_prime(self):
+        self.assertRaises(ValueError, ModularRank.rank, [0], [0], [1], (1, 1), 2**31 + 11)
+
+
+class CertifyRankTest(unittest.TestCase):
+    def test_certify(self):
+        for seed in range(10):
+            A = random_matrix_arrays(20, 15, 8 + seed % 4, 0.5, seed)
+            (r, pivot_rows, pivot_cols) = ModularRank.rank(*A, 32003, return_pivots=True)
+            self.assertTrue(GraphOperator._certify_rank(A, pivot_rows, pivot_cols, seed=seed))
+            # A pivot minor smaller than the rank is not certified.
+            self.assertFalse(GraphOperator._certify_rank(A, pivot_rows[:-1], pivot_cols[:-1], seed=seed))
+
+    def test_rank_mod_p(self):
+        # The rank modulo 2 is smaller than the rank over the rationals.
+        A = (np.array([0, 0, 1, 1]), np.array([0, 1, 0, 1]), np.array([1, 1, 1, -1]), (2, 2))
+        (r, pivot_rows, pivot_cols) = ModularRank.rank(*A, 2, return_pivots=True)
+        self.assertEqual(r, 1)
+        self.assertFalse(GraphOperator._certify_rank(A, pivot_rows, pivot_cols))
+
+    def test_max_rank(self):
+        A = random_matrix_arrays(20, 15, 8, 0.5, 0)
+        (r, pivot_rows, pivot_cols) = ModularRank.rank(*A, 32003, return_pivots=True)
+        certify_max_rank = Parameters.certify_max_rank
+        Parameters.certify_max_rank = r - 1
+        try:
+            self.assertIsNone(GraphOperator._certify_rank(A, pivot_rows, pivot_cols))
+        finally:
+            Parameters.certify_max_rank = certify_max_rank
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(ModularRankTest('test_rank'))
+    suite.addTest(ModularRankTest('test_dense_elimination'))
+    suite.addTest(ModularRankTest('test_pivots'))
+    suite.addTest(ModularRankTest('test_empty'))
+    suite.addTest(ModularRankTest('test_large_prime'))
+    suite.addTest(CertifyRankTest('test_certify'))
+    suite.addTest(CertifyRankTest('test_rank_mod_p'))
+    suite.addTest(CertifyRankTest('test_max_rank'))
+    return suite
+
+
+if __name__ == '__main__':
+    print("\n#####################################\n" + "----- Start test suite for the native modular rank -----")
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
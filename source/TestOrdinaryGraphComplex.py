@@ -48,6 +48,21 @@ class AntiCommutativityTest(TestGraphComplex.AntiCommutativityTest):
         self.gc_list = [OrdinaryGraphComplex.OrdinaryGC(v_range, l_range, False, ['contract', 'delete'])]
 
 
+class CompactGraphTest(TestGraphComplex.CompactGraphTest):
+    def setUp(self):
+        self.op_list = [OrdinaryGraphComplex.ContractEdgesGO.generate_operator(v, l, even_edges) for (v, l, even_edges)
+                        in itertools.product(range(3, 9), range(3, 6), edges_types)]
+        self.op_list += [OrdinaryGraphComplex.DeleteEdgesGO.generate_operator(v, l, even_edges) for (v, l, even_edges)
+                         in itertools.product(range(3, 9), range(3, 6), edges_types)]
+
+
+class OrbitReductionTest(TestGraphComplex.OrbitReductionTest):
+    def setUp(self):
+        # Includes the domains of K_{3,3} (6 vertices, 4 loops) and of the wheel with 5 spokes (6 vertices, 5 loops).
+        self.op_list = [OrdinaryGraphComplex.ContractEdgesGO.generate_operator(v, l, even_edges) for (v, l, even_edges)
+                        in itertools.product(range(3, 9), range(3, 6), edges_types)]
+
+
 def suite():
     suite = unittest.TestSuite()
     suite.addTest(BasisTest('test_basis_functionality'))
@@ -58,6 +73,8 @@ def suite():
     suite.addTest(CohomologyTest('test_cohomology_functionality'))
     suite.addTest(SquareZeroTest('test_square_zero'))
     suite.addTest(AntiCommutativityTest('test_anti_commutativity'))
+    suite.addTest(CompactGraphTest('test_compact_graphs'))
+    suite.addTest(OrbitReductionTest('test_orbit_reduction'))
     return suite
 
 
@@ -0,0 +1,109 @@
+"""Test the fault tolerant execution of parallel tasks: retries, timeouts, killed workers and error propagation."""
+
+import unittest
+import os
+import time
+import signal
+import tempfile
+import Parallel
+
+
+def square(x):
+    return x * x
+
+
+def fail_once(path):
+    # Fails on the first attempt, which is recorded by creating the file at path.
+    if not os.path.exists(path):
+        open(path, 'w').close()
+        raise RuntimeError("First attempt of %s" % path)
+    return path
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def kill_self(x):
+    if x == 0:
+        os.kill(os.getpid(), signal.SIGKILL)
+    return x
+
+
+def fail_on_zero(x):
+    if x == 0:
+        raise ValueError("zero")
+    return x
+
+
+def process_id(x):
+    return os.getpid()
+
+
+class ExecutorTest(unittest.TestCase):
+    def test_results(self):
+        for n_jobs in [1, 3]:
+            tasks = Parallel.Executor(n_jobs=n_jobs).map(square, range(20))
+            self.assertEqual([task.result for task in tasks], [x * x for x in range(20)])
+            self.assertTrue(all(task.is_done() and task.attempts == 1 for task in tasks))
+
+    def test_retry(self):
+        for n_jobs in [1, 2]:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                paths = [os.path.join(temp_dir, 'task%d' % k) for k in range(4)]
+                tasks = Parallel.Executor(n_jobs=n_jobs, retries=0).map(fail_once, paths)
+                self.assertTrue(all(task.status == 'failed' for task in tasks))
+                self.assertTrue(all(isinstance(task.exception, RuntimeError) for task in tasks))
+                tasks = Parallel.Executor(n_jobs=n_jobs, retries=1).map(fail_once, paths)
+                self.assertTrue(all(task.is_done() and task.attempts == 1 for task in tasks))
+            with tempfile.TemporaryDirectory() as temp_dir:
+                paths = [os.path.join(temp_dir, 'task%d' % k) for k in range(4)]
+                tasks = Parallel.Executor(n_jobs=n_jobs, retries=1).map(fail_once, paths)
+                self.assertTrue(all(task.is_done() and task.attempts == 2 for task in tasks))
+
+    def test_timeout(self):
+        start_time = time.time()
+        tasks = Parallel.Executor(n_jobs=2, timeout=0.5).map(sleep, [30, 0.1, 0.1])
+        self.assertLess(time.time() - start_time, 10)
+        self.assertEqual([task.status for task in tasks], ['timeout', 'done', 'done'])
+
+    def test_killed_worker(self):
+        tasks = Parallel.Executor(n_jobs=2).map(kill_self, range(5))
+        self.assertEqual(tasks[0].status, 'killed')
+        self.assertEqual([task.result for task in tasks[1:]], [1, 2, 3, 4])
+        tasks = Parallel.Executor(n_jobs=2, retries=2).map(kill_self, range(3))
+        self.assertEqual((tasks[0].status, tasks[0].attempts), ('killed', 3))
+        self.assertTrue(all(task.is_done() for task in tasks[1:]))
+
+    def test_maxtasksperchild(self):
+        tasks = Parallel.Executor(n_jobs=2, maxtasksperchild=1).map(process_id, range(6))
+        self.assertEqual(len({task.result for task in tasks}), 6)
+
+    def test_exception_propagation(self):
+        # With one process the exception propagates at once, with the original type in both cases.
+        for n_jobs in [1, 2]:
+            with self.assertRaises(ValueError):
+                Parallel.parallel(fail_on_zero, [1, 0, 2], n_jobs=n_jobs)
+            with self.assertRaises(ValueError):
+                Parallel.parallel_map(fail_on_zero, [1, 0, 2], n_jobs=n_jobs)
+        self.assertEqual(Parallel.parallel_map(fail_on_zero, [1, 2, 3], n_jobs=2), [1, 2, 3])
+        # A killed worker is reported with the status report.
+        self.assertRaises(RuntimeError, Parallel.parallel, kill_self, [0, 1], n_jobs=2)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(ExecutorTest('test_results'))
+    suite.addTest(ExecutorTest('test_retry'))
+    suite.addTest(ExecutorTest('test_timeout'))
+    suite.addTest(ExecutorTest('test_killed_worker'))
+    suite.addTest(ExecutorTest('test_maxtasksperchild'))
+    suite.addTest(ExecutorTest('test_exception_propagation'))
+    return suite
+
+
+if __name__ == '__main__':
+    print("\n#####################################\n" + "----- Start test suite for parallel execution -----")
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,109 @@
+"""Test the scheduling of the pipeline tasks by their dependencies and the skipping of tasks depending on failed
+tasks, with mock vector spaces and operator matrices.
+"""
+
+import unittest
+import os
+import tempfile
+import Pipeline
+
+
+class MockVectorSpace:
+    # Vector space whose basis file is created by build_basis, or whose basis fails to build.
+
+    def __init__(self, name, path, fail=False):
+        self.name = name
+        self.path = path
+        self.fail = fail
+
+    def __str__(self):
+        return self.name
+
+    def build_basis(self, ignore_existing_files=False):
+        if self.fail:
+            raise RuntimeError("Failed to build the basis of %s" % self.name)
+        open(self.path, 'w').close()
+
+
+class MockOperatorMatrix:
+    # Operator matrix whose matrix and rank files are created by build_matrix and compute_rank, which require the
+    # basis and matrix files.
+
+    def __init__(self, name, path, domain, target, fail=False):
+        self.name = name
+        self.path = path
+        self.domain = domain
+        self.target = target
+        self.fail = fail
+
+    def __str__(self):
+        return self.name
+
+    def build_matrix(self, ignore_existing_files=False):
+        if self.fail or not all(os.path.exists(vs.path) for vs in (self.domain, self.target)):
+            raise RuntimeError("Failed to build the matrix of %s" % self.name)
+        open(self.path + '.matrix', 'w').close()
+
+    def compute_rank(self, ignore_existing_files=False, **rank_options):
+        if not os.path.exists(self.path + '.matrix'):
+            raise RuntimeError("Missing matrix of %s" % self.name)
+        open(self.path + '.rank', 'w').close()
+
+    def get_memory_estimate(self, stage, **rank_options):
+        return 0
+
+
+def mock_pipeline(temp_dir):
+    # Pipeline with the tasks inserted in reverse order of their dependencies. The basis of B and the matrix of op3
+    # fail to build.
+    (A, B, C) = (MockVectorSpace(name, os.path.join(temp_dir, name), fail=(name == 'B')) for name in 'ABC')
+    op_list = [MockOperatorMatrix('op1', os.path.join(temp_dir, 'op1'), A, B),
+               MockOperatorMatrix('op2', os.path.join(temp_dir, 'op2'), A, C),
+               MockOperatorMatrix('op3', os.path.join(temp_dir, 'op3'), C, C, fail=True)]
+    pipeline = Pipeline.Pipeline([], stage_list=['basis', 'matrix', 'rank'])
+    for op in op_list:
+        pipeline._add_task('rank', op, Pipeline._op_key('rank', op), [Pipeline._op_key('matrix', op)])
+        pipeline._add_task('matrix', op, Pipeline._op_key('matrix', op),
+                           [Pipeline._basis_key(op.domain), Pipeline._basis_key(op.target)])
+    for vs in (A, B, C):
+        pipeline._add_task('basis', vs, Pipeline._basis_key(vs))
+    return pipeline
+
+
+class PipelineTest(unittest.TestCase):
+    def test_dependencies(self):
+        for n_jobs in [1, 2]:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                status = mock_pipeline(temp_dir).run(n_jobs=n_jobs, native='mod')
+                self.assertEqual({key: task_status.status for (key, task_status) in status.items()},
+                                 {'basis of A': 'done', 'basis of B': 'failed', 'basis of C': 'done',
+                                  'matrix of op1': 'skipped', 'rank of op1': 'skipped',
+                                  'matrix of op2': 'done', 'rank of op2': 'done',
+                                  'matrix of op3': 'failed', 'rank of op3': 'skipped'})
+                self.assertEqual(status['matrix of op1'].error, "Dependency basis of B failed")
+                self.assertEqual(status['rank of op1'].error, "Dependency matrix of op1 skipped")
+                self.assertEqual(status['rank of op3'].error, "Dependency matrix of op3 failed")
+                # Skipped tasks are not executed.
+                self.assertEqual(sorted(os.listdir(temp_dir)), ['A', 'C', 'op2.matrix', 'op2.rank'])
+                self.assertIn('skipped', Pipeline.Pipeline.report(status))
+
+    def test_rank_method_required(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.assertRaises(ValueError, mock_pipeline(temp_dir).run)
+
+    def test_unknown_stage(self):
+        self.assertRaises(ValueError, Pipeline.Pipeline, [], ['basis', 'graphs'])
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(PipelineTest('test_dependencies'))
+    suite.addTest(PipelineTest('test_rank_method_required'))
+    suite.addTest(PipelineTest('test_unknown_stage'))
+    return suite
+
+
+if __name__ == '__main__':
+    print("\n#####################################\n" + "----- Start test suite for the pipeline -----")
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -0,0 +1,88 @@
+"""Test the rank server with the native modular rank computation, and its handling of workers which exit or close
+their pipe without a result.
+"""
+
+import unittest
+import os
+import time
+import multiprocessing as mp
+import numpy as np
+import ModularRank
+import RankServer
+
+
+prime = 32003
+
+
+def random_matrix_arrays(m, n, seed):
+    # Random sparse integer matrix with entries in [-2, 2], given as (rows, cols, values, shape).
+    rng = np.random.default_rng(seed)
+    A = rng.integers(-2, 3, size=(m, n)) * (rng.random((m, n)) < 0.3)
+    (rows, cols) = np.nonzero(A)
+    return (rows, cols, A[rows, cols], (m, n))
+
+
+def _close_pipe(conn):
+    # Worker which receives a task, closes its end of the pipe and stays alive.
+    conn.recv()
+    conn.recv_bytes()
+    conn.close()
+    time.sleep(60)
+
+
+def _exit(conn):
+    # Worker which exits without a result.
+    os._exit(3)
+
+
+def broken_worker(target):
+    # Worker of the rank server running target instead of the rank computations.
+    worker = RankServer._Worker.__new__(RankServer._Worker)
+    (worker.conn, child_conn) = mp.Pipe()
+    worker.process = mp.Process(target=target, args=(child_conn,), daemon=True)
+    worker.process.start()
+    child_conn.close()
+    worker.task_id = None
+    return worker
+
+
+class RankServerTest(unittest.TestCase):
+    def test_ranks(self):
+        matrices = {seed: random_matrix_arrays(10 + seed, 12, seed) for seed in range(8)}
+        with RankServer.RankServer(3) as server:
+            results = list(server.compute_ranks((seed, A, ['native_mod'], prime) for (seed, A) in matrices.items()))
+        self.assertEqual(sorted(task_id for (task_id, ranks, error) in results), list(matrices))
+        for (task_id, ranks, error) in results:
+            self.assertIsNone(error)
+            self.assertEqual(ranks, {'native_mod_%d' % prime: ModularRank.rank(*matrices[task_id], prime)})
+
+    def test_broken_workers(self):
+        for target in [_close_pipe, _exit]:
+            with RankServer.RankServer(1) as server:
+                server.workers[0].close()
+                server.workers = [broken_worker(target)]
+                (wall_time, cpu_time) = (time.time(), time.process_time())
+                results = list(server.compute_ranks([(0, random_matrix_arrays(5, 5, 0), ['native_mod'], prime)]))
+                # The server waits for the worker to exit without polling the closed pipe.
+                self.assertLess(time.time() - wall_time, 30)
+                self.assertLess(time.process_time() - cpu_time, 1)
+                self.assertEqual(len(results), 1)
+                (task_id, ranks, error) = results[0]
+                self.assertEqual((task_id, ranks), (0, None))
+                self.assertIn("Rank worker exited", error)
+                # The worker is replaced.
+                self.assertEqual(len(server.workers), 1)
+                self.assertTrue(server.workers[0].process.is_alive())
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(RankServerTest('test_ranks'))
+    suite.addTest(RankServerTest('test_broken_workers'))
+    return suite
+
+
+if __name__ == '__main__':
+    print("\n#####################################\n" + "----- Start test suite for the rank server -----")
+    runner = unittest.TextTestRunner()
+    runner.run(suite())
@@ -157,11 +157,7 @@ class WOHairyComponentGVS(CHairyGraphComplex.CHairyGraphVS):
         
         #print("vertex-permutation: ", p)
 
-        G1 = copy(G)
-        Shared.enumerate_edges(G1)
-        # We permute the graph, and read of the new labels
-        G1.relabel(p, inplace=True)
-        sgn = Shared.Perm([j for (u, v, j) in G1.edges(sort=True)]).signature()
+        sgn = Shared.edge_perm_sign_from_relabelling(G.edges(labels=False, sort=True), p)
         
         # Compute the extra contribution from omega-hairs.
         if self.n_omega > 0:
@@ -307,12 +307,13 @@ class WRHairyGraphVS(SymmetricGraphComplex.SymmetricGraphVectorSpace):
     def get_generating_graphs(self):
         # The routines above produce all wgraphs, we just have to permute the hair labels
 
-        # Produce all permutations of the hairs
-        all_perm = [list(range(0, self.n_vertices+2)) + list(p)
-                    for p in itertools.permutations(range(self.n_vertices+2, self.n_vertices+self.n_hairs+2))]
-
-        return (G.relabel(p, inplace=False) for G in self._get_all_wgraphs(self.n_vertices, self.n_loops, self.n_hairs, self.n_ws)
-                for p in all_perm)
+        # Produce the permutations of the hairs up to automorphisms of the graph
+        idv = list(range(0, self.n_vertices+2))
+        hairs = list(range(self.n_vertices+2, self.n_vertices+self.n_hairs+2))
+        partition = [idv[:self.n_vertices], [self.n_vertices], [self.n_vertices+1], hairs]
+        target_cells = [[j] for j in hairs]
+        return (G.relabel(idv + p, inplace=False) for G in self._get_all_wgraphs(self.n_vertices, self.n_loops, self.n_hairs, self.n_ws)
+                for p in Shared.hair_labellings(G, partition, hairs, target_cells))
 
     def perm_sign(self, G, p):
         # The sign is the same as the corresponding sign in the